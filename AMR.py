@@ -1,41 +1,73 @@
 import math
 import pygame as pg
-from assets import WIDTH, HEIGHT, BLACK, AIUT_BLUE, RED, WIN
+import assets
+from assets import WIDTH, HEIGHT, BLACK, AIUT_BLUE, RED
 from map import Map
 from interface import Interface
+from trail import Trail
+from sim_clock import DT
 
+# Default speeds of an AMR, per second of simulated time
+LIN_SPEED_PX_S = 180
+ROT_SPEED_DEG_S = 60
 
 class Amr():
     """
     Class representing an Autonomous Mobile Robot (AMR).
     """
 
-    def __init__(self, x=WIDTH // 2, y=HEIGHT // 2):
+    def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, headless=False, trail_capacity=2000, map_size=(WIDTH, HEIGHT), dt=DT):
         """
         Initialize the AMR with default or provided position, and other attributes.
+        In headless mode no fonts are loaded and nothing may be drawn.
+        The trail keeps at most trail_capacity points of the travelled path, 0 turns it off.
+        Maps larger than the window (map_size) can only be used headless.
+        The speeds are given per second and integrated with the fixed physics step dt.
         """
+        self.headless = headless
         self.leave_track = False
         self.plan_trajectory = False
         self.width, self.height = 50, 75
         self.half_diag = math.sqrt((self.height / 2) ** 2 + (self.width / 2) ** 2)
-        self.x, self.y = WIDTH // 2, HEIGHT // 2
+        self.x, self.y = x, y
         self.angle_rad = 0
         self.color = BLACK
         self.front_color = AIUT_BLUE
-        self.lin_speed = 3
-        self.rot_speed_deg = 1
-        self.coord_memory = []
+        self.lin_speed_px_s = LIN_SPEED_PX_S
+        self.rot_speed_deg_s = ROT_SPEED_DEG_S
+        self.set_timestep(dt)
+        self.controller = "stop_and_turn"
+        self.lookahead = 60
+        self.max_pursuit_angle = math.radians(30)
+        self.total_rotation = 0.0
+        self._segment = (None, None)
+        self.coord_memory = Trail(trail_capacity)
         self.target = None
         self.buffer = []
-        self.map = Map(self)
+        self.check_collisions = False
+        self.colliding = False
+        self.collisions = 0
+        self.map = Map(self, *map_size)
         self.interface = Interface(self)
 
+    def set_timestep(self, dt):
+        """
+        Set the physics step and derive the distance and angle covered per step from the speeds per second.
+        """
+        self.dt = dt
+        self.lin_speed = self.lin_speed_px_s * dt
+        self.rot_speed_deg = self.rot_speed_deg_s * dt
+
     def handle_movement(self, keys, destination):
         """
         Handle the movement of the AMR based on keyboard inputs or destination position.
+        Every call advances the AMR by one physics step.
+        A clicked destination is ignored while a planned path is followed and when it is on a button.
+        With check_collisions set, the footprint is checked against the map's clearance field after the step:
+        colliding tells whether it touches an obstacle and collisions counts the contacts.
         """
-        if not self.buffer:
-            self.target = destination if (destination != self.target and destination) else self.target
+        if destination and destination != self.target and not self.plan_trajectory and not self.map.is_on_button(destination):
+            self.target = destination
         if (self.plan_trajectory or self.buffer) and self.target:
             self.trajectory_planning()
         else:
@@ -47,50 +79,63 @@ class Amr():
                 self.rotate(1)
             if keys[pg.K_RIGHT]:
                 self.rotate(-1)
+        if self.check_collisions:
+            colliding = self.map.collides(self.corners())
+            self.collisions += colliding and not self.colliding
+            self.colliding = colliding
 
-    def move_fwd_bwd(self, direction):
+    def move_fwd_bwd(self, direction, distance=None):
         """
-        Move the AMR forward or backward based on the direction provided.
+        Move the AMR forward or backward based on the direction provided, by distance or one full step.
         """
-        self.y += self.lin_speed * math.cos(self.angle_rad) * direction
-        self.x += self.lin_speed * math.sin(self.angle_rad) * direction
-        self.coord_memory.append((self.x, self.y))
+        distance = self.lin_speed if distance is None else distance
+        self.y += distance * math.cos(self.angle_rad) * direction
+        self.x += distance * math.sin(self.angle_rad) * direction
+        self.coord_memory.append(self.x, self.y)
 
-    def rotate(self, direction):
+    def rotate(self, direction, angle_deg=None):
         """
-        Rotate the AMR based on the direction provided.
+        Rotate the AMR based on the direction provided, by angle_deg degrees or one full step.
         """
-        self.angle_rad += self.rot_speed_deg * math.pi / 180 * direction
+        angle_rad = (self.rot_speed_deg if angle_deg is None else angle_deg) * math.pi / 180
+        self.angle_rad += angle_rad * direction
         self.angle_rad %= 2 * math.pi
+        self.total_rotation += angle_rad
+
+    def corners(self):
+        """
+        Get the corner points of the AMR body.
+
+        Returns:
+            list: The four corner points.
+        """
+        rect_ang = math.atan2(self.height / 2, self.width / 2)
+        return [(self.x + self.half_diag * math.cos(angle + self.angle_rad),
+                 self.y - self.half_diag * math.sin(angle + self.angle_rad))
+                for angle in (rect_ang, -rect_ang + math.pi, rect_ang + math.pi, -rect_ang)]
 
     def draw_waypoints(self):
         """
         Draw waypoints on the screen for the AMR's path.
+
+        Returns:
+            list: The rectangles drawn on.
         """
-        for idx, coords in enumerate(self.coord_memory):
-            if idx % 5 == 0:
-                pg.draw.circle(WIN, RED, coords, 2)
+        return [pg.draw.circle(assets.WIN, RED, coords, 2) for coords in self.coord_memory.visible()]
 
     def draw(self):
         """
         Draw the AMR on the screen.
-        """
-        if self.leave_track:
-            self.draw_waypoints()
 
-        # AMR body base
-        points = []
+        Returns:
+            list: The rectangles drawn on.
+        """
+        rects = self.draw_waypoints() if self.leave_track else []
 
+        # AMR body base, red while touching an obstacle
         half_diag = self.half_diag
         rect_ang = math.atan2(self.height / 2, self.width / 2)
-        rect_angles = [rect_ang, -rect_ang + math.pi, rect_ang + math.pi, -rect_ang]
-
-        for angle in rect_angles:
-            y_offset = -1 * half_diag * math.sin(angle + self.angle_rad)
-            x_offset = half_diag * math.cos(angle + self.angle_rad)
-            points.append((self.x + x_offset, self.y + y_offset))
-
-        pg.draw.polygon(WIN, self.color, points)
+        rects.append(pg.draw.polygon(assets.WIN, RED if self.colliding else self.color, self.corners()))
 
         # AMR front light feature
         points = []
@@ -108,25 +153,103 @@ class Amr():
                 x_offset = half_diag_inner * math.cos(angle + self.angle_rad)
             points.append((self.x + x_offset, self.y + y_offset))
 
-        pg.draw.polygon(WIN, self.front_color, points)
+        pg.draw.polygon(assets.WIN, self.front_color, points)
+        return rects
 
     def trajectory_planning(self):
         """
-        Plan the trajectory of the AMR based on the destination position.
+        Plan the trajectory of the AMR based on the destination position, with the selected controller:
+        "stop_and_turn" turns in place towards every waypoint before driving to it, "pure_pursuit" steers
+        along the path while driving. total_rotation sums the turned angle in radians.
+        """
+        if self.controller == "pure_pursuit":
+            self.pure_pursuit()
+        else:
+            self.stop_and_turn()
+
+    def stop_and_turn(self):
+        """
+        Turn in place until the AMR faces the target, then drive straight to it.
+        The last turn and drive steps are cut to the remaining angle and distance, so coarse steps do not overshoot.
         """
         target_angle_rad = math.atan2(self.x - self.target[0], self.y - self.target[1])
         if target_angle_rad < 0:
             target_angle_rad += 2 * math.pi
         angle_diff_rad = target_angle_rad - self.angle_rad
         if abs(angle_diff_rad) * 180/math.pi > 1:
+            remaining_deg = abs((angle_diff_rad + math.pi) % (2 * math.pi) - math.pi) * 180 / math.pi
             if angle_diff_rad < - math.pi or (0 < angle_diff_rad < math.pi):
-                self.rotate(1)
+                self.rotate(1, min(self.rot_speed_deg, remaining_deg))
             else:
-                self.rotate(-1)
+                self.rotate(-1, min(self.rot_speed_deg, remaining_deg))
         else:
-            if math.sqrt((self.x - self.target[0]) ** 2 + (self.y - self.target[1]) ** 2) > 5:
-                self.move_fwd_bwd(-1)
+            distance = math.sqrt((self.x - self.target[0]) ** 2 + (self.y - self.target[1]) ** 2)
+            if distance > 5:
+                self.move_fwd_bwd(-1, min(self.lin_speed, distance))
             else:
                 self.target = None
                 if self.buffer:
-                    self.target = self.buffer.pop(0)
\ No newline at end of file
+                    self.target = self.buffer.pop(0)
+                else:
+                    self.plan_trajectory = False
+
+    def pure_pursuit(self):
+        """
+        Drive and steer at once along the path through the target and the buffered waypoints.
+
+        The lookahead point is where a circle of lookahead pixels around the AMR leaves the current path
+        segment, which starts where the AMR got its target. The AMR follows the arc through its position and
+        that point that is tangent to its heading. The arc curvature times the speed gives the turn rate;
+        where it would exceed the rotation speed, the AMR slows down to keep the arc. Following an arc turns
+        twice the heading error, so a point more than max_pursuit_angle off is faced by turning in place.
+        """
+        position = (self.x, self.y)
+        if self._segment[1] != self.target:
+            self._segment = (position, self.target)
+        while self.buffer and math.dist(position, self.target) < self.lookahead:
+            self.target = self.buffer.pop(0)
+            self._segment = (self._segment[1], self.target)
+        distance = math.dist(position, self.target)
+        if distance <= 5 and not self.buffer:
+            self.target = None
+            self.plan_trajectory = False
+            return
+        point = self._lookahead_point(position)
+        distance = math.dist(position, point)
+        # Heading error, positive when the point lies on the side rotate(1) turns to
+        alpha = (math.atan2(self.x - point[0], self.y - point[1]) - self.angle_rad + math.pi) % (2 * math.pi) - math.pi
+        max_turn = self.rot_speed_deg * math.pi / 180
+        if abs(alpha) > self.max_pursuit_angle:
+            turn, speed = math.copysign(min(max_turn, abs(alpha)), alpha), 0.0
+        else:
+            curvature = 2 * math.sin(alpha) / distance
+            speed = min(self.lin_speed, math.dist(position, self.target))
+            if abs(speed * curvature) > max_turn:
+                speed = max_turn / abs(curvature)
+            turn = speed * curvature
+        # Move along the arc, heading halfway through the turn
+        self.angle_rad += turn / 2
+        self.y -= speed * math.cos(self.angle_rad)
+        self.x -= speed * math.sin(self.angle_rad)
+        self.angle_rad = (self.angle_rad + turn / 2) % (2 * math.pi)
+        self.total_rotation += abs(turn)
+        if speed:
+            self.coord_memory.append(self.x, self.y)
+
+    def _lookahead_point(self, position):
+        """
+        Get the farthest point of the current path segment at lookahead distance, or the target if there is none.
+        """
+        (ax, ay), (bx, by) = self._segment
+        dx, dy = bx - ax, by - ay
+        fx, fy = ax - position[0], ay - position[1]
+        a = dx * dx + dy * dy
+        b = 2 * (fx * dx + fy * dy)
+        c = fx * fx + fy * fy - self.lookahead * self.lookahead
+        discriminant = b * b - 4 * a * c
+        if not a or discriminant < 0:
+            return self.target
+        t = (-b + math.sqrt(discriminant)) / (2 * a)
+        if not 0 <= t <= 1:
+            return self.target
+        return ax + t * dx, ay + t * dy
@@ -1,5 +1,11 @@
 import numpy as np
 import heapq
+import math
+
+SQRT2 = math.sqrt(2)
+# Scale applied to f-scores so they can be packed together with the node index into a single heap key
+KEY_SCALE = 1 << 20
+
 
 def is_valid(row, col, ROW, COL):
     """
@@ -16,70 +22,205 @@ def is_valid(row, col, ROW, COL):
     """
     return (row >= 0) and (row < ROW) and (col >= 0) and (col < COL)
 
-def a_star_search(grid, src, dest):
+
+def octile_distance(a, b):
+    """
+    Octile distance between two cells, the exact cost of an unobstructed 8-connected move sequence.
+
+    Args:
+        a (tuple): The first cell.
+        b (tuple): The second cell.
+
+    Returns:
+        float: The octile distance.
+    """
+    d_row, d_col = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return d_row + d_col + (SQRT2 - 2) * min(d_row, d_col)
+
+
+def path_cost(path, src):
+    """
+    Compute the octile cost of a path returned by a_star_search.
+
+    Args:
+        path (list): List of (row, col) cells, not including the source.
+        src (tuple): The source cell.
+
+    Returns:
+        float: The summed move cost.
+    """
+    cost, prev = 0.0, src
+    for cell in path:
+        cost += octile_distance(prev, cell)
+        prev = cell
+    return cost
+
+
+class AStarEngine:
+    """
+    A* search over an 8-connected occupancy grid with state kept in preallocated arrays.
+
+    Nodes are flat indices into the grid padded with a one cell blocked border, so neighbours never need
+    a bounds check. The g-scores, parents and closed flags live in NumPy arrays that are reused across
+    searches on grids of the same shape. Instead of being cleared, entries are stamped with the search
+    generation and treated as unset when the stamp is stale.
+
+    Attributes:
+        shape (tuple): The shape of the grid the arrays are allocated for.
+        expanded (int): The number of nodes expanded by the last search.
+    """
+    def __init__(self):
+        """
+        Initialize the engine. Arrays are allocated on the first search.
+        """
+        self.shape = None
+        self.generation = 0
+        self.expanded = 0
+
+    def _prepare(self, grid):
+        """
+        Allocate the arrays for the grid shape if needed and copy the grid into the padded blocked map.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid.
+        """
+        if self.shape != grid.shape:
+            ROW, COL = grid.shape
+            size = (ROW + 2) * (COL + 2)
+            self.shape = grid.shape
+            self.stride = COL + 2
+            self.blocked = np.ones((ROW + 2, COL + 2), dtype=np.uint8)
+            self.g_score = np.zeros(size, dtype=np.float64)
+            self.parent = np.zeros(size, dtype=np.int64)
+            self.seen = np.zeros(size, dtype=np.int64)
+            self.closed = np.zeros(size, dtype=np.int64)
+            self.generation = 0
+            stride = self.stride
+            self.moves = [(1, 1.0), (-1, 1.0), (stride, 1.0), (-stride, 1.0),
+                          (stride + 1, SQRT2), (stride - 1, SQRT2), (-stride + 1, SQRT2), (-stride - 1, SQRT2)]
+        self.blocked[1:-1, 1:-1] = grid != 0
+        self.generation += 1
+
+    def search(self, grid, src, dest, cancel=None):
+        """
+        Find the cheapest path from source to destination.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+            src (tuple): The source (row, col) cell.
+            dest (tuple): The destination (row, col) cell.
+            cancel (threading.Event): Optional event, checked every 1024 expansions, that aborts the search when set.
+
+        Returns:
+            list: A list of (row, col) tuples from the cell after the source up to the destination,
+                  or an empty list if no path is found.
+        """
+        self._prepare(grid)
+        self.expanded = 0
+        stride = self.stride
+        start = (src[0] + 1) * stride + src[1] + 1
+        goal = (dest[0] + 1) * stride + dest[1] + 1
+        if start == goal:
+            return []
+
+        gen = self.generation
+        blocked = memoryview(self.blocked.reshape(-1))
+        g_score = memoryview(self.g_score)
+        parent = memoryview(self.parent)
+        seen = memoryview(self.seen)
+        closed = memoryview(self.closed)
+        moves = self.moves
+        goal_row, goal_col = divmod(goal, stride)
+        shift = blocked.nbytes.bit_length()
+        mask = (1 << shift) - 1
+        diagonal_bonus = SQRT2 - 2
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        seen[start] = gen
+        g_score[start] = 0.0
+        open_list = [start]
+        expanded = 0
+        found = False
+        while open_list:
+            current = heappop(open_list) & mask
+            if closed[current] == gen:
+                continue
+            closed[current] = gen
+            expanded += 1
+            if current == goal:
+                found = True
+                break
+            if cancel is not None and not expanded & 1023 and cancel.is_set():
+                break
+            g_current = g_score[current]
+            for offset, cost in moves:
+                neighbour = current + offset
+                if blocked[neighbour] or closed[neighbour] == gen:
+                    continue
+                g_new = g_current + cost
+                if seen[neighbour] == gen and g_new >= g_score[neighbour]:
+                    continue
+                seen[neighbour] = gen
+                g_score[neighbour] = g_new
+                parent[neighbour] = current
+                row, col = divmod(neighbour, stride)
+                d_row = row - goal_row if row > goal_row else goal_row - row
+                d_col = col - goal_col if col > goal_col else goal_col - col
+                h_new = d_row + d_col + diagonal_bonus * (d_row if d_row < d_col else d_col)
+                heappush(open_list, (int((g_new + h_new) * KEY_SCALE) << shift) | neighbour)
+        self.expanded = expanded
+
+        if not found:
+            return []
+        path = []
+        node = goal
+        while node != start:
+            row, col = divmod(node, stride)
+            path.append((row - 1, col - 1))
+            node = parent[node]
+        return path[::-1]
+
+
+_engine = AStarEngine()
+
+
+def a_star_search(grid, src, dest, quiet=False, engine=None, cancel=None):
     """
     Perform A* search from source to destination in the grid.
 
+    Moves go to the 8 neighbouring cells, straight moves cost 1 and diagonal moves cost sqrt(2),
+    with the matching octile distance as heuristic.
+
     Args:
         grid (np.array): 2D numpy array representing the grid.
         src (tuple): A tuple representing the source coordinates.
         dest (tuple): A tuple representing the destination coordinates.
+        quiet (bool): If True, nothing is printed.
+        engine (AStarEngine): The engine to search with, the shared module engine by default.
+        cancel (threading.Event): Optional event aborting the search when set.
 
     Returns:
         list: A list of tuples representing the path from source to destination.
               Each tuple is a pair of (row, col) coordinates. If no path is found, returns an empty list.
     """
+    ROW, COL = grid.shape
+    if not is_valid(src[0], src[1], ROW, COL) or not is_valid(dest[0], dest[1], ROW, COL):
+        if not quiet:
+            print("Source or destination is outside the grid")
+        return []
     # Check if source and destination are not blocked
     if grid[src[0]][src[1]] == 1:
-        print("Source is blocked")
+        if not quiet:
+            print("Source is blocked")
         return []
     if grid[dest[0]][dest[1]] == 1:
-        print("Destination is blocked")
+        if not quiet:
+            print("Destination is blocked")
         return []
 
-    ROW, COL = grid.shape
-    print(f"ROW: {ROW}, COL: {COL}")
-    print(f"src: {src}, dest: {dest}")
-
-    # Define the 8 possible directions to move on the grid
-    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-
-    # Initialize the details of each cell
-    cell_details = {(i, j): {'f': float('inf'), 'g': float('inf'), 'h': 0, 'parent': None} for i in range(ROW) for j in range(COL)}
-
-    # Initialize the source cell details
-    cell_details[src]['f'] = cell_details[src]['g'] = 0
-
-    # Initialize the open list with the source cell
-    open_list = [(0.0, src)]
-
-    # Initialize the closed list to keep track of visited cells
-    closed_list = np.zeros((ROW, COL), dtype=bool)
-
-    # Start the A* search
-    while open_list:
-        _, (i, j) = heapq.heappop(open_list)
-        closed_list[i][j] = True
-
-        # Explore all the neighboring cells
-        for dir in directions:
-            new_i, new_j = i + dir[0], j + dir[1]
-            if is_valid(new_i, new_j, ROW, COL) and grid[new_i][new_j] == 0 and not closed_list[new_i][new_j]:
-                if (new_i, new_j) == dest:
-                    cell_details[(new_i, new_j)]['parent'] = (i, j)
-                    print("The destination cell is found")
-                    path = []
-                    while cell_details[(new_i, new_j)]['parent']:
-                        path.append((new_i, new_j))
-                        new_i, new_j = cell_details[(new_i, new_j)]['parent']
-                    return path[::-1]
-                else:
-                    g_new = cell_details[(i, j)]['g'] + 1.0
-                    h_new = ((new_i - dest[0]) ** 2 + (new_j - dest[1]) ** 2) ** 0.5
-                    f_new = g_new + h_new
-                    if cell_details[(new_i, new_j)]['f'] > f_new:
-                        heapq.heappush(open_list, (f_new, (new_i, new_j)))
-                        cell_details[(new_i, new_j)] = {'f': f_new, 'g': g_new, 'h': h_new, 'parent': (i, j)}
-
-    print("Failed to find the destination cell")
-    return []
\ No newline at end of file
+    engine = engine or _engine
+    path = engine.search(grid, src, dest, cancel)
+    if not quiet:
+        print(f"src: {src}, dest: {dest}, expanded: {engine.expanded}")
+        print("The destination cell is found" if path else "Failed to find the destination cell")
+    return path
@@ -3,7 +3,8 @@ import pygame as pg
 WIDTH, HEIGHT = 900, 500
 INTERFACE_WIDTH, INTERFACE_HEIGHT = 175, 75
 
-WIN = pg.display.set_mode((WIDTH, HEIGHT))
+# The window is created by init_display, so importing the simulation does not open one (headless mode)
+WIN = None
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -15,4 +16,41 @@ GREEN = (0, 255, 0)
 GREY = (169, 169, 169)
 LIGHT_GREY = (215, 215, 215)
 
-FONT = 'arial'
\ No newline at end of file
+FONT = 'arial'
+
+# Fonts loaded by get_font, shared by everything that draws text
+_fonts = {}
+
+
+def init_display():
+    """
+    Create the simulation window.
+
+    Returns:
+        pg.Surface: The display surface, also stored in WIN.
+    """
+    global WIN
+    if WIN is None:
+        WIN = pg.display.set_mode((WIDTH, HEIGHT))
+    return WIN
+
+
+def get_font(size, name=FONT):
+    """
+    Get a system font, loading it only the first time it is asked for.
+    pg.font.SysFont looks the font up among the installed fonts, so all text is drawn with the fonts kept here.
+
+    Args:
+        size (int): The font size.
+        name (str): Comma separated font names, the first one installed is used.
+
+    Returns:
+        pg.font.Font: The font.
+    """
+    if not pg.font.get_init():
+        pg.font.init()
+        _fonts.clear()
+    font = _fonts.get((name, size))
+    if font is None:
+        font = _fonts[name, size] = pg.font.SysFont(name, size)
+    return font
@@ -0,0 +1,898 @@
+import argparse
+import heapq
+import random
+import tracemalloc
+import numpy as np
+from time import perf_counter
+from assets import WIDTH, HEIGHT
+from occupancy import rasterize_obstacles, downsize_grid, obstacle_bounds, padded_slices, half_planes
+from a_star import AStarEngine, path_cost
+from hpa_star import HpaPlanner
+from jps import JumpPointEngine
+from dstar_lite import DStarLite
+from cost_field import CostField
+
+HALF_DIAG = (37.5 ** 2 + 25 ** 2) ** 0.5
+
+
+def random_obstacles(count, width=WIDTH, height=HEIGHT, seed=0):
+    """
+    Generate rectangular obstacles in the same corner format as Map.input_obstacles.
+
+    Args:
+        count (int): The number of obstacles.
+        width (int): The width of the map.
+        height (int): The height of the map.
+        seed (int): The random seed.
+
+    Returns:
+        list: List of obstacles.
+    """
+    rng = random.Random(seed)
+    obstacles = []
+    for _ in range(count):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = min(x0 + rng.randrange(5, 80), width), min(y0 + rng.randrange(5, 80), height)
+        obstacles.append(((x0, y0), (x0, y1), (x1, y1), (x1, y0)))
+    return obstacles
+
+
+def random_polygons(count, width=WIDTH, height=HEIGHT, seed=0):
+    """
+    Generate rotated rectangular obstacles, like shelves and walls at arbitrary angles.
+
+    Args:
+        count (int): The number of obstacles.
+        width (int): The width of the map.
+        height (int): The height of the map.
+        seed (int): The random seed.
+
+    Returns:
+        list: List of obstacles, each four corner points in order.
+    """
+    rng = random.Random(seed)
+    obstacles = []
+    for _ in range(count):
+        x, y, angle = rng.uniform(0, width), rng.uniform(0, height), rng.uniform(0, np.pi)
+        half_length, half_width = rng.uniform(10, 80), rng.uniform(3, 10)
+        cos, sin = np.cos(angle), np.sin(angle)
+        obstacles.append(tuple((x + dx * cos - dy * sin, y + dx * sin + dy * cos)
+                               for dx, dy in ((-half_length, -half_width), (half_length, -half_width),
+                                              (half_length, half_width), (-half_length, half_width))))
+    return obstacles
+
+
+def point_in_polygon_rasterize(obstacles, width, height, padding):
+    """
+    Reference rasterizer testing every pixel of the padded bounding box of an obstacle against the edges of
+    the obstacle grown by padding.
+    """
+    danger_map = np.zeros((width, height), dtype=np.uint8)
+    for obstacle in obstacles:
+        slices = padded_slices(obstacle_bounds(obstacle), padding, width, height)
+        if not slices:
+            continue
+        xs, ys = np.meshgrid(np.arange(slices[0].start, slices[0].stop), np.arange(slices[1].start, slices[1].stop),
+                             indexing='ij')
+        inside = np.ones(xs.shape, dtype=bool)
+        for normal_x, normal_y, offset in half_planes(obstacle):
+            reach = padding * (abs(normal_x) + abs(normal_y)) + offset
+            inside &= normal_x * xs + normal_y * ys <= reach + 1e-9 * max(abs(reach), 1)
+        danger_map[slices] |= inside
+    return danger_map
+
+
+def legacy_put_obstacle_on_grid(obstacles, width, height, padding):
+    """
+    Reference per-pixel rasterizer, equivalent to the original Map.put_obstacle_on_grid without the progress output.
+    """
+    danger_map = np.zeros((width, height))
+    downsized_grid = np.zeros((width // 10, height // 10))
+    for col in range(width):
+        for row in range(height):
+            for obstacle in obstacles:
+                x_range = sorted({point[0] for point in obstacle})
+                y_range = sorted({point[1] for point in obstacle})
+                if (x_range[0] - padding) <= col <= (x_range[-1] + padding) and \
+                        (y_range[0] - padding) <= row <= (y_range[-1] + padding):
+                    danger_map[col][row] = 1
+                    break
+    for col in range(width // 10):
+        for row in range(height // 10):
+            downsized_grid[col][row] = 1 if 1 in danger_map[col * 10: (col + 1) * 10, row * 10: (row + 1) * 10] else 0
+    return danger_map, downsized_grid
+
+
+def legacy_a_star_search(grid, src, dest):
+    """
+    Reference dict-based A* search, equivalent to the original a_star_search without the output.
+    """
+    if grid[src[0]][src[1]] == 1 or grid[dest[0]][dest[1]] == 1:
+        return []
+    ROW, COL = grid.shape
+    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    cell_details = {(i, j): {'f': float('inf'), 'g': float('inf'), 'h': 0, 'parent': None} for i in range(ROW) for j in range(COL)}
+    cell_details[src]['f'] = cell_details[src]['g'] = 0
+    open_list = [(0.0, src)]
+    closed_list = np.zeros((ROW, COL), dtype=bool)
+    while open_list:
+        _, (i, j) = heapq.heappop(open_list)
+        closed_list[i][j] = True
+        for dir in directions:
+            new_i, new_j = i + dir[0], j + dir[1]
+            if 0 <= new_i < ROW and 0 <= new_j < COL and grid[new_i][new_j] == 0 and not closed_list[new_i][new_j]:
+                if (new_i, new_j) == dest:
+                    cell_details[(new_i, new_j)]['parent'] = (i, j)
+                    path = []
+                    while cell_details[(new_i, new_j)]['parent']:
+                        path.append((new_i, new_j))
+                        new_i, new_j = cell_details[(new_i, new_j)]['parent']
+                    return path[::-1]
+                g_new = cell_details[(i, j)]['g'] + 1.0
+                h_new = ((new_i - dest[0]) ** 2 + (new_j - dest[1]) ** 2) ** 0.5
+                f_new = g_new + h_new
+                if cell_details[(new_i, new_j)]['f'] > f_new:
+                    heapq.heappush(open_list, (f_new, (new_i, new_j)))
+                    cell_details[(new_i, new_j)] = {'f': f_new, 'g': g_new, 'h': h_new, 'parent': (i, j)}
+    return []
+
+
+def random_grid(rows, cols, density=0.2, seed=0):
+    """
+    Generate an occupancy grid with random rectangular blocks, keeping the two opposite corners free.
+
+    Args:
+        rows (int): The number of rows.
+        cols (int): The number of columns.
+        density (float): The approximate fraction of blocked cells.
+        seed (int): The random seed.
+
+    Returns:
+        np.array: The uint8 grid.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((rows, cols), dtype=np.uint8)
+    block = max(2, min(rows, cols) // 20)
+    while grid.mean() < density:
+        r, c = rng.integers(0, rows), rng.integers(0, cols)
+        grid[r:r + rng.integers(1, block + 1), c:c + rng.integers(1, block + 1)] = 1
+    grid[:2, :2] = grid[-2:, -2:] = 0
+    return grid
+
+
+def timed(func, *args, repeat=1):
+    """
+    Run a function several times and return its best wall time and last result.
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func(*args)
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def bench_grid(counts, width, height, repeat):
+    """
+    Compare the per-pixel rasterizer with the vectorized one for growing obstacle counts.
+    """
+    print(f"grid build {width}x{height}")
+    print(f"{'obstacles':>10} {'legacy s':>10} {'vector s':>10} {'speedup':>9}  equal")
+    for count in counts:
+        obstacles = random_obstacles(count, width, height, seed=count)
+        legacy_time, (legacy_map, legacy_grid) = timed(legacy_put_obstacle_on_grid, obstacles, width, height, HALF_DIAG)
+
+        def vectorized():
+            danger_map = rasterize_obstacles(obstacles, width, height, HALF_DIAG)
+            return danger_map, downsize_grid(danger_map)
+
+        vector_time, (danger_map, grid) = timed(vectorized, repeat=repeat)
+        equal = np.array_equal(legacy_map, danger_map) and np.array_equal(legacy_grid, grid)
+        print(f"{count:>10} {legacy_time:>10.4f} {vector_time:>10.6f} {legacy_time / vector_time:>8.0f}x  {equal}")
+
+
+def bench_polygon(counts, width, height, repeat):
+    """
+    Rasterize rotated rectangles: the scanline fill of the grown polygons against a per-pixel test of their
+    padded bounding boxes, and the downsized grid cells blocked by the polygons against their bounding boxes.
+    """
+    print(f"convex obstacles {width}x{height}")
+    print(f"{'obstacles':>10} {'per-pixel s':>12} {'scanline s':>11} {'speedup':>9} {'equal':>6} "
+          f"{'box cells':>10} {'poly cells':>11}")
+    for count in counts:
+        obstacles = random_polygons(count, width, height, seed=count)
+        boxes = [((x_min, y_min), (x_min, y_max), (x_max, y_max), (x_max, y_min))
+                 for x_min, y_min, x_max, y_max in map(obstacle_bounds, obstacles)]
+        pixel_time, reference = timed(point_in_polygon_rasterize, obstacles, width, height, HALF_DIAG, repeat=repeat)
+        scanline_time, danger_map = timed(rasterize_obstacles, obstacles, width, height, HALF_DIAG, repeat=repeat)
+        box_cells = int(downsize_grid(rasterize_obstacles(boxes, width, height, HALF_DIAG)).sum())
+        polygon_cells = int(downsize_grid(danger_map).sum())
+        print(f"{count:>10} {pixel_time:>12.5f} {scanline_time:>11.5f} {pixel_time / scanline_time:>8.1f}x "
+              f"{str(np.array_equal(reference, danger_map)):>6} {box_cells:>10} {polygon_cells:>11}")
+
+
+def bench_a_star(sizes, density, repeat):
+    """
+    Compare the original dict-based A* with the array-backed engine between opposite grid corners.
+    """
+    print(f"a* search, density {density}")
+    print(f"{'grid':>11} {'legacy s':>10} {'engine s':>10} {'speedup':>9} {'expanded':>9} {'legacy cost':>12} {'engine cost':>12}")
+    for rows, cols in sizes:
+        grid = random_grid(rows, cols, density, seed=rows * cols)
+        src, dest = (0, 0), (rows - 1, cols - 1)
+        legacy_time, legacy_path = timed(legacy_a_star_search, grid, src, dest)
+        engine = AStarEngine()
+        engine_time, path = timed(engine.search, grid, src, dest, repeat=repeat)
+        print(f"{f'{rows}x{cols}':>11} {legacy_time:>10.4f} {engine_time:>10.4f} {legacy_time / engine_time:>8.1f}x "
+              f"{engine.expanded:>9} {path_cost(legacy_path, src):>12.2f} {path_cost(path, src):>12.2f}")
+
+
+def bench_jps(sizes, seeds, checks, repeat):
+    """
+    Compare Jump Point Search with A*: first check equal path costs on small random grids between random free
+    cells, then compare times and expansions on far start/goal scenarios.
+    """
+    from scenarios import generate_scenario
+    engine, jump_engine = AStarEngine(), JumpPointEngine()
+    mismatches = 0
+    for seed in range(checks):
+        rng = np.random.default_rng(seed)
+        grid = random_grid(int(rng.integers(2, 60)), int(rng.integers(2, 60)), rng.uniform(0, 0.45), seed)
+        free = np.argwhere(grid == 0).tolist()
+        src, dest = tuple(free[rng.integers(len(free))]), tuple(free[rng.integers(len(free))])
+        path, jump_path = engine.search(grid, src, dest), jump_engine.search(grid, src, dest)
+        if bool(path) != bool(jump_path) or abs(path_cost(path, src) - path_cost(jump_path, src)) > 1e-9:
+            mismatches += 1
+    print(f"jump point search, {checks} random grids, cost mismatches: {mismatches}")
+    print(f"{'scenario':>36} {'a* s':>9} {'jps s':>9} {'a* exp':>8} {'jps exp':>8} {'equal cost':>11}")
+    for width, height in sizes:
+        for layout, density in (('open', 0.45), ('maze', 0.6)):
+            for seed in seeds:
+                scenario = generate_scenario(seed, width, height, layout, density, 'far')
+                src, dest = scenario.start_cell, scenario.goal_cell
+                a_star_time, path = timed(engine.search, scenario.grid, src, dest, repeat=repeat)
+                jps_time, jump_path = timed(jump_engine.search, scenario.grid, src, dest, repeat=repeat)
+                equal = abs(path_cost(path, src) - path_cost(jump_path, src)) < 1e-9
+                print(f"{scenario.name:>36} {a_star_time:>9.5f} {jps_time:>9.5f} "
+                      f"{engine.expanded:>8} {jump_engine.expanded:>8} {str(equal):>11}")
+    return 1 if mismatches else 0
+
+
+def bench_replan(sizes, seeds, fractions):
+    """
+    Compare repairing a D* Lite search with a fresh A* search after a block of cells cuts the path.
+    The block is placed at a fraction of the path length, and the start moved a few cells along the path.
+    """
+    from scenarios import generate_scenario
+    mismatches = 0
+    print("incremental replanning")
+    print(f"{'scenario':>36} {'cut at':>7} {'repair s':>9} {'a* s':>9} {'repair exp':>11} {'a* exp':>8} {'equal cost':>11}")
+    engine = AStarEngine()
+    for width, height in sizes:
+        for seed in seeds:
+            scenario = generate_scenario(seed, width, height, 'open', 0.45, 'far')
+            for fraction in fractions:
+                grid = scenario.grid.copy()
+                planner = DStarLite(grid, scenario.goal_cell)
+                path = planner.search_from(scenario.start_cell)
+                if len(path) < 10:
+                    continue
+                row, col = path[int((len(path) - 1) * fraction)]
+                rows, cols = slice(max(row - 2, 0), row + 3), slice(max(col - 2, 0), col + 3)
+                grid[rows, cols] = 1
+                grid[scenario.goal_cell] = 0
+                src = path[2]
+                start = perf_counter()
+                planner.update_region(grid, rows, cols)
+                repaired = planner.search_from(src)
+                repair_time = perf_counter() - start
+                a_star_time, fresh = timed(engine.search, grid, src, scenario.goal_cell)
+                equal = bool(repaired) == bool(fresh) and abs(path_cost(repaired, src) - path_cost(fresh, src)) < 1e-9
+                mismatches += not equal
+                print(f"{scenario.name:>36} {fraction:>7.0%} {repair_time:>9.5f} {a_star_time:>9.5f} "
+                      f"{planner.expanded:>11} {engine.expanded:>8} {str(equal):>11}")
+    return 1 if mismatches else 0
+
+
+def bench_hpa(sizes, seeds, repeat):
+    """
+    Compare hierarchical search with flat A* on far start/goal scenarios. Build is the abstract graph build time.
+    """
+    from scenarios import generate_scenario
+    print("hierarchical search")
+    print(f"{'scenario':>36} {'build s':>9} {'hpa s':>9} {'a* s':>9} {'hpa exp':>8} {'a* exp':>8} {'cost ratio':>11}")
+    engine = AStarEngine()
+    for width, height in sizes:
+        for layout, density in (('open', 0.45), ('maze', 0.6)):
+            for seed in seeds:
+                scenario = generate_scenario(seed, width, height, layout, density, 'far')
+                src, dest = scenario.start_cell, scenario.goal_cell
+                build_time, planner = timed(HpaPlanner, scenario.grid)
+                hpa_time, path = timed(planner.search, src, dest, repeat=repeat)
+                a_star_time, flat_path = timed(engine.search, scenario.grid, src, dest, repeat=repeat)
+                ratio = path_cost(path, src) / path_cost(flat_path, src) if flat_path else float('nan')
+                print(f"{scenario.name:>36} {build_time:>9.4f} {hpa_time:>9.5f} {a_star_time:>9.5f} "
+                      f"{planner.expanded:>8} {engine.expanded:>8} {ratio:>11.3f}")
+
+
+def bench_field(sizes, seeds, starts, checks):
+    """
+    Compare one cost-to-go field of the goal with an A* search per start: first check equal path costs on
+    small random grids from every free cell, then time planning from many random free start cells to one goal
+    on far start/goal scenarios. The field time includes the flood.
+    """
+    from scenarios import generate_scenario
+    engine = AStarEngine()
+    mismatches = 0
+    for seed in range(checks):
+        rng = np.random.default_rng(seed)
+        grid = random_grid(int(rng.integers(2, 30)), int(rng.integers(2, 30)), rng.uniform(0, 0.45), seed)
+        free = [tuple(cell) for cell in np.argwhere(grid == 0).tolist()]
+        dest = free[rng.integers(len(free))]
+        field = CostField(grid, dest)
+        for src in free:
+            path, field_path = engine.search(grid, src, dest), field.path_from(src)
+            if bool(path) != bool(field_path) or abs(path_cost(path, src) - path_cost(field_path, src)) > 1e-9:
+                mismatches += 1
+    print(f"cost-to-go field, {checks} random grids, cost mismatches: {mismatches}")
+    print(f"{'scenario':>36} {'starts':>7} {'a* s':>9} {'field s':>9} {'flood s':>9} {'speedup':>8} {'equal cost':>11}")
+    for width, height in sizes:
+        for layout, density in (('open', 0.45), ('maze', 0.6)):
+            for seed in seeds:
+                scenario = generate_scenario(seed, width, height, layout, density, 'far')
+                grid, dest = scenario.grid, scenario.goal_cell
+                free = np.argwhere(grid == 0)
+                rng = np.random.default_rng(seed)
+                sources = [tuple(cell) for cell in free[rng.integers(len(free), size=starts)].tolist()]
+                a_star_time, paths = timed(lambda: [engine.search(grid, src, dest) for src in sources])
+                flood_time, field = timed(CostField, grid, dest)
+                descent_time, field_paths = timed(lambda: [field.path_from(src) for src in sources])
+                equal = all(abs(path_cost(path, src) - path_cost(field_path, src)) < 1e-9
+                            for src, path, field_path in zip(sources, paths, field_paths))
+                field_time = flood_time + descent_time
+                print(f"{scenario.name:>36} {starts:>7} {a_star_time:>9.4f} {field_time:>9.4f} {flood_time:>9.4f} "
+                      f"{a_star_time / field_time:>8.1f} {str(equal):>11}")
+    return 1 if mismatches else 0
+
+
+def bench_map_file(sizes, seed=0):
+    """
+    Compare loading a saved map file, memory-mapped and read, with rebuilding its grids and hierarchical graph.
+    The first search is timed after the mapped load, since it unpacks the hierarchical graph. Every map is then
+    saved twice over the file it was loaded from while its grids are still mapped, as main.py --map does on
+    exit, and loaded again; the exit status is 1 if any reloaded grid differs.
+    """
+    import os
+    import tempfile
+    from headless import HeadlessSimulation
+    from scenarios import generate_scenario
+    print("map files")
+    print(f"{'scenario':>36} {'save s':>8} {'rebuild s':>10} {'read s':>8} {'mmap s':>8} {'search s':>9} {'resaved':>8}")
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.bin")
+        for width, height in sizes:
+            scenario = generate_scenario(seed, width, height, 'open', 0.45, 'far')
+            sim = HeadlessSimulation(map_size=(width, height))
+            sim.map.algorithm = "hpa"
+            sim.map.set_obstacles(sim.map.obstacles + scenario.obstacles)
+
+            def rebuild():
+                sim.map.invalidate_grid()
+                sim.map.update_grid()
+                sim.map.hpa = HpaPlanner(sim.map.downsized_grid)
+
+            rebuild_time, _ = timed(rebuild)
+            save_time, _ = timed(sim.map.save, path)
+            read_time, _ = timed(HeadlessSimulation(map_size=(width, height)).map.load, path, False)
+            loaded = HeadlessSimulation(map_size=(width, height)).map
+            loaded.algorithm = "hpa"
+            mmap_time, _ = timed(loaded.load, path)
+            search_time, _ = timed(loaded.plan_path, scenario.start, scenario.goal)
+            for _ in range(2):
+                loaded.save(path)
+            reloaded = HeadlessSimulation(map_size=(width, height)).map
+            resaved = reloaded.load(path) and np.array_equal(reloaded.danger_map, sim.map.danger_map) and \
+                np.array_equal(reloaded.downsized_grid, sim.map.downsized_grid)
+            failures += not resaved
+            print(f"{scenario.name:>36} {save_time:>8.4f} {rebuild_time:>10.4f} {read_time:>8.4f} {mmap_time:>8.4f} {search_time:>9.4f} "
+                  f"{str(resaved):>8}")
+    return 1 if failures else 0
+
+
+def bench_fleet(counts, steps, seed=0):
+    """
+    Compare stepping independent Amr objects with one vectorized Fleet step.
+    """
+    from headless import HeadlessSimulation
+    from fleet import Fleet
+    print(f"fleet stepping, {steps} steps")
+    print(f"{'robots':>7} {'amr robot-steps/s':>18} {'fleet robot-steps/s':>20} {'speedup':>9}")
+    for count in counts:
+        rng = random.Random(seed)
+        sims = []
+        fleet = Fleet()
+        for _ in range(count):
+            sim = HeadlessSimulation(rng.randrange(100, WIDTH - 100), rng.randrange(100, HEIGHT - 100))
+            sim.set_target((rng.randrange(100, WIDTH - 100), rng.randrange(100, HEIGHT - 100)))
+            index = fleet.add(sim.amr.x, sim.amr.y, sim.amr.angle_rad)
+            if sim.amr.target:
+                fleet.set_path(index, [sim.amr.target] + sim.amr.buffer)
+            sims.append(sim)
+
+        def step_amrs():
+            for _ in range(steps):
+                for sim in sims:
+                    sim.amr.handle_movement(sim.keys, None)
+
+        def step_fleet():
+            for _ in range(steps):
+                fleet.step()
+
+        amr_time, _ = timed(step_amrs)
+        fleet_time, _ = timed(step_fleet)
+        print(f"{count:>7} {count * steps / amr_time:>18.0f} {count * steps / fleet_time:>20.0f} {amr_time / fleet_time:>8.1f}x")
+
+
+def legacy_is_danger_zone(obstacles, pos, padding):
+    """
+    Reference linear danger zone test, equivalent to the original Map.is_danger_zone.
+    """
+    for obstacle in obstacles:
+        x_range = sorted({point[0] for point in obstacle})
+        y_range = sorted({point[1] for point in obstacle})
+        if (x_range[0] - padding) <= pos[0] <= (x_range[-1] + padding) and \
+                (y_range[0] - padding) <= pos[1] <= (y_range[-1] + padding):
+            return True
+    return False
+
+
+def bench_index(counts, queries, seed=0):
+    """
+    Compare linear danger zone tests with point and batch queries on the obstacle spatial index.
+    """
+    from spatial_index import ObstacleIndex
+    print(f"danger zone queries, {queries} points")
+    print(f"{'obstacles':>10} {'linear us':>10} {'index us':>9} {'batch us':>9} {'speedup':>9}  equal")
+    points = np.random.default_rng(seed).uniform((0, 0), (WIDTH, HEIGHT), (queries, 2))
+    for count in counts:
+        obstacles = random_obstacles(count, seed=count)
+        index = ObstacleIndex(HALF_DIAG)
+        index.extend(obstacles)
+        linear_time, linear = timed(lambda: [legacy_is_danger_zone(obstacles, p, HALF_DIAG) for p in points.tolist()])
+        index_time, single = timed(lambda: [index.contains(p, HALF_DIAG) for p in points.tolist()], repeat=3)
+        batch_time, batch = timed(index.contains_many, points, HALF_DIAG, repeat=3)
+        equal = linear == single == batch.tolist()
+        print(f"{count:>10} {linear_time / queries * 1e6:>10.2f} {index_time / queries * 1e6:>9.2f} "
+              f"{batch_time / queries * 1e6:>9.2f} {linear_time / batch_time:>8.0f}x  {equal}")
+
+
+def bench_clearance(counts, queries, seed=0):
+    """
+    Time building the clearance field and compare batch clearance lookups with batch queries on the obstacle
+    spatial index. The field has round danger zone corners, so a few points near corners differ.
+    """
+    from spatial_index import ObstacleIndex
+    from clearance import ClearanceField
+    from scenarios import border_obstacles
+    print(f"clearance queries, {queries} points")
+    print(f"{'obstacles':>10} {'build ms':>9} {'add ms':>7} {'index us':>9} {'field us':>9} {'speedup':>9} {'differ':>7}")
+    points = np.random.default_rng(seed).uniform((0, 0), (WIDTH - 1, HEIGHT - 1), (queries, 2))
+    for count in counts:
+        obstacles = border_obstacles(WIDTH, HEIGHT) + random_obstacles(count, seed=count)
+        index = ObstacleIndex(HALF_DIAG)
+        index.extend(obstacles)
+        build_time, field = timed(ClearanceField, obstacles, WIDTH, HEIGHT, HALF_DIAG + 10)
+        add_time, _ = timed(field.add_obstacle, obstacles[-1], repeat=3)
+        index_time, danger = timed(index.contains_many, points, HALF_DIAG, repeat=3)
+        field_time, clear = timed(lambda: field.clearances(points) > HALF_DIAG, repeat=3)
+        print(f"{count:>10} {build_time * 1e3:>9.1f} {add_time * 1e3:>7.2f} {index_time / queries * 1e6:>9.3f} "
+              f"{field_time / queries * 1e6:>9.3f} {index_time / field_time:>8.1f}x {np.mean(danger == clear):>7.2%}")
+
+
+def bench_render(counts, frames):
+    """
+    Compare redrawing the whole frame with the cached static layer and dirty rectangles.
+    Uses the dummy video driver unless SDL_VIDEODRIVER is already set.
+    """
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame as pg
+    import assets
+    from assets import LIGHT_GREY
+    from AMR import Amr
+    from main import draw_simulation
+    pg.init()
+    assets.init_display()
+    print(f"frame drawing, {frames} frames")
+    print(f"{'obstacles':>10} {'full ms':>8} {'dirty ms':>9} {'speedup':>9}")
+    for count in counts:
+        amr = Amr(100, 100)
+        for obstacle in random_obstacles(count, seed=count):
+            amr.map.add_obstacle(obstacle)
+
+        def full_frames():
+            for _ in range(frames):
+                amr.rotate(1)
+                assets.WIN.fill(LIGHT_GREY)
+                amr.map.draw_danger_zones(assets.WIN)
+                amr.map.draw_obstacles(assets.WIN)
+                amr.map.draw_buttons(assets.WIN)
+                for obj in (amr.map, amr.interface, amr):
+                    obj.draw()
+                pg.display.update()
+
+        def dirty_frames():
+            rects = []
+            for _ in range(frames):
+                amr.rotate(1)
+                rects = draw_simulation(amr.map, amr.map, amr.interface, amr, previous_rects=rects)
+
+        full_time, _ = timed(full_frames)
+        dirty_time, _ = timed(dirty_frames)
+        print(f"{count:>10} {full_time / frames * 1e3:>8.3f} {dirty_time / frames * 1e3:>9.3f} {full_time / dirty_time:>8.1f}x")
+    pg.quit()
+
+
+# Programs timing the startup in a fresh interpreter, they print the import and setup times in seconds
+STARTUP_HEADLESS = """
+from time import perf_counter
+start = perf_counter()
+from headless import HeadlessSimulation
+imported = perf_counter()
+HeadlessSimulation()
+print(imported - start, perf_counter() - imported)
+"""
+STARTUP_WINDOW = """
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+from time import perf_counter
+start = perf_counter()
+import pygame as pg
+import assets
+from AMR import Amr
+from main import draw_simulation
+imported = perf_counter()
+pg.init()
+assets.init_display()
+amr = Amr()
+draw_simulation(amr.map, amr.map, amr.interface, amr)
+print(imported - start, perf_counter() - imported)
+"""
+
+
+def bench_startup(repeat, frames):
+    """
+    Measure the startup in fresh interpreters, headless (import and HeadlessSimulation) and with a window
+    (import and everything up to the first frame), then compare drawing the interface panel with its labels
+    rendered every frame and with the cached labels, for a moving and a standing AMR.
+    Uses the dummy video driver unless SDL_VIDEODRIVER is already set.
+    """
+    import os
+    import subprocess
+    import sys
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    print(f"startup, best of {repeat}")
+    print(f"{'mode':>10} {'import ms':>10} {'setup ms':>9} {'process ms':>11}")
+    for mode, program in (("headless", STARTUP_HEADLESS), ("window", STARTUP_WINDOW)):
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            output = subprocess.run([sys.executable, "-c", program], env=env, capture_output=True, text=True,
+                                    check=True).stdout.split()
+            times = [float(value) for value in output[-2:]] + [perf_counter() - start]
+            best = times if best is None else [min(a, b) for a, b in zip(best, times)]
+        print(f"{mode:>10} {best[0] * 1e3:>10.1f} {best[1] * 1e3:>9.1f} {best[2] * 1e3:>11.1f}")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import math
+    import pygame as pg
+    import assets
+    from assets import BLACK
+    from AMR import Amr
+    pg.init()
+    assets.init_display()
+    amr = Amr(100, 100)
+    interface = amr.interface
+
+    def uncached():
+        # Interface.draw before the label cache, rendering the labels every frame
+        rect = pg.draw.rect(assets.WIN, BLACK, (interface.x - 2, interface.y - 2, interface.width, interface.height))
+        pg.draw.rect(assets.WIN, interface.fill_color, (interface.x, interface.y, interface.width, interface.height))
+        x_text = interface.font.render("X: " + str(round(amr.x, 2)), 1, BLACK)
+        y_text = interface.font.render("Y: " + str(round(amr.y, 2)), 1, BLACK)
+        angle_text = interface.font.render("Angle: " + str(round(math.degrees(amr.angle_rad), 2)), 1, BLACK)
+        assets.WIN.blit(x_text, (interface.x + 10, interface.y + 10))
+        assets.WIN.blit(y_text, (interface.x + 90, interface.y + 10))
+        assets.WIN.blit(angle_text, (interface.x + 10, interface.y + x_text.get_height() + 20))
+        return [rect.union((interface.x, interface.y, interface.width, interface.height))]
+
+    print(f"interface panel, {frames} frames")
+    print(f"{'amr':>10} {'render ms':>10} {'cached ms':>10} {'speedup':>9}")
+    for label, moving in (("moving", True), ("standing", False)):
+        def frames_of(draw):
+            def run():
+                for _ in range(frames):
+                    if moving:
+                        amr.rotate(1)
+                        amr.move_fwd_bwd(-1)
+                    draw()
+            return run
+        render_time, _ = timed(frames_of(uncached))
+        cached_time, _ = timed(frames_of(interface.draw))
+        print(f"{label:>10} {render_time / frames * 1e3:>10.4f} {cached_time / frames * 1e3:>10.4f} "
+              f"{render_time / cached_time:>8.1f}x")
+    pg.quit()
+
+
+def bench_simplify(sizes, seeds, ticks):
+    """
+    Compare raw grid paths with line-of-sight simplified paths: waypoint count and simulated ticks to the goal.
+    """
+    from headless import HeadlessSimulation
+    from scenarios import generate_scenario
+    print("path simplification")
+    print(f"{'scenario':>36} {'raw wp':>7} {'simple wp':>10} {'raw ticks':>10} {'simple ticks':>13} {'saved':>7}")
+    for width, height in sizes:
+        for layout, density in (('open', 0.45), ('maze', 0.6)):
+            for seed in seeds:
+                scenario = generate_scenario(seed, width, height, layout, density, 'far')
+                row = []
+                for simplify in (False, True):
+                    sim = HeadlessSimulation(*scenario.start, map_size=(scenario.width, scenario.height))
+                    sim.map.simplify_paths = simplify
+                    for obstacle in scenario.obstacles:
+                        sim.map.add_obstacle(obstacle)
+                    sim.set_target(scenario.goal)
+                    row.append(len(sim.amr.buffer) + (sim.amr.target is not None))
+                    row.append(sim.run(ticks, until_idle=True))
+                raw_waypoints, raw_ticks, waypoints, done = row
+                saved = 1 - done / raw_ticks if raw_ticks else 0.0
+                print(f"{scenario.name:>36} {raw_waypoints:>7} {waypoints:>10} {raw_ticks:>10} {done:>13} {saved:>6.0%}")
+
+
+def bench_controller(sizes, seeds, lookahead, ticks):
+    """
+    Compare the stop-and-turn and pure pursuit controllers: ticks to the goal, total rotation and obstacle contacts.
+    """
+    import math
+    from headless import HeadlessSimulation
+    from scenarios import generate_scenario
+    print(f"path following, pure pursuit lookahead {lookahead} px")
+    print(f"{'scenario':>36} {'turn ticks':>11} {'pp ticks':>9} {'saved':>7} {'turn deg':>9} {'pp deg':>8} {'contacts':>9}")
+    totals = [0, 0]
+    for width, height in sizes:
+        for layout, density in (('open', 0.45), ('maze', 0.6)):
+            for seed in seeds:
+                scenario = generate_scenario(seed, width, height, layout, density, 'far')
+                row = []
+                for controller in ("stop_and_turn", "pure_pursuit"):
+                    sim = HeadlessSimulation(*scenario.start, map_size=(scenario.width, scenario.height))
+                    sim.amr.controller, sim.amr.lookahead = controller, lookahead
+                    sim.amr.check_collisions = True
+                    for obstacle in scenario.obstacles:
+                        sim.map.add_obstacle(obstacle)
+                    sim.set_target(scenario.goal)
+                    row.append((sim.run(ticks, until_idle=True), math.degrees(sim.amr.total_rotation), sim.amr.collisions))
+                (turn_ticks, turn_deg, turn_contacts), (done, degrees, contacts) = row
+                totals[0] += turn_ticks
+                totals[1] += done
+                saved = 1 - done / turn_ticks if turn_ticks else 0.0
+                print(f"{scenario.name:>36} {turn_ticks:>11} {done:>9} {saved:>6.0%} {turn_deg:>9.0f} {degrees:>8.0f} "
+                      f"{turn_contacts:>4}/{contacts:<4}")
+    print(f"{'total':>36} {totals[0]:>11} {totals[1]:>9} {1 - totals[1] / max(totals[0], 1):>6.0%}")
+
+
+def measure_scenario(scenario, repeat=3, ticks=20000):
+    """
+    Measure grid building, A* search and headless stepping on a scenario.
+
+    Args:
+        scenario (Scenario): The scenario.
+        repeat (int): The number of timed repetitions, the best time is kept.
+        ticks (int): The maximum number of headless ticks.
+
+    Returns:
+        dict: The metrics. Times are in milliseconds, memory in KiB.
+    """
+    from headless import HeadlessSimulation
+    sim = HeadlessSimulation(*scenario.start, map_size=(scenario.width, scenario.height))
+    for obstacle in scenario.obstacles:
+        sim.map.add_obstacle(obstacle)
+    grid_time, _ = timed(sim.map.put_obstacle_on_grid, repeat=repeat)
+    sim.map.grid_valid = True
+
+    src, dest = scenario.start_cell, scenario.goal_cell
+    tracemalloc.start()
+    engine = AStarEngine()
+    path = engine.search(sim.map.downsized_grid, src, dest)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    a_star_time, _ = timed(engine.search, sim.map.downsized_grid, src, dest, repeat=repeat)
+
+    sim.set_target(scenario.goal)
+    waypoints = len(sim.amr.buffer) + (sim.amr.target is not None)
+    start = perf_counter()
+    done = sim.run(ticks, until_idle=True)
+    step_time = perf_counter() - start
+    return {'waypoints': waypoints, 'grid_build_ms': grid_time * 1e3, 'a_star_ms': a_star_time * 1e3, 'a_star_peak_kib': peak / 1024,
+            'expanded': engine.expanded, 'found': bool(path), 'path_cost': round(path_cost(path, src), 6),
+            'ticks': done, 'steps_per_s': done / step_time if step_time else 0.0}
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Compare suite results with a baseline.
+
+    Timed metrics regress when they are worse than the baseline by more than the tolerance. Deterministic
+    metrics (expanded nodes, path found, path cost, ticks) regress on any change.
+
+    Args:
+        results (dict): Scenario name to metrics.
+        baseline (dict): Scenario name to baseline metrics.
+        tolerance (float): The allowed relative slowdown, e.g. 0.2 for 20 %.
+
+    Returns:
+        list: Human readable regression descriptions, empty if there are none.
+    """
+    lower_is_better = ['grid_build_ms', 'a_star_ms', 'a_star_peak_kib']
+    higher_is_better = ['steps_per_s']
+    exact = ['expanded', 'found', 'path_cost', 'waypoints', 'ticks']
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in lower_is_better:
+            if reference.get(key) and metrics[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {reference[key]:.3f} -> {metrics[key]:.3f}")
+        for key in higher_is_better:
+            if reference.get(key) and metrics[key] < reference[key] / (1 + tolerance):
+                regressions.append(f"{name}: {key} {reference[key]:.0f} -> {metrics[key]:.0f}")
+        for key in exact:
+            if key in reference and metrics[key] != reference[key]:
+                regressions.append(f"{name}: {key} changed {reference[key]} -> {metrics[key]}")
+    return regressions
+
+
+def bench_suite(seeds, sizes, output, baseline_path, tolerance, repeat):
+    """
+    Run the scenario suite, write the results as JSON and compare them with a baseline.
+
+    Returns:
+        int: The process exit status, 1 if a regression was found.
+    """
+    import json
+    import platform
+    from scenarios import scenario_matrix
+    results = {}
+    print(f"{'scenario':<34} {'grid ms':>8} {'a* ms':>8} {'expanded':>9} {'peak KiB':>9} {'found':>6} {'ticks':>6} {'steps/s':>9}")
+    for scenario in scenario_matrix(seeds, sizes):
+        metrics = measure_scenario(scenario, repeat)
+        results[scenario.name] = metrics
+        print(f"{scenario.name:<34} {metrics['grid_build_ms']:>8.3f} {metrics['a_star_ms']:>8.3f} {metrics['expanded']:>9} "
+              f"{metrics['a_star_peak_kib']:>9.1f} {str(metrics['found']):>6} {metrics['ticks']:>6} {metrics['steps_per_s']:>9.0f}")
+    report = {'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                       'seeds': list(seeds), 'sizes': [list(size) for size in sizes]},
+              'results': results}
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {output}")
+    if not baseline_path:
+        return 0
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    regressions = compare_results(results, baseline, tolerance)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    print(f"{len(regressions)} regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+def parse_size(text):
+    """
+    Parse a ROWSxCOLS grid size argument.
+    """
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AMR simulation benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    grid_parser = subparsers.add_parser("grid", help="obstacle rasterization")
+    grid_parser.add_argument("--obstacles", type=int, nargs="+", default=[4, 16, 64])
+    grid_parser.add_argument("--width", type=int, default=WIDTH)
+    grid_parser.add_argument("--height", type=int, default=HEIGHT)
+    grid_parser.add_argument("--repeat", type=int, default=5)
+    grid_parser.set_defaults(run=lambda args: bench_grid(args.obstacles, args.width, args.height, args.repeat))
+    polygon_parser = subparsers.add_parser("polygon", help="convex obstacle rasterization")
+    polygon_parser.add_argument("--obstacles", type=int, nargs="+", default=[16, 64, 256, 1024])
+    polygon_parser.add_argument("--width", type=int, default=WIDTH)
+    polygon_parser.add_argument("--height", type=int, default=HEIGHT)
+    polygon_parser.add_argument("--repeat", type=int, default=3)
+    polygon_parser.set_defaults(run=lambda args: bench_polygon(args.obstacles, args.width, args.height, args.repeat))
+    a_star_parser = subparsers.add_parser("astar", help="A* search")
+    a_star_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(90, 50), (250, 250), (500, 500), (1000, 1000)])
+    a_star_parser.add_argument("--density", type=float, default=0.2)
+    a_star_parser.add_argument("--repeat", type=int, default=3)
+    a_star_parser.set_defaults(run=lambda args: bench_a_star(args.sizes, args.density, args.repeat))
+    jps_parser = subparsers.add_parser("jps", help="jump point search against A*")
+    jps_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (1800, 1000), (3600, 2000)],
+                            help="map sizes in pixels, WIDTHxHEIGHT")
+    jps_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    jps_parser.add_argument("--checks", type=int, default=500, help="number of random grids to compare path costs on")
+    jps_parser.add_argument("--repeat", type=int, default=3)
+    jps_parser.set_defaults(run=lambda args: bench_jps(args.sizes, args.seeds, args.checks, args.repeat))
+    simplify_parser = subparsers.add_parser("simplify", help="line-of-sight path simplification")
+    simplify_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (1800, 1000)],
+                                 help="map sizes in pixels, WIDTHxHEIGHT")
+    simplify_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    simplify_parser.add_argument("--ticks", type=int, default=50000)
+    simplify_parser.set_defaults(run=lambda args: bench_simplify(args.sizes, args.seeds, args.ticks))
+    controller_parser = subparsers.add_parser("controller", help="pure pursuit against stop-and-turn path following")
+    controller_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (1800, 1000)],
+                                   help="map sizes in pixels, WIDTHxHEIGHT")
+    controller_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    controller_parser.add_argument("--lookahead", type=float, default=60)
+    controller_parser.add_argument("--ticks", type=int, default=50000)
+    controller_parser.set_defaults(run=lambda args: bench_controller(args.sizes, args.seeds, args.lookahead, args.ticks))
+    replan_parser = subparsers.add_parser("replan", help="D* Lite repair against fresh A* search")
+    replan_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(1800, 1000), (3600, 2000)],
+                               help="map sizes in pixels, WIDTHxHEIGHT")
+    replan_parser.add_argument("--seeds", type=int, nargs="+", default=[1, 2])
+    replan_parser.add_argument("--fractions", type=float, nargs="+", default=[0.1, 0.5, 0.9],
+                               help="positions of the cut along the path")
+    replan_parser.set_defaults(run=lambda args: bench_replan(args.sizes, args.seeds, args.fractions))
+    hpa_parser = subparsers.add_parser("hpa", help="hierarchical search against A*")
+    hpa_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(1800, 1000), (3600, 2000), (7200, 4000)],
+                            help="map sizes in pixels, WIDTHxHEIGHT")
+    hpa_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    hpa_parser.add_argument("--repeat", type=int, default=3)
+    hpa_parser.set_defaults(run=lambda args: bench_hpa(args.sizes, args.seeds, args.repeat))
+    field_parser = subparsers.add_parser("field", help="shared cost-to-go field against A* per start")
+    field_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (1800, 1000), (3600, 2000)],
+                              help="map sizes in pixels, WIDTHxHEIGHT")
+    field_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    field_parser.add_argument("--starts", type=int, default=50, help="number of start cells planning to the goal")
+    field_parser.add_argument("--checks", type=int, default=200, help="number of random grids to compare path costs on")
+    field_parser.set_defaults(run=lambda args: bench_field(args.sizes, args.seeds, args.starts, args.checks))
+    map_file_parser = subparsers.add_parser("mapfile", help="map file loading against rebuilding, and saving over a loaded file")
+    map_file_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (3600, 2000), (7200, 4000)],
+                                 help="map sizes in pixels, WIDTHxHEIGHT")
+    map_file_parser.set_defaults(run=lambda args: bench_map_file(args.sizes))
+    fleet_parser = subparsers.add_parser("fleet", help="fleet stepping")
+    fleet_parser.add_argument("--robots", type=int, nargs="+", default=[1, 10, 100, 500])
+    fleet_parser.add_argument("--steps", type=int, default=200)
+    fleet_parser.set_defaults(run=lambda args: bench_fleet(args.robots, args.steps))
+    index_parser = subparsers.add_parser("index", help="obstacle hit-testing")
+    index_parser.add_argument("--obstacles", type=int, nargs="+", default=[4, 64, 256, 1024])
+    index_parser.add_argument("--queries", type=int, default=10000)
+    index_parser.set_defaults(run=lambda args: bench_index(args.obstacles, args.queries))
+    clearance_parser = subparsers.add_parser("clearance", help="clearance field against the obstacle index")
+    clearance_parser.add_argument("--obstacles", type=int, nargs="+", default=[4, 64, 256, 1024])
+    clearance_parser.add_argument("--queries", type=int, default=100000)
+    clearance_parser.set_defaults(run=lambda args: bench_clearance(args.obstacles, args.queries))
+    render_parser = subparsers.add_parser("render", help="frame drawing")
+    render_parser.add_argument("--obstacles", type=int, nargs="+", default=[4, 64, 256])
+    render_parser.add_argument("--frames", type=int, default=200)
+    render_parser.set_defaults(run=lambda args: bench_render(args.obstacles, args.frames))
+    startup_parser = subparsers.add_parser("startup", help="launch time and interface text drawing")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    startup_parser.add_argument("--frames", type=int, default=2000)
+    startup_parser.set_defaults(run=lambda args: bench_startup(args.repeat, args.frames))
+    suite_parser = subparsers.add_parser("suite", help="seeded scenario suite with baseline comparison")
+    suite_parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1])
+    suite_parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(900, 500), (1800, 1000), (3600, 2000)],
+                              help="map sizes in pixels, WIDTHxHEIGHT")
+    suite_parser.add_argument("--output", default="benchmark_results.json")
+    suite_parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    suite_parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    suite_parser.add_argument("--repeat", type=int, default=3)
+    suite_parser.set_defaults(run=lambda args: bench_suite(args.seeds, args.sizes, args.output, args.baseline,
+                                                           args.tolerance, args.repeat))
+    args = parser.parse_args()
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+import math
+import numpy as np
+from occupancy import obstacle_bounds, padded_slices, rasterize_obstacles, fill_polygon
+
+
+def _column_distances(blocked, max_distance):
+    """
+    Distance from every pixel to the nearest blocked pixel of the same column (the same x), capped at max_distance.
+    """
+    width, height = blocked.shape
+    index = np.arange(height, dtype=np.float32)
+    far = np.float32(max_distance)
+    # Index of the last blocked pixel above and of the first blocked pixel below every pixel
+    above = np.where(blocked, index, -np.inf).astype(np.float32)
+    np.maximum.accumulate(above, axis=1, out=above)
+    below = np.where(blocked, index, np.inf).astype(np.float32)[:, ::-1]
+    np.minimum.accumulate(below, axis=1, out=below)
+    below = below[:, ::-1]
+    return np.minimum(np.minimum(index - above, below - index), far)
+
+
+def distance_transform(blocked, max_distance):
+    """
+    Euclidean distance transform of a raster, capped at max_distance.
+
+    The distances along the columns are found with two running scans. Every pixel then takes the smallest
+    hypotenuse over the columns at most max_distance away, one shifted array operation per column offset,
+    so the cost grows with max_distance and not with the number of obstacles. The scan over the offsets
+    stops early once no pixel can get closer, which happens quickly on cluttered maps.
+
+    Args:
+        blocked (np.array): (width, height) array, non-zero pixels are obstacles.
+        max_distance (float): The largest distance of interest, larger distances are stored as max_distance.
+
+    Returns:
+        np.array: (width, height) float32 distances in pixels, 0 on obstacles.
+    """
+    blocked = blocked != 0
+    width = blocked.shape[0]
+    column = _column_distances(blocked, max_distance)
+    squared = np.square(column)
+    best = squared.copy()
+    for offset in range(1, min(math.ceil(max_distance), width - 1) + 1):
+        shift = np.float32(offset * offset)
+        # Columns farther away than every distance found so far cannot lower any of them
+        if offset % 16 == 0 and shift >= best.max():
+            break
+        np.minimum(best[offset:], squared[:-offset] + shift, out=best[offset:])
+        np.minimum(best[:-offset], squared[offset:] + shift, out=best[:-offset])
+    return np.minimum(np.sqrt(best), np.float32(max_distance))
+
+
+class ClearanceField:
+    """
+    Distance from every pixel of the map to the nearest obstacle, for clearance and collision queries.
+
+    The field is a capped Euclidean distance transform of the unpadded obstacle raster. Since it does not
+    depend on a robot footprint, robots of any size up to max_distance share it: a point is in the danger
+    zone of a robot when its clearance is below the robot's padding. Adding an obstacle can only lower
+    distances, so it only recomputes the window within max_distance of the new obstacle.
+
+    Attributes:
+        max_distance (float): The largest stored distance.
+        field (np.array): (width, height) float32 distances in pixels.
+    """
+    def __init__(self, obstacles, width, height, max_distance=128.0):
+        """
+        Build the field.
+
+        Args:
+            obstacles (list): List of obstacles, each a sequence of corner points.
+            width (int): The width of the map in pixels.
+            height (int): The height of the map in pixels.
+            max_distance (float): The largest distance of interest.
+        """
+        self.max_distance = max_distance
+        self.field = distance_transform(rasterize_obstacles(obstacles, width, height, 0), max_distance)
+
+    def add_obstacle(self, obstacle):
+        """
+        Lower the distances near a new obstacle.
+
+        Args:
+            obstacle (tuple): The corner points of the obstacle.
+        """
+        width, height = self.field.shape
+        bounds = obstacle_bounds(obstacle)
+        window = padded_slices(bounds, self.max_distance, width, height)
+        if not window:
+            return
+        x_slice, y_slice = window
+        local = [(x - x_slice.start, y - y_slice.start) for x, y in obstacle]
+        blocked = rasterize_obstacles([local], x_slice.stop - x_slice.start, y_slice.stop - y_slice.start, 0)
+        if blocked.any():
+            np.minimum(self.field[window], distance_transform(blocked, self.max_distance), out=self.field[window])
+
+    def clearance(self, pos):
+        """
+        Get the distance from a position to the nearest obstacle, 0 outside the map.
+
+        Args:
+            pos (tuple): The position.
+
+        Returns:
+            float: The distance in pixels, at most max_distance.
+        """
+        x, y = int(pos[0]), int(pos[1])
+        if 0 <= x < self.field.shape[0] and 0 <= y < self.field.shape[1]:
+            return float(self.field[x, y])
+        return 0.0
+
+    def clearances(self, points):
+        """
+        Get the distances of many positions at once, 0 outside the map.
+
+        Args:
+            points (np.array): (n, 2) array of positions.
+
+        Returns:
+            np.array: The distances in pixels.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x, y = points[:, 0].astype(np.intp), points[:, 1].astype(np.intp)
+        inside = (x >= 0) & (x < self.field.shape[0]) & (y >= 0) & (y < self.field.shape[1])
+        result = np.zeros(len(points), dtype=np.float32)
+        result[inside] = self.field[x[inside], y[inside]]
+        return result
+
+    def path_clearance(self, points, step=5.0):
+        """
+        Get the smallest distance to an obstacle along a polyline, sampled every step pixels.
+
+        Args:
+            points (list): The corner points of the polyline, e.g. the AMR position and its waypoints.
+            step (float): The sampling distance in pixels.
+
+        Returns:
+            float: The smallest distance in pixels, max_distance for an empty polyline.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            return self.max_distance
+        samples = [points[:1]]
+        for a, b in zip(points, points[1:]):
+            count = max(int(math.ceil(math.dist(a, b) / step)), 1)
+            samples.append(a + (b - a) * (np.arange(1, count + 1)[:, None] / count))
+        return float(self.clearances(np.concatenate(samples)).min())
+
+    def collides(self, corners, step=5.0):
+        """
+        Check if a convex footprint touches an obstacle.
+
+        The circle through the corners is tested first with one lookup at the centre. Otherwise the outline
+        is sampled every step pixels, and the pixels covered by the footprint are filled and looked up, so an
+        obstacle lying completely under the footprint is found as well. The footprint touches an obstacle
+        when a sample or a covered pixel is within step / 2 of it, so obstacles cannot slip between two samples.
+
+        Args:
+            corners (list): The corner points of the footprint in order.
+            step (float): The sampling distance of the outline in pixels.
+
+        Returns:
+            bool: True if the footprint is within step / 2 of an obstacle, False otherwise.
+        """
+        corners = np.asarray(corners, dtype=np.float64)
+        center = corners.mean(axis=0)
+        radius = float(np.hypot(*(corners - center).T).max())
+        if self.clearance(center) > radius + step:
+            return False
+        outline = np.vstack((corners, corners[:1]))
+        if self.path_clearance(outline, step) <= step / 2:
+            return True
+        width, height = self.field.shape
+        x_lo, y_lo = max(math.floor(corners[:, 0].min()), 0), max(math.floor(corners[:, 1].min()), 0)
+        x_hi, y_hi = min(math.ceil(corners[:, 0].max()), width - 1), min(math.ceil(corners[:, 1].max()), height - 1)
+        if x_lo > x_hi or y_lo > y_hi:
+            return False
+        covered = np.zeros((x_hi - x_lo + 1, y_hi - y_lo + 1), dtype=bool)
+        fill_polygon(covered, corners - (x_lo, y_lo))
+        return bool((self.field[x_lo:x_hi + 1, y_lo:y_hi + 1][covered] <= step / 2).any())
@@ -0,0 +1,183 @@
+import heapq
+from collections import OrderedDict
+import numpy as np
+from a_star import SQRT2, KEY_SCALE, is_valid
+
+INF = float('inf')
+
+
+class CostField:
+    """
+    Cost-to-go from every cell of an 8-connected occupancy grid to one goal cell.
+
+    The field is filled once by a Dijkstra flood outwards from the goal. Moves and costs are the same as in
+    AStarEngine and are symmetric, so the cost of a cell is the cost of the cheapest path from it to the goal.
+    A path from any start cell is then read by stepping to the neighbour with the smallest move cost plus
+    cost-to-go, in time proportional to the path length.
+
+    Costs are kept in a flat array over the grid padded with a one cell blocked border, like in AStarEngine.
+
+    Attributes:
+        shape (tuple): The shape of the grid.
+        goal (tuple): The goal (row, col) cell.
+        costs (np.array): The padded flat cost-to-go array, inf for blocked and unreachable cells.
+        expanded (int): The number of cells the flood expanded.
+    """
+    def __init__(self, grid, goal):
+        """
+        Flood the grid from the goal.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+            goal (tuple): The goal (row, col) cell.
+        """
+        ROW, COL = grid.shape
+        self.shape = grid.shape
+        self.goal = tuple(goal)
+        self.stride = stride = COL + 2
+        padded = np.ones((ROW + 2, COL + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = grid != 0
+        self.blocked = padded.reshape(-1)
+        self.moves = [(1, 1.0), (-1, 1.0), (stride, 1.0), (-stride, 1.0),
+                      (stride + 1, SQRT2), (stride - 1, SQRT2), (-stride + 1, SQRT2), (-stride - 1, SQRT2)]
+        self.costs = np.full(len(self.blocked), INF)
+        self.expanded = 0
+        if is_valid(goal[0], goal[1], ROW, COL) and not grid[goal[0], goal[1]]:
+            self._flood((goal[0] + 1) * stride + goal[1] + 1)
+
+    def _flood(self, goal):
+        blocked = memoryview(self.blocked)
+        costs = memoryview(self.costs)
+        moves = self.moves
+        shift = len(blocked).bit_length()
+        mask = (1 << shift) - 1
+        heappush, heappop = heapq.heappush, heapq.heappop
+        closed = bytearray(len(blocked))
+        costs[goal] = 0.0
+        open_list = [goal]
+        expanded = 0
+        while open_list:
+            current = heappop(open_list) & mask
+            if closed[current]:
+                continue
+            closed[current] = 1
+            expanded += 1
+            cost_current = costs[current]
+            for offset, cost in moves:
+                neighbour = current + offset
+                if blocked[neighbour] or closed[neighbour]:
+                    continue
+                cost_new = cost_current + cost
+                if cost_new < costs[neighbour]:
+                    costs[neighbour] = cost_new
+                    heappush(open_list, (int(cost_new * KEY_SCALE) << shift) | neighbour)
+        self.expanded = expanded
+
+    def cost(self, cell):
+        """
+        Get the cost-to-go of a cell.
+
+        Args:
+            cell (tuple): The (row, col) cell.
+
+        Returns:
+            float: The cost of the cheapest path to the goal, inf if there is none.
+        """
+        if not is_valid(cell[0], cell[1], *self.shape):
+            return INF
+        return float(self.costs[(cell[0] + 1) * self.stride + cell[1] + 1])
+
+    def path_from(self, src):
+        """
+        Read the path from a start cell to the goal by steepest descent over the field.
+
+        Args:
+            src (tuple): The source (row, col) cell.
+
+        Returns:
+            list: A list of (row, col) tuples from the cell after the source up to the goal,
+                  or an empty list if no path is found.
+        """
+        if self.cost(src) == INF:
+            return []
+        costs, blocked, moves, stride = self.costs, self.blocked, self.moves, self.stride
+        node = (src[0] + 1) * stride + src[1] + 1
+        goal = (self.goal[0] + 1) * stride + self.goal[1] + 1
+        path = []
+        while node != goal:
+            best, best_value = None, INF
+            for offset, cost in moves:
+                neighbour = node + offset
+                if not blocked[neighbour]:
+                    value = cost + costs[neighbour]
+                    if value < best_value:
+                        best, best_value = neighbour, value
+            node = best
+            row, col = divmod(node, stride)
+            path.append((row - 1, col - 1))
+        return path
+
+
+class CostFieldCache:
+    """
+    Least recently used cache of cost-to-go fields keyed by (grid version, goal cell), bounded in bytes.
+
+    Like in PathCache, every entry is dropped as soon as a lookup with a newer grid version is made.
+
+    Attributes:
+        max_bytes (int): The maximum total size of the cached cost arrays.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to flood the grid.
+    """
+    def __init__(self, max_bytes=32 << 20):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): The maximum total size of the cached cost arrays. The newest field is always kept.
+        """
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, version, grid, goal):
+        """
+        Get the field for a goal, flooding the grid on a miss.
+
+        Args:
+            version (int): The current grid version.
+            grid (np.array): The grid, used on a miss.
+            goal (tuple): The goal cell.
+
+        Returns:
+            CostField: The field.
+        """
+        if version != self._version:
+            self.clear()
+            self._version = version
+        goal = tuple(goal)
+        field = self._entries.get(goal)
+        if field is not None:
+            self.hits += 1
+            self._entries.move_to_end(goal)
+            return field
+        self.misses += 1
+        field = CostField(grid, goal)
+        self._entries[goal] = field
+        self._bytes += field.costs.nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.costs.nbytes
+        return field
+
+    def clear(self):
+        """
+        Drop every cached field.
+        """
+        self._entries.clear()
+        self._bytes = 0
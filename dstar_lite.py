@@ -0,0 +1,228 @@
+import heapq
+import numpy as np
+from a_star import SQRT2, is_valid
+
+INF = float('inf')
+# Move costs are kept as integers in units of 1 / COST_UNIT, so sums and priority keys compare exactly.
+# Float keys can come out one ulp apart depending on the order of the additions, which ends a repair early.
+COST_UNIT = 1 << 32
+DIAGONAL_COST = round(SQRT2 * COST_UNIT)
+
+
+class DStarLite:
+    """
+    D* Lite incremental planner over an 8-connected occupancy grid, for one fixed goal.
+
+    The search runs backwards from the goal and keeps its g and rhs values and its open list between calls.
+    When cells change, only the nodes whose cost-to-goal is affected are expanded again, and moving the start
+    only shifts the priority keys by the km offset. Repairs are cheapest for changes close to the robot, since
+    fewer cost-to-goal values depend on them than on changes close to the goal. Moves and costs are the same
+    as in AStarEngine, so the paths have the same cost. Costs are stored as integer multiples of 1 / COST_UNIT.
+
+    Nodes are flat indices into the grid padded with a one cell blocked border, like in AStarEngine.
+
+    Attributes:
+        shape (tuple): The shape of the grid.
+        goal_cell (tuple): The goal (row, col) cell.
+        expanded (int): The number of nodes expanded by the last search_from call.
+    """
+    def __init__(self, grid, goal):
+        """
+        Initialize the planner. Nothing is searched before the first search_from call.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+            goal (tuple): The goal (row, col) cell.
+        """
+        ROW, COL = grid.shape
+        self.shape = grid.shape
+        self.stride = stride = COL + 2
+        padded = np.ones((ROW + 2, COL + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = grid != 0
+        self.blocked = bytearray(padded.tobytes())
+        straight, diagonal = COST_UNIT, DIAGONAL_COST
+        self.moves = [(1, straight), (-1, straight), (stride, straight), (-stride, straight),
+                      (stride + 1, diagonal), (stride - 1, diagonal), (-stride + 1, diagonal), (-stride - 1, diagonal)]
+        self.goal_cell = tuple(goal)
+        self.goal = self._node(goal)
+        self.g = [INF] * len(self.blocked)
+        self.rhs = [INF] * len(self.blocked)
+        self.rhs[self.goal] = 0
+        self.km = 0
+        self.start = self.last = None
+        self.open_list = []
+        self.queued = {}
+        self.expanded = 0
+
+    def _node(self, cell):
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def _cell(self, node):
+        row, col = divmod(node, self.stride)
+        return row - 1, col - 1
+
+    def _heuristic(self, a, b):
+        """
+        Octile distance between two nodes, in cost units.
+        """
+        row_a, col_a = divmod(a, self.stride)
+        row_b, col_b = divmod(b, self.stride)
+        d_row, d_col = abs(row_a - row_b), abs(col_a - col_b)
+        return COST_UNIT * (d_row + d_col) + (DIAGONAL_COST - 2 * COST_UNIT) * min(d_row, d_col)
+
+    def _key(self, node):
+        best = min(self.g[node], self.rhs[node])
+        return best + self._heuristic(self.start, node) + self.km, best
+
+    def _update(self, node):
+        """
+        Recompute the rhs value of a node and put it on the open list if it is inconsistent.
+        """
+        blocked = self.blocked
+        if node != self.goal:
+            best = INF
+            if not blocked[node]:
+                g = self.g
+                for offset, cost in self.moves:
+                    neighbour = node + offset
+                    if not blocked[neighbour]:
+                        value = cost + g[neighbour]
+                        if value < best:
+                            best = value
+            self.rhs[node] = best
+        if self.g[node] != self.rhs[node]:
+            key = self._key(node)
+            self.queued[node] = key
+            heapq.heappush(self.open_list, (key[0], key[1], node))
+        else:
+            self.queued.pop(node, None)
+
+    def _update_neighbours(self, node):
+        for offset, _ in self.moves:
+            neighbour = node + offset
+            if not self.blocked[neighbour]:
+                self._update(neighbour)
+
+    def _compute_shortest_path(self):
+        """
+        Expand inconsistent nodes until the start is consistent and no queued key is below its key.
+        """
+        g, rhs, queued, open_list = self.g, self.rhs, self.queued, self.open_list
+        start = self.start
+        expanded = 0
+        while open_list:
+            k1, k2, node = open_list[0]
+            if queued.get(node) != (k1, k2):
+                heapq.heappop(open_list)
+                continue
+            start_key = self._key(start)
+            if (k1, k2) >= start_key and rhs[start] == g[start]:
+                break
+            heapq.heappop(open_list)
+            new_key = self._key(node)
+            if (k1, k2) < new_key:
+                queued[node] = new_key
+                heapq.heappush(open_list, (new_key[0], new_key[1], node))
+                continue
+            del queued[node]
+            expanded += 1
+            if g[node] > rhs[node]:
+                g[node] = rhs[node]
+                self._update_neighbours(node)
+            else:
+                g[node] = INF
+                self._update(node)
+                self._update_neighbours(node)
+        self.expanded = expanded
+
+    def update_cells(self, cells, grid):
+        """
+        Take changed cells of the grid into account. Nothing is searched until the next search_from call.
+
+        Args:
+            cells (iterable): The (row, col) cells that may have changed.
+            grid (np.array): The grid holding their new state.
+
+        Returns:
+            int: The number of cells that actually changed.
+        """
+        changed = []
+        for cell in cells:
+            node = self._node(cell)
+            value = 1 if grid[cell[0], cell[1]] else 0
+            if self.blocked[node] != value:
+                self.blocked[node] = value
+                changed.append(node)
+        if self.start is not None:
+            for node in changed:
+                self._update(node)
+                self._update_neighbours(node)
+        return len(changed)
+
+    def update_region(self, grid, rows, cols):
+        """
+        Take a changed region of the grid into account, like update_cells.
+
+        Args:
+            grid (np.array): The grid.
+            rows (slice): The changed rows.
+            cols (slice): The changed columns.
+
+        Returns:
+            int: The number of cells that actually changed.
+        """
+        old = np.frombuffer(self.blocked, dtype=np.uint8).reshape(self.shape[0] + 2, self.stride)
+        old = old[rows.start + 1:rows.stop + 1, cols.start + 1:cols.stop + 1]
+        diff = np.argwhere(old != (grid[rows, cols] != 0))
+        return self.update_cells([(int(row) + rows.start, int(col) + cols.start) for row, col in diff], grid)
+
+    def search_from(self, src):
+        """
+        Repair the search for a start cell and extract the path from it to the goal.
+
+        Args:
+            src (tuple): The source (row, col) cell, usually the current cell of the robot.
+
+        Returns:
+            list: A list of (row, col) tuples from the cell after the source up to the goal,
+                  or an empty list if no path is found.
+        """
+        ROW, COL = self.shape
+        if not is_valid(src[0], src[1], ROW, COL):
+            return []
+        node = self._node(src)
+        if self.start is None:
+            self.start = self.last = node
+            self.queued[self.goal] = key = self._key(self.goal)
+            heapq.heappush(self.open_list, (key[0], key[1], self.goal))
+        elif node != self.start:
+            self.km += self._heuristic(self.last, node)
+            self.start = self.last = node
+        if self.blocked[node] or node == self.goal:
+            self.expanded = 0
+            return []
+        self._compute_shortest_path()
+        return self._extract_path()
+
+    def _extract_path(self):
+        """
+        Follow the cheapest neighbours from the start to the goal.
+        """
+        g, blocked = self.g, self.blocked
+        node = self.start
+        if g[node] == INF:
+            return []
+        path = []
+        while node != self.goal and len(path) < len(blocked):
+            best, best_value = None, INF
+            for offset, cost in self.moves:
+                neighbour = node + offset
+                if not blocked[neighbour]:
+                    value = cost + g[neighbour]
+                    if value < best_value:
+                        best, best_value = neighbour, value
+            if best is None:
+                return []
+            node = best
+            path.append(self._cell(node))
+        return path if node == self.goal else []
@@ -0,0 +1,215 @@
+import math
+import numpy as np
+import pygame as pg
+import assets
+from assets import BLACK, AIUT_BLUE
+from AMR import LIN_SPEED_PX_S, ROT_SPEED_DEG_S
+from sim_clock import DT
+
+
+class Fleet:
+    """
+    Struct-of-arrays container for many AMRs sharing one map.
+
+    Every robot follows the same rotate-then-drive logic as Amr.stop_and_turn, but the whole fleet is
+    advanced with one set of NumPy operations per step. The pure pursuit controller is not supported.
+    Speeds are given per second and integrated with the fixed physics step dt, like in Amr. Waypoint buffers are stored in a (robots, capacity, 2)
+    array with a per-robot length and cursor, the current target in target_x/target_y/has_target.
+
+    Attributes:
+        size (int): The number of robots.
+        dt (float): The physics step in seconds.
+        x, y, angle_rad (np.array): The poses of the robots.
+        lin_speed (np.array): The linear speed of every robot in pixels per step, lin_speed_px_s * dt.
+        rot_speed_deg (np.array): The rotational speed of every robot in degrees per step, rot_speed_deg_s * dt.
+        target_x, target_y (np.array): The current targets.
+        has_target (np.array): Mask of the robots that have a target.
+        buffers (np.array): The waypoint buffers.
+        buffer_len (np.array): The number of waypoints in every buffer.
+        cursor (np.array): The index of the next waypoint to use as target.
+    """
+    def __init__(self, width=50, height=75, capacity=16, dt=DT):
+        """
+        Initialize an empty fleet.
+
+        Args:
+            width (int): The width of every robot.
+            height (int): The height of every robot.
+            capacity (int): The initial capacity of the waypoint buffers.
+            dt (float): The physics step in seconds.
+        """
+        self.width, self.height = width, height
+        self.dt = dt
+        self.half_diag = math.sqrt((height / 2) ** 2 + (width / 2) ** 2)
+        self.color, self.front_color = BLACK, AIUT_BLUE
+        self.size = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.angle_rad = np.zeros(0)
+        self.lin_speed = np.zeros(0)
+        self.rot_speed_deg = np.zeros(0)
+        self.target_x = np.zeros(0)
+        self.target_y = np.zeros(0)
+        self.has_target = np.zeros(0, dtype=bool)
+        self.buffers = np.zeros((0, capacity, 2))
+        self.buffer_len = np.zeros(0, dtype=np.int64)
+        self.cursor = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_amr(cls, amr):
+        """
+        Create a fleet of size one holding the state of an AMR, which has to use the stop_and_turn controller.
+
+        Args:
+            amr (Amr): The AMR.
+
+        Returns:
+            Fleet: The fleet.
+        """
+        if amr.controller != "stop_and_turn":
+            raise ValueError(f"Fleet only supports the stop_and_turn controller, not {amr.controller}")
+        fleet = cls(amr.width, amr.height, dt=amr.dt)
+        fleet.add(amr.x, amr.y, amr.angle_rad, amr.lin_speed_px_s, amr.rot_speed_deg_s)
+        if amr.target:
+            fleet.set_path(0, [amr.target] + list(amr.buffer))
+        return fleet
+
+    def write_back(self, index, amr):
+        """
+        Copy the state of a robot of the fleet into an AMR.
+
+        Args:
+            index (int): The index of the robot.
+            amr (Amr): The AMR to update.
+        """
+        amr.x, amr.y, amr.angle_rad = float(self.x[index]), float(self.y[index]), float(self.angle_rad[index])
+        amr.target = (float(self.target_x[index]), float(self.target_y[index])) if self.has_target[index] else None
+        amr.buffer = [tuple(point) for point in self.buffers[index, self.cursor[index]:self.buffer_len[index]].tolist()]
+        amr.plan_trajectory = bool(self.has_target[index])
+
+    def add(self, x, y, angle_rad=0.0, lin_speed_px_s=LIN_SPEED_PX_S, rot_speed_deg_s=ROT_SPEED_DEG_S):
+        """
+        Add a robot to the fleet, with the default speeds of an Amr unless given.
+
+        Args:
+            x (float): The x position.
+            y (float): The y position.
+            angle_rad (float): The heading.
+            lin_speed_px_s (float): The linear speed in pixels per second.
+            rot_speed_deg_s (float): The rotational speed in degrees per second.
+
+        Returns:
+            int: The index of the new robot.
+        """
+        self.x = np.append(self.x, x)
+        self.y = np.append(self.y, y)
+        self.angle_rad = np.append(self.angle_rad, angle_rad)
+        self.lin_speed = np.append(self.lin_speed, lin_speed_px_s * self.dt)
+        self.rot_speed_deg = np.append(self.rot_speed_deg, rot_speed_deg_s * self.dt)
+        self.target_x = np.append(self.target_x, 0.0)
+        self.target_y = np.append(self.target_y, 0.0)
+        self.has_target = np.append(self.has_target, False)
+        self.buffers = np.concatenate((self.buffers, np.zeros((1,) + self.buffers.shape[1:])))
+        self.buffer_len = np.append(self.buffer_len, 0)
+        self.cursor = np.append(self.cursor, 0)
+        self.size += 1
+        return self.size - 1
+
+    def set_path(self, index, waypoints):
+        """
+        Load waypoints for a robot. The first waypoint becomes its target, the rest go into its buffer.
+
+        Args:
+            index (int): The index of the robot.
+            waypoints (list): List of (x, y) waypoints, an empty list stops the robot.
+        """
+        if len(waypoints) > self.buffers.shape[1]:
+            grown = np.zeros((self.size, max(len(waypoints), 2 * self.buffers.shape[1]), 2))
+            grown[:, :self.buffers.shape[1]] = self.buffers
+            self.buffers = grown
+        self.buffers[index, :len(waypoints)] = waypoints
+        self.buffer_len[index] = len(waypoints)
+        self.cursor[index] = 0
+        self.has_target[index] = False
+        self._advance(np.array([index]))
+
+    def _advance(self, indices):
+        """
+        Make the next buffered waypoint the target of the given robots, or clear their target if none is left.
+
+        Args:
+            indices (np.array): The indices of the robots.
+        """
+        left = self.cursor[indices] < self.buffer_len[indices]
+        take, done = indices[left], indices[~left]
+        self.target_x[take] = self.buffers[take, self.cursor[take], 0]
+        self.target_y[take] = self.buffers[take, self.cursor[take], 1]
+        self.cursor[take] += 1
+        self.has_target[take] = True
+        self.has_target[done] = False
+
+    def step(self):
+        """
+        Advance every robot that has a target by one step, rotating towards it first and driving once aligned.
+        The last turn and drive steps are cut to the remaining angle and distance.
+        """
+        active = self.has_target
+        dx, dy = self.x - self.target_x, self.y - self.target_y
+        target_angle_rad = np.arctan2(dx, dy)
+        target_angle_rad[target_angle_rad < 0] += 2 * math.pi
+        angle_diff_rad = target_angle_rad - self.angle_rad
+
+        turning = active & (np.abs(angle_diff_rad) * 180 / math.pi > 1)
+        direction = np.where((angle_diff_rad < -math.pi) | ((0 < angle_diff_rad) & (angle_diff_rad < math.pi)), 1, -1)
+        remaining_rad = np.abs((angle_diff_rad + math.pi) % (2 * math.pi) - math.pi)
+        turn_rad = np.minimum(self.rot_speed_deg * math.pi / 180, remaining_rad)
+        self.angle_rad[turning] += (turn_rad * direction)[turning]
+        self.angle_rad[turning] %= 2 * math.pi
+
+        aligned = active & ~turning
+        distance = np.sqrt(dx ** 2 + dy ** 2)
+        driving = aligned & (distance > 5)
+        speed = np.minimum(self.lin_speed, distance)
+        self.y[driving] -= (speed * np.cos(self.angle_rad))[driving]
+        self.x[driving] -= (speed * np.sin(self.angle_rad))[driving]
+
+        arrived = np.flatnonzero(aligned & ~driving)
+        if arrived.size:
+            self._advance(arrived)
+
+    def corners(self):
+        """
+        Compute the body and front light polygons of every robot, matching Amr.draw.
+
+        Returns:
+            tuple: Two (robots, 4, 2) arrays with the body and the front light corners.
+        """
+        rect_ang = math.atan2(self.height / 2, self.width / 2)
+        half_diag_inner = math.sqrt((self.height / 2 - 5) ** 2 + (self.width / 2) ** 2)
+        rect_ang_inner = math.atan2(self.height / 2 - 5, self.width / 2)
+        body = self._polygons([rect_ang, -rect_ang + math.pi, rect_ang + math.pi, -rect_ang], [self.half_diag] * 4)
+        front = self._polygons([rect_ang, -rect_ang + math.pi, -rect_ang_inner + math.pi, rect_ang_inner],
+                               [self.half_diag, self.half_diag, half_diag_inner, half_diag_inner])
+        return body, front
+
+    def _polygons(self, angles, radii):
+        """
+        Compute polygon corners at the given angles and distances around every robot.
+        """
+        angles = np.asarray(angles)[None, :] + self.angle_rad[:, None]
+        radii = np.asarray(radii)[None, :]
+        return np.stack((self.x[:, None] + radii * np.cos(angles), self.y[:, None] - radii * np.sin(angles)), axis=2)
+
+    def draw(self):
+        """
+        Draw every robot of the fleet, computing all polygons in one vectorized pass.
+
+        Returns:
+            list: The rectangles drawn on.
+        """
+        body, front = self.corners()
+        rects = []
+        for body_points, front_points in zip(body.tolist(), front.tolist()):
+            rects.append(pg.draw.polygon(assets.WIN, self.color, body_points))
+            pg.draw.polygon(assets.WIN, self.front_color, front_points)
+        return rects
@@ -0,0 +1,206 @@
+import json
+import pygame as pg
+from time import perf_counter
+from assets import WIDTH, HEIGHT
+from AMR import Amr
+from telemetry import TelemetryRecorder
+
+KEY_NAMES = {'up': pg.K_UP, 'down': pg.K_DOWN, 'left': pg.K_LEFT, 'right': pg.K_RIGHT}
+
+
+class KeyState:
+    """
+    Stand-in for the sequence returned by pg.key.get_pressed, holding the scripted pressed keys.
+    """
+    def __init__(self, pressed=()):
+        """
+        Initialize the key state.
+
+        Args:
+            pressed (iterable): Pygame key codes or names from KEY_NAMES that are held down.
+        """
+        self.pressed = {KEY_NAMES.get(key, key) for key in pressed}
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class HeadlessSimulation:
+    """
+    Simulation of the AMR and its map without a window, fonts or drawing.
+
+    A script is a list of (tick, action, value) entries applied before the given tick:
+        ("target", (x, y))              set the map target and plan a path to it
+        ("obstacle", (x0, y0, x1, y1))  add a rectangular obstacle
+        ("polygon", [x0, y0, x1, ...])  add a convex polygon obstacle with these corners in order
+        ("keys", ["up", "left"])        hold these keys down until the next "keys" entry
+        ("find_path", None)             plan a path to the current target again
+        ("reset", None)                 reset the obstacles and the target
+        ("algorithm", "hpa")            select the path search algorithm of the map
+        ("controller", "pure_pursuit")  select the path following controller of the AMR
+        ("lookahead", 80)               set the lookahead distance of the pure pursuit controller
+        ("load", "map.bin")             load a map file saved with Map.save
+        ("save", "map.bin")             save the map to a file
+
+    Attributes:
+        amr (Amr): The simulated AMR.
+        map (Map): The map of the AMR.
+        tick (int): The number of simulated ticks.
+    """
+    def __init__(self, x=WIDTH // 2, y=HEIGHT // 2, script=(), map_size=(WIDTH, HEIGHT)):
+        """
+        Initialize the simulation.
+
+        Args:
+            x (int): The start x position of the AMR.
+            y (int): The start y position of the AMR.
+            script (iterable): The scripted inputs.
+            map_size (tuple): The width and height of the map.
+        """
+        self.amr = Amr(x, y, headless=True, map_size=map_size)
+        self.map = self.amr.map
+        self.tick = 0
+        self.keys = KeyState()
+        self.script = sorted(script, key=lambda entry: entry[0])
+        self._next_entry = 0
+
+    def set_target(self, pos):
+        """
+        Set the map target and plan a path to it, like the targeting and find path buttons do.
+
+        Args:
+            pos (tuple): The target position.
+
+        Returns:
+            bool: True if the target is reachable, False otherwise.
+        """
+        if self.map.is_danger_zone(pos):
+            return False
+        self.map.set_target(tuple(pos))
+        return self.map.find_path()
+
+    def add_obstacle(self, x0, y0, x1, y1):
+        """
+        Add a rectangular obstacle, like dragging the mouse with obstacle input enabled.
+        """
+        self.map.add_obstacle(((x0, y0), (x0, y1), (x1, y1), (x1, y0)))
+
+    def apply(self, action, value):
+        """
+        Apply a single scripted action.
+
+        Args:
+            action (str): The action name.
+            value: The action argument.
+        """
+        if action == 'target':
+            self.set_target(value)
+        elif action == 'obstacle':
+            self.add_obstacle(*value)
+        elif action == 'polygon':
+            self.map.add_obstacle(tuple(zip(value[0::2], value[1::2])))
+        elif action == 'keys':
+            self.keys = KeyState(value)
+        elif action == 'find_path':
+            if self.map.target:
+                self.map.find_path()
+        elif action == 'algorithm':
+            self.map.algorithm = value
+        elif action == 'controller':
+            self.amr.controller = value
+        elif action == 'lookahead':
+            self.amr.lookahead = value
+        elif action == 'load':
+            self.map.load(value)
+        elif action == 'save':
+            self.map.save(value)
+        elif action == 'reset':
+            self.map.reset_obstacles()
+            self.map.set_target(None)
+            self.amr.target = None
+            self.amr.buffer = []
+            self.amr.plan_trajectory = False
+        else:
+            raise ValueError(f"Unknown script action: {action}")
+
+    def step(self):
+        """
+        Advance the simulation by one tick.
+        """
+        while self._next_entry < len(self.script) and self.script[self._next_entry][0] <= self.tick:
+            _, action, value = self.script[self._next_entry]
+            self.apply(action, value)
+            self._next_entry += 1
+        self.amr.handle_movement(self.keys, None)
+        if self.map.recorder:
+            self.map.recorder.record_tick(self.amr)
+        self.tick += 1
+
+    def is_idle(self):
+        """
+        Check if the AMR has nothing left to do.
+
+        Returns:
+            bool: True if there is no target, no buffered waypoint, no held key and no pending script entry.
+        """
+        return not self.amr.target and not self.amr.buffer and not self.keys.pressed and \
+            self._next_entry >= len(self.script)
+
+    def run(self, ticks, until_idle=False):
+        """
+        Run the simulation.
+
+        Args:
+            ticks (int): The maximum number of ticks.
+            until_idle (bool): Stop early once the AMR is idle.
+
+        Returns:
+            int: The number of ticks run.
+        """
+        for done in range(ticks):
+            if until_idle and self.is_idle():
+                return done
+            self.step()
+        return ticks
+
+
+def load_script(path):
+    """
+    Load a script from a JSON file holding a list of [tick, action, value] entries.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        list: The script entries as tuples.
+    """
+    with open(path) as file:
+        return [tuple(entry) for entry in json.load(file)]
+
+
+def run_headless(ticks, script=(), until_idle=True, record=None):
+    """
+    Run a headless simulation and print the final state and the step rate.
+
+    Args:
+        ticks (int): The maximum number of ticks.
+        script (iterable): The scripted inputs.
+        until_idle (bool): Stop early once the AMR is idle.
+        record (str): Path of a telemetry log the run is recorded to.
+
+    Returns:
+        HeadlessSimulation: The finished simulation.
+    """
+    sim = HeadlessSimulation(script=script)
+    if record:
+        TelemetryRecorder(record).attach(sim.map)
+    start = perf_counter()
+    done = sim.run(ticks, until_idle)
+    elapsed = perf_counter() - start
+    if record:
+        sim.map.recorder.close()
+    sim_time = done * sim.amr.dt
+    print(f"ticks: {done}, sim time: {sim_time:.2f} s, time: {elapsed:.3f} s, ticks/s: {done / elapsed if elapsed else float('inf'):.0f}, "
+          f"speedup: {sim_time / elapsed if elapsed else float('inf'):.0f}x")
+    print(f"x: {sim.amr.x:.2f}, y: {sim.amr.y:.2f}, angle: {sim.amr.angle_rad:.4f} rad, waypoints left: {len(sim.amr.buffer)}")
+    return sim
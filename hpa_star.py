@@ -0,0 +1,434 @@
+import heapq
+import numpy as np
+from a_star import SQRT2, AStarEngine, is_valid, octile_distance
+
+# Entrances narrower than this get one transition in their middle, wider ones get one at each end
+MAX_SINGLE_ENTRANCE = 6
+
+
+def free_runs(mask):
+    """
+    Find the runs of consecutive True values in a boolean array.
+
+    Args:
+        mask (np.array): 1D boolean array.
+
+    Returns:
+        list: List of (start, stop) index pairs, stop excluded.
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+class HpaPlanner:
+    """
+    Hierarchical path planner (HPA*) over an 8-connected occupancy grid.
+
+    The grid is split into square clusters. Along every border between two clusters the runs of cells that
+    are free on both sides form entrances, each contributing one or two transitions: pairs of facing cells
+    linked by a straight move. Diagonal moves that squeeze between two blocked cells, across a border or
+    across the corner where four clusters meet, are only reachable that way and get a transition of their
+    own, so a path is found whenever a_star_search finds one. The transition cells are the nodes of an abstract graph whose edges are the
+    transitions and the shortest paths between the nodes of one cluster, computed inside that cluster only.
+    A query searches the abstract graph and then refines each abstract edge into grid cells with a small
+    A* search restricted to one cluster. Paths are close to, but not always exactly, the shortest.
+
+    Attributes:
+        grid (np.array): The occupancy grid, read in place, non-zero cells are blocked.
+        cluster_size (int): The side of a cluster in cells.
+        clusters (tuple): The number of clusters along each grid axis.
+        transitions (dict): Transition cell pairs per border, keyed by the pair of clusters it separates.
+        entrances (dict): Transition cells per cluster.
+        intra (dict): Per cluster, the (cell, cost) edges of every transition cell to the others in the cluster.
+        expanded (int): The number of abstract nodes expanded by the last search.
+
+    A planner restored with from_arrays keeps the arrays and fills transitions, entrances and intra from them
+    on the first search or update, so loading a saved map does not pay for it.
+    """
+    def __init__(self, grid, cluster_size=10, build=True):
+        """
+        Build the abstract graph of a grid.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid.
+            cluster_size (int): The side of a cluster in cells.
+            build (bool): Flag to build the graph, False leaves it empty for from_arrays.
+        """
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.clusters = (-(-grid.shape[0] // cluster_size), -(-grid.shape[1] // cluster_size))
+        self.transitions = {}
+        self.entrances = {}
+        self.intra = {}
+        self._inter = {}
+        self._engine = AStarEngine()
+        self._saved = None
+        self.expanded = 0
+        if build:
+            self.rebuild()
+
+    def to_arrays(self):
+        """
+        Export the abstract graph as arrays, for saving it with the map.
+
+        Returns:
+            dict: "transitions" (n, 4) pairs of (row, col) cells, "edges" (m, 4) intra-cluster edges
+                  as pairs of cells and "costs" (m,) their costs.
+        """
+        if self._saved is not None:
+            return dict(zip(('transitions', 'edges', 'costs'), self._saved))
+        transitions = [cell_a + cell_b for pairs in self.transitions.values() for cell_a, cell_b in pairs]
+        edges, costs = [], []
+        for nodes in self.intra.values():
+            for cell, neighbours in nodes.items():
+                for neighbour, cost in neighbours:
+                    edges.append(cell + neighbour)
+                    costs.append(cost)
+        return {'transitions': np.array(transitions, dtype=np.int32).reshape(-1, 4),
+                'edges': np.array(edges, dtype=np.int32).reshape(-1, 4),
+                'costs': np.array(costs, dtype=np.float64)}
+
+    @classmethod
+    def from_arrays(cls, grid, cluster_size, transitions, edges, costs):
+        """
+        Restore an abstract graph exported with to_arrays, without searching the grid. The arrays are only
+        unpacked on the first search or update.
+
+        Args:
+            grid (np.array): The grid the graph was built on.
+            cluster_size (int): The side of a cluster in cells.
+            transitions (np.array): The transition cell pairs.
+            edges (np.array): The intra-cluster edges.
+            costs (np.array): The costs of the edges.
+
+        Returns:
+            HpaPlanner: The planner.
+        """
+        planner = cls(grid, cluster_size, build=False)
+        planner._saved = (transitions, edges, costs)
+        return planner
+
+    def _unpack(self):
+        """
+        Fill the graph from the arrays passed to from_arrays, if they were not unpacked yet.
+        """
+        if self._saved is None:
+            return
+        transitions, edges, costs = self._saved
+        self._saved = None
+        self.transitions = {}
+        for row_a, col_a, row_b, col_b in transitions.tolist():
+            key = tuple(sorted((self.cluster_of((row_a, col_a)), self.cluster_of((row_b, col_b)))))
+            self.transitions.setdefault(key, []).append(((row_a, col_a), (row_b, col_b)))
+        self._index_transitions()
+        self.intra = {cluster: {cell: [] for cell in cells} for cluster, cells in self.entrances.items()}
+        for (row_a, col_a, row_b, col_b), cost in zip(edges.tolist(), costs.tolist()):
+            self.intra[self.cluster_of((row_a, col_a))][(row_a, col_a)].append(((row_b, col_b), cost))
+
+    def cluster_of(self, cell):
+        """
+        Get the cluster a cell belongs to.
+        """
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def _cluster_window(self, cluster):
+        """
+        Get the grid slices covered by a cluster.
+        """
+        row, col = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return slice(row, min(row + self.cluster_size, self.grid.shape[0])), \
+               slice(col, min(col + self.cluster_size, self.grid.shape[1]))
+
+    def _borders(self, cluster):
+        """
+        Get the keys of the borders and corners between a cluster and its existing neighbours.
+        """
+        row, col = cluster
+        keys = []
+        for d_row, d_col in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+            neighbour = (row + d_row, col + d_col)
+            if 0 <= neighbour[0] < self.clusters[0] and 0 <= neighbour[1] < self.clusters[1]:
+                keys.append((neighbour, cluster) if (d_row, d_col) < (0, 0) else (cluster, neighbour))
+        return keys
+
+    def _facing_corners(self, cluster):
+        """
+        Get the keys of the corners between the neighbours of a cluster that meet at one of its corners,
+        whose transitions depend on the cells of the cluster.
+        """
+        row, col = cluster
+        keys = []
+        for d_row in (-1, 1):
+            for d_col in (-1, 1):
+                upper, lower = sorted(((row + d_row, col), (row, col + d_col)))
+                if 0 <= min(upper + lower) and upper[0] < self.clusters[0] and lower[0] < self.clusters[0] and \
+                        upper[1] < self.clusters[1] and lower[1] < self.clusters[1]:
+                    keys.append((upper, lower))
+        return keys
+
+    def _find_transitions(self, key):
+        """
+        Find the transitions across the border or the corner between two neighbouring clusters.
+
+        Args:
+            key (tuple): The two clusters, the second one following the first along one axis, or in the
+                next row of clusters and a neighbouring column for a corner.
+
+        Returns:
+            list: List of (cell, cell) pairs, the first cell in the first cluster.
+        """
+        first, second = key
+        if first[0] != second[0] and first[1] != second[1]:
+            return self._corner_transitions(key)
+        rows, cols = self._cluster_window(first)
+        if second[0] != first[0]:
+            line = second[0] * self.cluster_size
+            near, far = self.grid[line - 1, cols] == 0, self.grid[line, cols] == 0
+            pair = lambda i, j: ((line - 1, cols.start + i), (line, cols.start + j))
+        else:
+            line = second[1] * self.cluster_size
+            near, far = self.grid[rows, line - 1] == 0, self.grid[rows, line] == 0
+            pair = lambda i, j: ((rows.start + i, line - 1), (rows.start + j, line))
+        transitions = []
+        for start, stop in free_runs(near & far):
+            picks = [(start + stop - 1) // 2] if stop - start < MAX_SINGLE_ENTRANCE else [start, stop - 1]
+            transitions += [pair(i, i) for i in picks]
+        # Diagonal moves between two blocked cells, the only crossings not reachable from an entrance
+        transitions += [pair(i, i + 1) for i in np.flatnonzero(near[:-1] & far[1:] & ~far[:-1] & ~near[1:]).tolist()]
+        transitions += [pair(i + 1, i) for i in np.flatnonzero(near[1:] & far[:-1] & ~near[:-1] & ~far[1:]).tolist()]
+        return transitions
+
+    def _corner_transitions(self, key):
+        """
+        Find the diagonal transition across the corner between two clusters in neighbouring rows and columns,
+        needed only when the cells of the two other clusters at the corner are blocked.
+        """
+        first, second = key
+        row = second[0] * self.cluster_size
+        col = max(first[1], second[1]) * self.cluster_size
+        if second[1] > first[1]:
+            cell_a, cell_b = (row - 1, col - 1), (row, col)
+        else:
+            cell_a, cell_b = (row - 1, col), (row, col - 1)
+        grid = self.grid
+        if grid[cell_a] or grid[cell_b] or not (grid[cell_a[0], cell_b[1]] and grid[cell_b[0], cell_a[1]]):
+            return []
+        return [(cell_a, cell_b)]
+
+    def _index_transitions(self):
+        """
+        Rebuild the transition cells per cluster and the inter-cluster edges from the transitions.
+        """
+        self.entrances = {}
+        self._inter = {}
+        for pairs in self.transitions.values():
+            for cell_a, cell_b in pairs:
+                self.entrances.setdefault(self.cluster_of(cell_a), set()).add(cell_a)
+                self.entrances.setdefault(self.cluster_of(cell_b), set()).add(cell_b)
+                self._inter.setdefault(cell_a, []).append(cell_b)
+                self._inter.setdefault(cell_b, []).append(cell_a)
+
+    def _cluster_distances(self, cluster, sources, targets):
+        """
+        Compute the shortest distances from source cells to target cells, moving inside one cluster only.
+
+        Args:
+            cluster (tuple): The cluster.
+            sources (iterable): The source cells.
+            targets (iterable): The target cells.
+
+        Returns:
+            dict: For every source, a dict of the reachable targets and their distance.
+        """
+        rows, cols = self._cluster_window(cluster)
+        height, width = rows.stop - rows.start, cols.stop - cols.start
+        stride = width + 2
+        padded = np.ones((height + 2, stride), dtype=bool)
+        padded[1:-1, 1:-1] = self.grid[rows, cols] != 0
+        blocked = padded.reshape(-1).tolist()
+        moves = [(1, 1.0), (-1, 1.0), (stride, 1.0), (-stride, 1.0),
+                 (stride + 1, SQRT2), (stride - 1, SQRT2), (-stride + 1, SQRT2), (-stride - 1, SQRT2)]
+        to_node = lambda cell: (cell[0] - rows.start + 1) * stride + cell[1] - cols.start + 1
+        wanted = {to_node(cell): cell for cell in targets}
+        heappush, heappop = heapq.heappush, heapq.heappop
+        result = {}
+        for source in sources:
+            start = to_node(source)
+            distance = {start: 0.0}
+            open_list = [(0.0, start)]
+            found = {}
+            while open_list and len(found) < len(wanted):
+                dist, node = heappop(open_list)
+                if dist > distance[node] or node in found:
+                    continue
+                if node in wanted:
+                    found[node] = dist
+                for offset, cost in moves:
+                    neighbour = node + offset
+                    if blocked[neighbour]:
+                        continue
+                    new_dist = dist + cost
+                    if new_dist < distance.get(neighbour, float('inf')):
+                        distance[neighbour] = new_dist
+                        heappush(open_list, (new_dist, neighbour))
+            result[source] = {wanted[node]: dist for node, dist in found.items() if node != start}
+        return result
+
+    def _build_cluster(self, cluster):
+        """
+        Compute the intra-cluster edges between the transition cells of a cluster.
+        """
+        cells = sorted(self.entrances.get(cluster, ()))
+        distances = self._cluster_distances(cluster, cells, cells)
+        self.intra[cluster] = {cell: list(distances[cell].items()) for cell in cells}
+
+    def rebuild(self):
+        """
+        Rebuild the whole abstract graph from the grid.
+        """
+        self._saved = None
+        self.transitions = {}
+        for row in range(self.clusters[0]):
+            for col in range(self.clusters[1]):
+                for key in self._borders((row, col)):
+                    if key not in self.transitions:
+                        self.transitions[key] = self._find_transitions(key)
+        self._index_transitions()
+        self.intra = {}
+        for row in range(self.clusters[0]):
+            for col in range(self.clusters[1]):
+                self._build_cluster((row, col))
+
+    def update_region(self, rows, cols):
+        """
+        Update the abstract graph after the cells of a region of the grid changed.
+
+        Only the borders and corners of the clusters overlapping the region, and the corners between their
+        neighbours, are searched for transitions again, and only those clusters and their neighbours, whose
+        transition cells may have moved, get new intra edges.
+
+        Args:
+            rows (slice): The changed rows of the grid.
+            cols (slice): The changed columns of the grid.
+        """
+        self._unpack()
+        size = self.cluster_size
+        touched = [(row, col) for row in range(rows.start // size, (rows.stop - 1) // size + 1)
+                   for col in range(cols.start // size, (cols.stop - 1) // size + 1)]
+        dirty = set(touched)
+        for cluster in touched:
+            for key in self._borders(cluster) + self._facing_corners(cluster):
+                self.transitions[key] = self._find_transitions(key)
+                dirty.update(key)
+        self._index_transitions()
+        for cluster in dirty:
+            self._build_cluster(cluster)
+
+    def abstract_path(self, src, dest):
+        """
+        Search the abstract graph between two cells.
+
+        The source and goal are linked to the transition cells of their cluster, and to each other when they
+        share a cluster, for this query only.
+
+        Args:
+            src (tuple): The source cell.
+            dest (tuple): The destination cell.
+
+        Returns:
+            list: The abstract nodes from the source to the destination, both included, or an empty list.
+        """
+        self._unpack()
+        src_cluster, dest_cluster = self.cluster_of(src), self.cluster_of(dest)
+        src_targets = set(self.entrances.get(src_cluster, ()))
+        if src_cluster == dest_cluster:
+            src_targets.add(dest)
+        start_edges = self._cluster_distances(src_cluster, [src], src_targets)[src]
+        goal_edges = self._cluster_distances(dest_cluster, [dest], self.entrances.get(dest_cluster, ()))[dest]
+
+        g_score = {src: 0.0}
+        parent = {src: None}
+        closed = set()
+        open_list = [(octile_distance(src, dest), src)]
+        expanded = 0
+        found = False
+        while open_list:
+            _, node = heapq.heappop(open_list)
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            if node == dest:
+                found = True
+                break
+            edges = list(self.intra.get(self.cluster_of(node), {}).get(node, ()))
+            edges += [(cell, octile_distance(node, cell)) for cell in self._inter.get(node, ())]
+            if node == src:
+                edges += start_edges.items()
+            if node in goal_edges:
+                edges.append((dest, goal_edges[node]))
+            for neighbour, cost in edges:
+                g_new = g_score[node] + cost
+                if g_new < g_score.get(neighbour, float('inf')):
+                    g_score[neighbour] = g_new
+                    parent[neighbour] = node
+                    heapq.heappush(open_list, (g_new + octile_distance(neighbour, dest), neighbour))
+        self.expanded = expanded
+        if not found:
+            return []
+        path = [dest]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        return path[::-1]
+
+    def refine_segment(self, cell_a, cell_b):
+        """
+        Turn an abstract edge into grid cells.
+
+        Args:
+            cell_a (tuple): The first node of the edge.
+            cell_b (tuple): The second node of the edge.
+
+        Returns:
+            list: The cells after cell_a up to cell_b.
+        """
+        if self.cluster_of(cell_a) != self.cluster_of(cell_b):
+            return [cell_b]
+        rows, cols = self._cluster_window(self.cluster_of(cell_a))
+        local = self._engine.search(self.grid[rows, cols], (cell_a[0] - rows.start, cell_a[1] - cols.start),
+                                    (cell_b[0] - rows.start, cell_b[1] - cols.start))
+        return [(row + rows.start, col + cols.start) for row, col in local]
+
+    def refine(self, abstract):
+        """
+        Turn an abstract path into grid cells, refining only the clusters it passes through.
+
+        Args:
+            abstract (list): The abstract path returned by abstract_path.
+
+        Returns:
+            list: The cells after the first node up to the last one.
+        """
+        path = []
+        for cell_a, cell_b in zip(abstract, abstract[1:]):
+            path += self.refine_segment(cell_a, cell_b)
+        return path
+
+    def search(self, src, dest):
+        """
+        Find a path between two cells, in the format returned by a_star_search.
+
+        Args:
+            src (tuple): The source (row, col) cell.
+            dest (tuple): The destination (row, col) cell.
+
+        Returns:
+            list: A list of (row, col) tuples from the cell after the source up to the destination,
+                  or an empty list if no path is found.
+        """
+        ROW, COL = self.grid.shape
+        if not is_valid(src[0], src[1], ROW, COL) or not is_valid(dest[0], dest[1], ROW, COL):
+            return []
+        if self.grid[src[0]][src[1]] or self.grid[dest[0]][dest[1]] or src == dest:
+            return []
+        return self.refine(self.abstract_path(src, dest))
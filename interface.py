@@ -1,6 +1,7 @@
 import math
 import pygame as pg
-from assets import WIDTH, HEIGHT, BLACK, AIUT_BLUE, GREY, INTERFACE_WIDTH, INTERFACE_HEIGHT, WIN, FONT
+import assets
+from assets import WIDTH, HEIGHT, BLACK, AIUT_BLUE, GREY, INTERFACE_WIDTH, INTERFACE_HEIGHT
 
 
 class Interface():
@@ -13,22 +14,41 @@ class Interface():
         self.amr = amr
         self.width, self.height = INTERFACE_WIDTH, INTERFACE_HEIGHT
         self.x, self.y = WIDTH - INTERFACE_WIDTH, HEIGHT - INTERFACE_HEIGHT
-        self.font = pg.font.SysFont(FONT, 20)
+        self.font = None if amr.headless else assets.get_font(20)
         self.fill_color = GREY
+        # Text and rendered surface of every label, re-rendered only when the text changes
+        self._labels = {}
+
+    def label(self, name, text):
+        """
+        Get the rendered surface of a label, rendering it only if its text changed since the last call.
+
+        Args:
+            name (str): The label name.
+            text (str): The label text.
+
+        Returns:
+            pg.Surface: The rendered text.
+        """
+        cached = self._labels.get(name)
+        if cached is None or cached[0] != text:
+            cached = self._labels[name] = (text, self.font.render(text, 1, BLACK))
+        return cached[1]
 
     def draw(self):
         """
         Draw the interface on the screen.
+
+        Returns:
+            list: The rectangles drawn on.
         """
-        pg.draw.rect(WIN, BLACK, (self.x - 2, self.y - 2, self.width, self.height))
-        pg.draw.rect(WIN, self.fill_color, (self.x, self.y, self.width, self.height))
-
-        x_text = self.font.render(
-            "X: " + str(round(self.amr.x, 2)), 1, BLACK)
-        y_text = self.font.render(
-            "Y: " + str(round(self.amr.y, 2)), 1, BLACK)
-        angle_text = self.font.render(
-            "Angle: " + str(round(math.degrees(self.amr.angle_rad), 2)), 1, BLACK)
-        WIN.blit(x_text, (self.x + 10, self.y + 10))
-        WIN.blit(y_text, (self.x + 90, self.y + 10))
-        WIN.blit(angle_text, (self.x + 10, self.y + x_text.get_height() + 20))
+        rect = pg.draw.rect(assets.WIN, BLACK, (self.x - 2, self.y - 2, self.width, self.height))
+        pg.draw.rect(assets.WIN, self.fill_color, (self.x, self.y, self.width, self.height))
+
+        x_text = self.label("x", "X: " + str(round(self.amr.x, 2)))
+        y_text = self.label("y", "Y: " + str(round(self.amr.y, 2)))
+        angle_text = self.label("angle", "Angle: " + str(round(math.degrees(self.amr.angle_rad), 2)))
+        assets.WIN.blit(x_text, (self.x + 10, self.y + 10))
+        assets.WIN.blit(y_text, (self.x + 90, self.y + 10))
+        assets.WIN.blit(angle_text, (self.x + 10, self.y + x_text.get_height() + 20))
+        return [rect.union((self.x, self.y, self.width, self.height))]
@@ -0,0 +1,225 @@
+import heapq
+from a_star import SQRT2, KEY_SCALE, AStarEngine, is_valid
+
+
+class JumpPointEngine(AStarEngine):
+    """
+    Jump Point Search over an 8-connected occupancy grid with uniform move costs.
+
+    Instead of pushing every neighbour of an expanded node, the search jumps along straight and diagonal
+    lines and only stops at jump points: the goal and cells with a forced neighbour, one that can only be
+    reached optimally through that cell because an obstacle blocks the symmetric alternatives. Diagonal
+    moves may cut obstacle corners, like in AStarEngine, so the paths have the same cost as its paths.
+    The arrays and the padded blocked map are shared with AStarEngine.
+
+    Attributes:
+        expanded (int): The number of jump points expanded by the last search.
+    """
+    def _jump(self, node, d_row, d_col, goal):
+        """
+        Jump from a node in a direction until a jump point, an obstacle or the grid border is reached.
+
+        Args:
+            node (int): The flat index the jump starts from.
+            d_row (int): The row step, -1, 0 or 1.
+            d_col (int): The column step, -1, 0 or 1.
+            goal (int): The flat index of the goal.
+
+        Returns:
+            int: The flat index of the jump point, or None if there is none in that direction.
+        """
+        blocked = self._blocked_view
+        stride = self.stride
+        offset = d_row * stride + d_col
+        if d_row and d_col:
+            row_offset, col_offset = d_row * stride, d_col
+            while True:
+                node += offset
+                if blocked[node]:
+                    return None
+                if node == goal:
+                    return node
+                if (blocked[node - row_offset] and not blocked[node - row_offset + col_offset]) or \
+                        (blocked[node - col_offset] and not blocked[node - col_offset + row_offset]):
+                    return node
+                if self._jump(node, d_row, 0, goal) is not None or self._jump(node, 0, d_col, goal) is not None:
+                    return node
+        side = 1 if d_row else stride
+        while True:
+            node += offset
+            if blocked[node]:
+                return None
+            if node == goal:
+                return node
+            if (blocked[node + side] and not blocked[node + side + offset]) or \
+                    (blocked[node - side] and not blocked[node - side + offset]):
+                return node
+
+    def _directions(self, node, parent_node):
+        """
+        Get the pruned search directions of a node given the node it was reached from.
+
+        Args:
+            node (int): The flat index of the node.
+            parent_node (int): The flat index of its parent, None for the start.
+
+        Returns:
+            list: List of (d_row, d_col) directions.
+        """
+        if parent_node is None:
+            return [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+        blocked = self._blocked_view
+        stride = self.stride
+        row, col = divmod(node, stride)
+        parent_row, parent_col = divmod(parent_node, stride)
+        d_row = (row > parent_row) - (row < parent_row)
+        d_col = (col > parent_col) - (col < parent_col)
+        if d_row and d_col:
+            directions = [(d_row, 0), (0, d_col), (d_row, d_col)]
+            if blocked[node - d_row * stride]:
+                directions.append((-d_row, d_col))
+            if blocked[node - d_col]:
+                directions.append((d_row, -d_col))
+        elif d_row:
+            directions = [(d_row, 0)]
+            if blocked[node + 1]:
+                directions.append((d_row, 1))
+            if blocked[node - 1]:
+                directions.append((d_row, -1))
+        else:
+            directions = [(0, d_col)]
+            if blocked[node + stride]:
+                directions.append((1, d_col))
+            if blocked[node - stride]:
+                directions.append((-1, d_col))
+        return directions
+
+    def search(self, grid, src, dest, cancel=None):
+        """
+        Find the cheapest path from source to destination.
+
+        Args:
+            grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+            src (tuple): The source (row, col) cell.
+            dest (tuple): The destination (row, col) cell.
+            cancel (threading.Event): Optional event, checked every 256 expansions, that aborts the search when set.
+
+        Returns:
+            list: A list of (row, col) tuples from the cell after the source up to the destination,
+                  every cell between two jump points included, or an empty list if no path is found.
+        """
+        self._prepare(grid)
+        self.expanded = 0
+        stride = self.stride
+        start = (src[0] + 1) * stride + src[1] + 1
+        goal = (dest[0] + 1) * stride + dest[1] + 1
+        if start == goal:
+            return []
+
+        gen = self.generation
+        self._blocked_view = memoryview(self.blocked.reshape(-1))
+        g_score = memoryview(self.g_score)
+        parent = memoryview(self.parent)
+        seen = memoryview(self.seen)
+        closed = memoryview(self.closed)
+        goal_row, goal_col = divmod(goal, stride)
+        shift = self._blocked_view.nbytes.bit_length()
+        mask = (1 << shift) - 1
+        diagonal_bonus = SQRT2 - 2
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        seen[start] = gen
+        g_score[start] = 0.0
+        open_list = [start]
+        expanded = 0
+        found = False
+        while open_list:
+            current = heappop(open_list) & mask
+            if closed[current] == gen:
+                continue
+            closed[current] = gen
+            expanded += 1
+            if current == goal:
+                found = True
+                break
+            if cancel is not None and not expanded & 255 and cancel.is_set():
+                break
+            g_current = g_score[current]
+            row, col = divmod(current, stride)
+            for d_row, d_col in self._directions(current, None if current == start else parent[current]):
+                jump_point = self._jump(current, d_row, d_col, goal)
+                if jump_point is None or closed[jump_point] == gen:
+                    continue
+                jump_row, jump_col = divmod(jump_point, stride)
+                steps = max(abs(jump_row - row), abs(jump_col - col))
+                g_new = g_current + (SQRT2 * steps if d_row and d_col else steps)
+                if seen[jump_point] == gen and g_new >= g_score[jump_point]:
+                    continue
+                seen[jump_point] = gen
+                g_score[jump_point] = g_new
+                parent[jump_point] = current
+                d_goal_row = abs(jump_row - goal_row)
+                d_goal_col = abs(jump_col - goal_col)
+                h_new = d_goal_row + d_goal_col + diagonal_bonus * min(d_goal_row, d_goal_col)
+                heappush(open_list, (int((g_new + h_new) * KEY_SCALE) << shift) | jump_point)
+        self.expanded = expanded
+        self._blocked_view = None
+
+        if not found:
+            return []
+        path = []
+        node = goal
+        while node != start:
+            previous = parent[node]
+            row, col = divmod(node, stride)
+            previous_row, previous_col = divmod(previous, stride)
+            d_row = (previous_row > row) - (previous_row < row)
+            d_col = (previous_col > col) - (previous_col < col)
+            while (row, col) != (previous_row, previous_col):
+                path.append((row - 1, col - 1))
+                row, col = row + d_row, col + d_col
+            node = previous
+        return path[::-1]
+
+
+_engine = JumpPointEngine()
+
+
+def jps_search(grid, src, dest, quiet=False, engine=None, cancel=None):
+    """
+    Perform Jump Point Search from source to destination in the grid.
+
+    Takes the same arguments and returns the same path format as a_star_search, with paths of equal cost.
+
+    Args:
+        grid (np.array): 2D numpy array representing the grid.
+        src (tuple): A tuple representing the source coordinates.
+        dest (tuple): A tuple representing the destination coordinates.
+        quiet (bool): If True, nothing is printed.
+        engine (JumpPointEngine): The engine to search with, the shared module engine by default.
+        cancel (threading.Event): Optional event aborting the search when set.
+
+    Returns:
+        list: A list of tuples representing the path from source to destination.
+              Each tuple is a pair of (row, col) coordinates. If no path is found, returns an empty list.
+    """
+    ROW, COL = grid.shape
+    if not is_valid(src[0], src[1], ROW, COL) or not is_valid(dest[0], dest[1], ROW, COL):
+        if not quiet:
+            print("Source or destination is outside the grid")
+        return []
+    if grid[src[0]][src[1]] == 1:
+        if not quiet:
+            print("Source is blocked")
+        return []
+    if grid[dest[0]][dest[1]] == 1:
+        if not quiet:
+            print("Destination is blocked")
+        return []
+
+    engine = engine or _engine
+    path = engine.search(grid, src, dest, cancel)
+    if not quiet:
+        print(f"src: {src}, dest: {dest}, expanded: {engine.expanded}")
+        print("The destination cell is found" if path else "Failed to find the destination cell")
+    return path
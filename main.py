@@ -1,34 +1,63 @@
+import argparse
+import os
 import pygame as pg
+import assets
 from AMR import Amr
-from assets import LIGHT_GREY, WIN
+from profiler import PROFILER
+from planner_worker import BackgroundPlanner
+from sim_clock import SimClock, DT
+from telemetry import TelemetryRecorder, Replay
 
-# Set the window title
-pg.display.set_caption("AMR simulation")
-# Set the frames per second for the game loop
+# Set the maximum frames per second of the rendering loop
 FPS = 60
+# Ticks skipped by one seek key press in replay mode
+SEEK_TICKS = round(10 / DT)
 
-def draw_simulation(*objects):
+def draw_simulation(background, *objects, previous_rects=()):
     """
-    This function draws all the objects on the screen.
-    It first clears the screen, then calls the draw method on each object.
-    Finally, it updates the display to show the new frame.
+    This function draws a frame using dirty rectangles.
+    It restores the static background under everything drawn in the previous frame, calls the draw method on
+    each object and updates only the changed parts of the display. When the static background was re-rendered,
+    the whole display is redrawn and updated.
 
     Args:
-        *objects: A variable number of objects that have a draw method.
+        background: An object with a static_layer method returning the background surface and a changed flag.
+        *objects: A variable number of objects with a draw method returning the rectangles they drew on.
+        previous_rects (list): The rectangles returned by the previous call.
+
+    Returns:
+        list: The rectangles drawn on in this frame.
     """
-    # Fill the screen with a light grey color
-    WIN.fill(LIGHT_GREY)
+    layer, changed = background.static_layer()
+    # Restore the background, everywhere if it changed, otherwise only where the last frame drew
+    if changed:
+        assets.WIN.blit(layer, (0, 0))
+    else:
+        for rect in previous_rects:
+            assets.WIN.blit(layer, rect, rect)
     # Draw each object
+    rects = []
     for obj in objects:
-        obj.draw()
+        with PROFILER.phase("draw_" + type(obj).__name__.lower()):
+            rects += obj.draw()
+    rects += PROFILER.draw()
     # Update the display
-    pg.display.update()
+    if changed:
+        pg.display.update()
+    else:
+        pg.display.update(list(previous_rects) + rects)
+    return rects
 
-def handle_events():
+def handle_events(sim_clock=None, key_handler=None):
     """
     This function handles all the events from the pygame event queue.
     It returns a tuple containing a boolean indicating whether the game should continue running,
     and the positions of the mouse when the left button was pressed and released.
+    The [ and ] keys select a slower or faster time scale of the simulation clock.
+
+    Args:
+        sim_clock (SimClock): The simulation clock.
+        key_handler (callable): Function called with the key of every other key press.
 
     Returns:
         tuple: A tuple containing a boolean and two position tuples.
@@ -48,43 +77,211 @@ def handle_events():
             # If the left button was released, store the position
             else:
                 mouse_up = event.pos
+        # If [ or ] was pressed, change the time scale
+        elif event.type == pg.KEYDOWN and sim_clock and event.key in {pg.K_LEFTBRACKET, pg.K_RIGHTBRACKET}:
+            scale = sim_clock.change_scale(1 if event.key == pg.K_RIGHTBRACKET else -1)
+            print(f"time scale: {scale:g}x")
+        # Pass other key presses to the key handler
+        elif event.type == pg.KEYDOWN and key_handler:
+            key_handler(event.key)
     # Return True and the mouse positions
     return True, mouse_down, mouse_up
 
-def main():
+def main(profile=False, profile_csv=None, algorithm="a_star", time_scale=1.0, fps=FPS, map_path=None, record=None,
+         controller="stop_and_turn", lookahead=None):
     """
     This is the main function of the game.
     It initializes pygame, creates an instance of the Amr class, and enters the game loop.
     In the game loop, it handles events, updates the game state, and draws the new frame.
+    The game state is advanced in fixed physics steps, as many per frame as the elapsed time times the time
+    scale covers, so the robot speed does not depend on the frame rate.
     When the game loop ends, it quits pygame.
+
+    Args:
+        profile (bool): Show the per-phase frame time overlay.
+        profile_csv (str): Path of a CSV file the per-frame phase times are streamed to.
+        algorithm (str): The path search algorithm of the map.
+        time_scale (float): Simulated seconds per wall clock second.
+        fps (int): The maximum frame rate, 0 for no limit.
+        map_path (str): Path of a map file loaded at startup if it exists and saved on exit.
+        record (str): Path of a telemetry log every physics step and map event is recorded to.
+        controller (str): The path following controller of the AMR.
+        lookahead (float): The lookahead distance of the pure pursuit controller, the AMR default if None.
     """
-    # Initialize pygame
+    # Initialize pygame and open the window
     pg.init()
+    assets.init_display()
+    # Set the window title
+    pg.display.set_caption("AMR simulation")
     # Create a clock to control the frame rate
     clock = pg.time.Clock()
+    # Create the fixed-timestep simulation clock
+    sim_clock = SimClock(time_scale=time_scale)
     # Create an instance of the Amr class
     amr = Amr()
+    # Show contacts with obstacles
+    amr.check_collisions = True
+    # Select the path following controller
+    amr.controller = controller
+    if lookahead:
+        amr.lookahead = lookahead
+    # Plan paths in a worker thread so the frame loop never waits for the search
+    amr.map.planner = BackgroundPlanner()
+    amr.map.algorithm = algorithm
+    # Load the saved map
+    if map_path and os.path.exists(map_path):
+        amr.map.load(map_path)
+    # Record the run
+    if record:
+        TelemetryRecorder(record).attach(amr.map)
+    # Set up the profiler
+    if profile_csv:
+        PROFILER.open_csv(profile_csv)
+    if profile:
+        PROFILER.enabled = PROFILER.overlay = True
 
     # Set the run flag to True
     run = True
+    # Rectangles drawn on in the previous frame
+    rects = []
+    # Clicked destination not yet passed to a physics step
+    destination = None
     # Enter the game loop
     while run:
-        # Limit the frame rate
-        clock.tick(FPS)
+        # Limit the frame rate and get the number of physics steps for the elapsed time
+        steps = sim_clock.advance(clock.tick(fps) / 1000)
         # Handle events and get the mouse positions
-        run, mouse_down, mouse_up = handle_events()
-        # Get the state of all keys
-        keys = pg.key.get_pressed()
+        with PROFILER.phase("handle_events"):
+            run, mouse_down, mouse_up = handle_events(sim_clock)
+            # Get the state of all keys
+            keys = pg.key.get_pressed()
         # Handle the movement of the AMR
-        amr.handle_movement(keys, mouse_down)
+        with PROFILER.phase("handle_movement"):
+            destination = mouse_down or destination
+            for _ in range(steps):
+                amr.handle_movement(keys, destination)
+                destination = None
+                if record:
+                    amr.map.recorder.record_tick(amr)
         # Handle the obstacles on the map
-        amr.map.handle_obstacles(mouse_down, mouse_up)
+        with PROFILER.phase("handle_obstacles"):
+            amr.map.handle_obstacles(mouse_down, mouse_up)
         # Draw the new frame
-        draw_simulation(amr.map, amr.interface, amr)
+        rects = draw_simulation(amr.map, amr.map, amr.interface, amr, previous_rects=rects)
+        PROFILER.end_frame()
 
+    # Save the map
+    if map_path:
+        amr.map.save(map_path)
+    # Close the telemetry log
+    if record:
+        amr.map.recorder.close()
     # Quit pygame
+    amr.map.planner.shutdown()
+    PROFILER.close_csv()
     pg.quit()
 
+def replay(path, time_scale=1.0, fps=FPS):
+    """
+    This function shows a run recorded with --record without simulating it again.
+    The replay moves as many ticks per frame as the elapsed time times the time scale covers.
+    Space pauses, the right and left arrows seek ten seconds forward and back, Home goes back to the start
+    and [ and ] select a slower or faster time scale.
+
+    Args:
+        path (str): Path of the telemetry log.
+        time_scale (float): Replayed seconds per wall clock second.
+        fps (int): The maximum frame rate, 0 for no limit.
+    """
+    # Initialize pygame and open the window
+    pg.init()
+    assets.init_display()
+    pg.display.set_caption("AMR replay")
+    clock = pg.time.Clock()
+    sim_clock = SimClock(time_scale=time_scale)
+    # The AMR and its map only show the replayed state
+    amr = Amr()
+    log = Replay(path)
+    paused = False
+
+    def handle_key(key):
+        nonlocal paused
+        if key == pg.K_SPACE:
+            paused = not paused
+        elif key in {pg.K_RIGHT, pg.K_LEFT, pg.K_HOME}:
+            tick = 0 if key == pg.K_HOME else log.tick + (SEEK_TICKS if key == pg.K_RIGHT else -SEEK_TICKS)
+            print(f"replay: {log.seek(tick) * DT:.1f} s")
+
+    run = True
+    rects = []
+    while run:
+        steps = sim_clock.advance(clock.tick(fps) / 1000)
+        run, _, _ = handle_events(sim_clock, handle_key)
+        if not paused and not log.finished:
+            log.advance(steps)
+        log.apply_to(amr)
+        rects = draw_simulation(amr.map, amr.map, amr.interface, amr, previous_rects=rects)
+
+    log.close()
+    pg.quit()
+
+def parse_args():
+    """
+    This function parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="AMR simulation")
+    parser.add_argument("--headless", action="store_true", help="run without a window, as fast as possible")
+    parser.add_argument("--profile", action="store_true", help="show per-phase frame times on screen")
+    parser.add_argument("--profile-csv", metavar="FILE", help="stream per-frame phase times to a CSV file")
+    parser.add_argument("--algorithm", choices=["a_star", "jps", "hpa", "dstar", "field"], default="a_star",
+                        help="path search algorithm, jps is Jump Point Search, hpa is hierarchical search for large maps, "
+                             "dstar is incremental D* Lite search, field reads paths from a cost-to-go field of the target")
+    parser.add_argument("--controller", choices=["stop_and_turn", "pure_pursuit"], default="stop_and_turn",
+                        help="path following, stop_and_turn turns in place at every waypoint, "
+                             "pure_pursuit steers while driving")
+    parser.add_argument("--lookahead", type=float, help="lookahead distance of pure_pursuit in pixels")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="simulated seconds per wall clock second, change it with [ and ] while running")
+    parser.add_argument("--fps", type=int, default=FPS, help="maximum frame rate, 0 for no limit")
+    parser.add_argument("--map", metavar="FILE", help="map file loaded at startup if it exists and saved on exit")
+    parser.add_argument("--record", metavar="FILE", help="record every physics step and map event to a telemetry log")
+    parser.add_argument("--replay", metavar="FILE", help="show a run recorded with --record instead of simulating")
+    parser.add_argument("--ticks", type=int, default=10000, help="maximum number of headless ticks")
+    parser.add_argument("--target", type=int, nargs=2, metavar=("X", "Y"), help="headless target position")
+    parser.add_argument("--obstacle", type=int, nargs=4, action="append", default=[], metavar=("X0", "Y0", "X1", "Y1"),
+                        help="headless rectangular obstacle, can be repeated")
+    parser.add_argument("--polygon", type=int, nargs="+", action="append", default=[], metavar="X Y",
+                        help="headless convex polygon obstacle given by its corners in order, can be repeated")
+    parser.add_argument("--script", help="JSON file with headless [tick, action, value] entries")
+    args = parser.parse_args()
+    for polygon in args.polygon:
+        if len(polygon) < 6 or len(polygon) % 2:
+            parser.error("--polygon needs the X Y coordinates of at least three corners")
+    return args
+
 # If this file is the main module, run the main function
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.headless:
+        from headless import load_script, run_headless
+        script = [(0, "algorithm", args.algorithm), (0, "controller", args.controller)]
+        if args.lookahead:
+            script.append((0, "lookahead", args.lookahead))
+        if args.map and os.path.exists(args.map):
+            script.append((0, "load", args.map))
+        script += load_script(args.script) if args.script else []
+        script += [(0, "obstacle", obstacle) for obstacle in args.obstacle]
+        script += [(0, "polygon", polygon) for polygon in args.polygon]
+        if args.target:
+            script.append((0, "target", args.target))
+        sim = run_headless(args.ticks, script, record=args.record)
+        if args.map:
+            sim.map.save(args.map)
+    elif args.replay:
+        replay(args.replay, args.time_scale, args.fps)
+    else:
+        main(args.profile, args.profile_csv, args.algorithm, args.time_scale, args.fps, args.map, args.record,
+             args.controller, args.lookahead)
\ No newline at end of file
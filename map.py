@@ -1,8 +1,20 @@
 import pygame as pg
 import numpy as np
-from time import time
-from assets import WIDTH, HEIGHT, WIN, BLACK, INTERFACE_HEIGHT, INTERFACE_WIDTH, FONT, GREEN, RED, DARK_GREY, ALARM_YELLOW
+import assets
+from assets import WIDTH, HEIGHT, LIGHT_GREY, BLACK, INTERFACE_HEIGHT, INTERFACE_WIDTH, GREEN, RED, DARK_GREY, ALARM_YELLOW
 from a_star import a_star_search
+from hpa_star import HpaPlanner
+from jps import jps_search
+from dstar_lite import DStarLite
+from cost_field import CostFieldCache
+from path_smoothing import simplify_path, line_of_sight
+from planner_worker import SEARCHES
+from path_cache import PathCache
+from spatial_index import ObstacleIndex
+from profiler import PROFILER
+from map_file import save_map, load_map
+from clearance import ClearanceField
+from occupancy import CELL_SIZE, rasterize_obstacles, downsize_grid, mark_obstacle, inflate_polygon
 
 def draw_large_grid_path(large_grid_path):
     """
@@ -10,10 +22,15 @@ def draw_large_grid_path(large_grid_path):
 
     Args:
         large_grid_path (list): List of points representing the path.
+
+    Returns:
+        list: The rectangles drawn on.
     """
+    rects = []
     for point in large_grid_path:
-        pg.draw.line(WIN, (0, 0, 255), (point[0] - 5, point[1] - 5), (point[0] + 5, point[1] + 5), 2)
-        pg.draw.line(WIN, (0, 0, 255), (point[0] + 5, point[1] - 5), (point[0] - 5, point[1] + 5), 2)
+        rect = pg.draw.line(assets.WIN, (0, 0, 255), (point[0] - 5, point[1] - 5), (point[0] + 5, point[1] + 5), 2)
+        rects.append(rect.union(pg.draw.line(assets.WIN, (0, 0, 255), (point[0] + 5, point[1] - 5), (point[0] - 5, point[1] + 5), 2)))
+    return rects
 
 def map_path_to_large_grid(path):
     """
@@ -36,39 +53,78 @@ class Map:
         width (int): The width of the map.
         height (int): The height of the map.
         obstacles (list): List of obstacles on the map.
+        obstacle_index (ObstacleIndex): Spatial index of the obstacle bounding boxes used for hit-testing.
         target (tuple): The target position on the map.
         start (tuple): The start position of the obstacle.
         end (tuple): The end position of the obstacle.
         downsized_grid (np.array): The downsized grid.
         danger_map (np.array): The danger map.
+        grid_version (int): Counter increased every time the obstacles, and therefore the grids, change.
+        grid_valid (bool): Flag telling whether the grids match the current obstacles.
+        path_cache (PathCache): Cache of grid paths keyed by grid version, start and goal cell.
+        planner (BackgroundPlanner): Worker pool paths are planned in, None to plan synchronously.
+        algorithm (str): The path search algorithm, "a_star", "jps" for Jump Point Search, "hpa" for hierarchical
+            search, "dstar" for incremental D* Lite search or "field" for descent over a cost-to-go field of the goal.
+        hpa (HpaPlanner): The abstract graph used by the "hpa" algorithm, None until it is first needed.
+        dstar (DStarLite): The search state of the "dstar" algorithm for the last goal, None until it is first needed.
+        cost_fields (CostFieldCache): Cost-to-go fields of the "field" algorithm keyed by grid version and goal cell,
+            shared by every start cell planning to the same goal.
+        simplify_paths (bool): Flag to keep only the corner waypoints of planned paths.
+        clearance (ClearanceField): Distance from every pixel to the nearest obstacle, None until it is first needed.
+        clearance_range (float): The largest distance stored in the clearance field, raise it before the field
+            is built to query robots larger than the AMR.
+        recorder (TelemetryRecorder): Log the target, obstacle and plan events are recorded to, None to record nothing.
         enable_map (bool): Flag to enable the map.
         enable_input (bool): Flag to enable input.
         enable_pathfinding (bool): Flag to enable pathfinding.
         enable_targeting (bool): Flag to enable targeting.
         button_radius (int): The radius of the button.
         buttons (list): List of buttons.
-        font (pg.font): The font used for the buttons.
+        buttons_area (tuple): Bounding box (x_min, y_min, x_max, y_max) of all buttons.
+        font (pg.font): The font used for the buttons, None in headless mode.
+        verbose (bool): Flag to print targeting and pathfinding output, off in headless mode.
     """
-    def __init__(self, amr):
+    def __init__(self, amr, width=WIDTH, height=HEIGHT):
         """
         Initialize the Map object.
 
         Args:
             amr (Amr): The AMR object.
+            width (int): The width of the map, the window width by default.
+            height (int): The height of the map, the window height by default.
         """
         self.amr = amr
-        self.width = WIDTH
-        self.height = HEIGHT
+        self.width = width
+        self.height = height
         self.obstacles = self._init_obstacles()
+        self.obstacle_index = ObstacleIndex(amr.half_diag)
+        self.obstacle_index.extend(self.obstacles)
         self.target = None
         self.start = self.end = None
-        self.downsized_grid = np.zeros((self.width // 10, self.height // 10))
-        self.danger_map = np.zeros((self.width, self.height))
+        self.downsized_grid = np.zeros((self.width // CELL_SIZE, self.height // CELL_SIZE), dtype=np.uint8)
+        self.danger_map = np.zeros((self.width, self.height), dtype=np.uint8)
+        self.grid_version = 0
+        self.grid_valid = False
+        self.path_cache = PathCache()
+        self.planner = None
+        self.algorithm = "a_star"
+        self.simplify_paths = True
+        self.hpa = None
+        self.dstar = None
+        self.cost_fields = CostFieldCache()
+        self.clearance = None
+        self.clearance_range = amr.half_diag + CELL_SIZE
+        self.recorder = None
         self.enable_map = True
         self.enable_input = self.enable_pathfinding = self.enable_targeting = False
         self.button_radius = INTERFACE_HEIGHT // 2 - 10
         self.buttons = self._init_buttons()
-        self.font = pg.font.SysFont(FONT, 14)
+        self.buttons_area = (min(b[0] for b in self.buttons) - self.button_radius, min(b[1] for b in self.buttons) - self.button_radius,
+                             max(b[0] for b in self.buttons) + self.button_radius, max(b[1] for b in self.buttons) + self.button_radius)
+        self.font = None if amr.headless else assets.get_font(14)
+        self.verbose = not amr.headless
+        self._static_surface = None
+        self._static_key = None
 
     def _init_obstacles(self):
         """
@@ -77,10 +133,11 @@ class Map:
         Returns:
             list: List of obstacles.
         """
-        return [((0, 0), (0, 5), (WIDTH, 5), (WIDTH, 0)),
-                ((0, 0), (0, HEIGHT), (5, HEIGHT), (5, 0)),
-                ((0, HEIGHT - 5), (0, HEIGHT), (WIDTH, HEIGHT), (WIDTH, HEIGHT - 5)),
-                ((WIDTH - 5, 0), (WIDTH, 0), (WIDTH, HEIGHT), (WIDTH - 5, HEIGHT))]
+        width, height = self.width, self.height
+        return [((0, 0), (0, 5), (width, 5), (width, 0)),
+                ((0, 0), (0, height), (5, height), (5, 0)),
+                ((0, height - 5), (0, height), (width, height), (width, height - 5)),
+                ((width - 5, 0), (width, 0), (width, height), (width - 5, height))]
 
     def _init_buttons(self):
         """
@@ -107,12 +164,216 @@ class Map:
             self.start = mouse_down
         elif mouse_up and not self.is_on_button(mouse_up):
             self.end = mouse_up
-            self.obstacles.append((self.start, (self.start[0], self.end[1]), self.end, (self.end[0], self.start[1])))
+            self.add_obstacle((self.start, (self.start[0], self.end[1]), self.end, (self.end[0], self.start[1])))
             self.start = self.end = None
             if self.target and self.is_danger_zone(self.target):
-                self.target = None
+                self.set_target(None)
                 print("Target reset because it was in danger zone.")
 
+    def add_obstacle(self, obstacle):
+        """
+        Add an obstacle to the map.
+
+        Obstacles are convex polygons with their corners in order. Their danger zone is the polygon grown by
+        the square around the AMR body, see occupancy.inflate_polygon.
+
+        If the grids are up to date, only the padded bounding box of the new obstacle is written into them,
+        only the clusters of the hierarchical graph covering it are rebuilt and only the changed cells are
+        passed to the incremental planner. If the new obstacle cuts the path the AMR is following, a new path
+        is planned from its current position.
+
+        Args:
+            obstacle (tuple): The corner points of the convex obstacle.
+        """
+        self.obstacles.append(obstacle)
+        self.obstacle_index.add(obstacle)
+        if self.recorder:
+            self.recorder.obstacle_added(obstacle)
+        changed = None
+        if self.grid_valid:
+            changed = mark_obstacle(self.danger_map, self.downsized_grid, obstacle, self.amr.half_diag)
+            if changed and self.hpa:
+                self.hpa.update_region(*changed)
+            if changed and self.dstar:
+                self.dstar.update_region(self.downsized_grid, *changed)
+        if self.clearance:
+            self.clearance.add_obstacle(obstacle)
+        self.grid_version += 1
+        if changed and self.amr.plan_trajectory and self.target and self.is_path_cut(changed):
+            self.replan()
+
+    def is_path_cut(self, region):
+        """
+        Check if the remaining path of the AMR crosses a blocked cell of a changed region of the downsized grid.
+
+        Args:
+            region (tuple): The changed (col_slice, row_slice) of the downsized grid.
+
+        Returns:
+            bool: True if the path is cut, False otherwise.
+        """
+        changed = np.zeros_like(self.downsized_grid)
+        changed[region] = self.downsized_grid[region]
+        waypoints = [(self.amr.x, self.amr.y)] + ([self.amr.target] if self.amr.target else []) + list(self.amr.buffer)
+        cells = [(int(x // CELL_SIZE), int(y // CELL_SIZE)) for x, y in waypoints]
+        return not all(line_of_sight(changed, a, b) for a, b in zip(cells, cells[1:]))
+
+    def replan(self):
+        """
+        Stop the AMR and plan a new path from its current position to the target.
+        """
+        if self.verbose:
+            print("Path blocked by a new obstacle, replanning.")
+        self.amr.target = None
+        self.amr.buffer = []
+        self.amr.plan_trajectory = False
+        self.find_path()
+
+    def reset_obstacles(self):
+        """
+        Reset the obstacles to the map borders and invalidate the grids.
+        """
+        self.set_obstacles(self._init_obstacles())
+
+    def set_obstacles(self, obstacles):
+        """
+        Replace all obstacles and invalidate the grids.
+
+        Args:
+            obstacles (list): The new obstacles, the map borders included.
+        """
+        self.obstacles = list(obstacles)
+        self.obstacle_index.clear()
+        self.obstacle_index.extend(self.obstacles)
+        self.invalidate_grid()
+        if self.recorder:
+            self.recorder.obstacles_set(self.obstacles)
+
+    def set_target(self, target):
+        """
+        Set the target, or clear it with None, cancelling the background search for the previous one.
+
+        Args:
+            target (tuple): The target position, or None.
+        """
+        self.cancel_planning()
+        self.target = target
+        if self.recorder:
+            self.recorder.target_set(target)
+
+    def save(self, path):
+        """
+        Save the obstacles, the grids and the hierarchical graph to a binary map file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        save_map(self, path)
+        if self.verbose:
+            print(f"Map saved to {path}.")
+
+    def load(self, path, mmap=True):
+        """
+        Load a map file saved with save, stopping the AMR and clearing the target.
+
+        The grids are memory-mapped from the file when it matches the obstacles and the AMR, so they do not
+        have to be rebuilt. The hierarchical graph is unpacked on its first search.
+
+        Args:
+            path (str): The path of the file.
+            mmap (bool): Flag to memory-map the grids instead of reading them.
+
+        Returns:
+            bool: True if the saved grids were used, False if they will be rebuilt.
+        """
+        self.set_target(None)
+        self.amr.target = None
+        self.amr.buffer = []
+        self.amr.plan_trajectory = False
+        reused = load_map(self, path, mmap)
+        if self.verbose:
+            print(f"Map loaded from {path}" + ("." if reused else ", rebuilding the grids."))
+        return reused
+
+    def invalidate_grid(self):
+        """
+        Mark the grids as outdated, so they are rebuilt on the next update_grid call.
+        """
+        self.grid_valid = False
+        self.grid_version += 1
+        self.hpa = self.dstar = self.clearance = None
+
+    def update_grid(self):
+        """
+        Rebuild the grids if they were invalidated. Incremental obstacle additions keep them valid.
+        """
+        if not self.grid_valid:
+            self.put_obstacle_on_grid()
+            self.grid_valid = True
+
+    def update_clearance(self):
+        """
+        Build the clearance field if it was invalidated. Incremental obstacle additions keep it valid.
+
+        Returns:
+            ClearanceField: The clearance field.
+        """
+        if self.clearance is None:
+            self.clearance = ClearanceField(self.obstacles, self.width, self.height, self.clearance_range)
+        return self.clearance
+
+    def clearances(self, points):
+        """
+        Get the distance from many positions to the nearest obstacle at once, up to clearance_range.
+
+        Args:
+            points (np.array): (n, 2) array of positions.
+
+        Returns:
+            np.array: The distances in pixels.
+        """
+        return self.update_clearance().clearances(points)
+
+    def are_clear(self, points, padding):
+        """
+        Check many positions against the danger zones of a robot of any size up to clearance_range.
+
+        Unlike are_danger_zones, the zones have round corners: a position is clear when it is farther than
+        padding from every obstacle.
+
+        Args:
+            points (np.array): (n, 2) array of positions.
+            padding (float): The padding of the robot.
+
+        Returns:
+            np.array: Boolean array, True for the clear positions.
+        """
+        return self.clearances(points) > padding
+
+    def path_clearance(self, waypoints):
+        """
+        Get the smallest distance to an obstacle along a path, e.g. a candidate path before following it.
+
+        Args:
+            waypoints (list): The positions of the path in order.
+
+        Returns:
+            float: The smallest distance in pixels, at most clearance_range.
+        """
+        return self.update_clearance().path_clearance(waypoints)
+
+    def collides(self, corners):
+        """
+        Check if a robot footprint touches an obstacle.
+
+        Args:
+            corners (list): The corner points of the footprint in order.
+
+        Returns:
+            bool: True if the footprint touches an obstacle, False otherwise.
+        """
+        return self.update_clearance().collides(corners)
+
     def is_on_button(self, mouse_pos):
         """
         Check if the mouse is on a button.
@@ -123,7 +384,25 @@ class Map:
         Returns:
             bool: True if the mouse is on a button, False otherwise.
         """
-        return any(self._is_on_button(mouse_pos, button) for button in self.buttons)
+        return self.button_at(mouse_pos) is not None
+
+    def button_at(self, mouse_pos):
+        """
+        Get the button under the mouse. Positions outside the button row are rejected with a single box test.
+
+        Args:
+            mouse_pos (tuple): The position of the mouse.
+
+        Returns:
+            int: The index of the button, or None if the mouse is not on a button.
+        """
+        x_min, y_min, x_max, y_max = self.buttons_area
+        if not (x_min <= mouse_pos[0] <= x_max and y_min <= mouse_pos[1] <= y_max):
+            return None
+        for i, button in enumerate(self.buttons):
+            if self._is_on_button(mouse_pos, button):
+                return i
+        return None
 
     def _is_on_button(self, mouse_pos, button):
         """
@@ -142,19 +421,13 @@ class Map:
     def put_obstacle_on_grid(self):
         """
         Put the obstacle on the grid.
+
+        The danger zone of every obstacle is written into the danger map, with array slicing for axis-aligned
+        rectangles and a scanline fill for other convex polygons, then the danger map is block-reduced into
+        the downsized grid.
         """
-        last = None
-        for col in range(self.width):
-            for row in range(self.height):
-                if self.is_danger_zone((col, row)):
-                    self.danger_map[col][row] = 1
-                prog = int((col * self.height + row)/(self.width*self.height)*100)
-                print(prog, "%") if last != prog else None
-                last = prog
-        print("100 %")
-        for col in range(self.width // 10):
-            for row in range(self.height // 10):
-                self.downsized_grid[col][row] = 1 if 1 in self.danger_map[col * 10: (col + 1) * 10, row * 10: (row + 1) * 10] else 0
+        rasterize_obstacles(self.obstacles, self.width, self.height, self.amr.half_diag, out=self.danger_map)
+        downsize_grid(self.danger_map, out=self.downsized_grid)
 
     def is_obstacle(self, pos):
         """
@@ -166,22 +439,7 @@ class Map:
         Returns:
             bool: True if the position is an obstacle, False otherwise.
         """
-        return any(self._is_in_range(pos, obstacle) for obstacle in self.obstacles)
-
-    def _is_in_range(self, pos, obstacle):
-        """
-        Check if a position is in the range of an obstacle.
-
-        Args:
-            pos (tuple): The position to check.
-            obstacle (tuple): The obstacle to check against.
-
-        Returns:
-            bool: True if the position is in the range of the obstacle, False otherwise.
-        """
-        x_range = sorted({point[0] for point in obstacle})
-        y_range = sorted({point[1] for point in obstacle})
-        return x_range[0] <= pos[0] <= x_range[1] and y_range[0] <= pos[1] <= y_range[1]
+        return self.obstacle_index.contains(pos)
 
     def is_danger_zone(self, pos):
         """
@@ -193,24 +451,19 @@ class Map:
         Returns:
             bool: True if the position is in the danger zone, False otherwise.
         """
-        return any(self._is_in_danger_zone(pos, obstacle) for obstacle in self.obstacles)
+        return self.obstacle_index.contains(pos, self.amr.half_diag)
 
-    def _is_in_danger_zone(self, pos, obstacle):
+    def are_danger_zones(self, points):
         """
-        Check if a position is in the danger zone of an obstacle.
+        Check many positions against the danger zones at once.
 
         Args:
-            pos (tuple): The position to check.
-            obstacle (tuple): The obstacle to check against.
+            points (np.array): (n, 2) array of positions.
 
         Returns:
-            bool: True if the position is in the danger zone of the obstacle, False otherwise.
+            np.array: Boolean array, True for the positions in a danger zone.
         """
-        x_range = sorted({point[0] for point in obstacle})
-        y_range = sorted({point[1] for point in obstacle})
-        padding = self.amr.half_diag
-        return (x_range[0] - padding) <= pos[0] <= (x_range[1] + padding) and \
-               (y_range[0] - padding) <= pos[1] <= (y_range[1] + padding)
+        return self.obstacle_index.contains_many(points, self.amr.half_diag)
 
     def button_handler(self, mouse_pos):
         """
@@ -219,35 +472,40 @@ class Map:
         Args:
             mouse_pos (tuple): The position of the mouse.
         """
-        if mouse_pos:
-            for i, button in enumerate(self.buttons):
-                if self._is_on_button(mouse_pos, button):
-                    if i == 0:
-                        self.enable_input = not self.enable_input
-                    elif i == 1 and not self.enable_input:
-                        self.enable_pathfinding = not self.enable_pathfinding
-                    elif i == 2 and not self.enable_input:
-                        self.enable_targeting = not self.enable_targeting
-                    elif i == 3 and not self.enable_input:
-                        self.obstacles = self._init_obstacles()
-                        self.target = None
-                        self.amr.buffer = []
-
-    def draw_buttons(self):
+        i = self.button_at(mouse_pos) if mouse_pos else None
+        if i == 0:
+            self.enable_input = not self.enable_input
+        elif i == 1 and not self.enable_input:
+            self.enable_pathfinding = not self.enable_pathfinding
+        elif i == 2 and not self.enable_input:
+            self.enable_targeting = not self.enable_targeting
+        elif i == 3 and not self.enable_input:
+            self.reset_obstacles()
+            self.set_target(None)
+            self.amr.buffer = []
+            self.amr.plan_trajectory = False
+
+    def draw_buttons(self, surface):
         """
         Draw the buttons on the map.
+
+        Args:
+            surface (pg.Surface): The surface to draw on.
         """
         for button, text, enabled in zip(self.buttons, ["obstacles", "find path", "targeting", "   reset"], [self.enable_input, self.enable_pathfinding, self.enable_targeting, None]):
-            pg.draw.circle(WIN, BLACK, (button[0], button[1]), self.button_radius + 2)
-            pg.draw.circle(WIN, RED if enabled else GREEN, (button[0], button[1]), self.button_radius)
-            WIN.blit(self.font.render(text, 1, BLACK), (button[0] - self.button_radius + 5, button[1] - 8))
+            pg.draw.circle(surface, BLACK, (button[0], button[1]), self.button_radius + 2)
+            pg.draw.circle(surface, RED if enabled else GREEN, (button[0], button[1]), self.button_radius)
+            surface.blit(self.font.render(text, 1, BLACK), (button[0] - self.button_radius + 5, button[1] - 8))
 
-    def draw_obstacles(self):
+    def draw_obstacles(self, surface):
         """
         Draw the obstacles on the map.
+
+        Args:
+            surface (pg.Surface): The surface to draw on.
         """
         for obstacle in self.obstacles:
-            pg.draw.polygon(WIN, DARK_GREY, obstacle)
+            pg.draw.polygon(surface, DARK_GREY, obstacle)
 
     def handle_obstacles(self, mouse_down, mouse_up=None):
         """
@@ -257,52 +515,242 @@ class Map:
             mouse_down (tuple): The position of the mouse when the button is pressed.
             mouse_up (tuple): The position of the mouse when the button is released.
         """
+        self.poll_planning()
         if self.enable_map:
             self.button_handler(mouse_down)
             if self.enable_targeting and mouse_down and not self.is_on_button(mouse_down) and not self.is_danger_zone(mouse_down):
-                self.target = mouse_down
+                self.set_target(mouse_down)
                 print(f"target set: {mouse_down}")
                 self.enable_targeting = False if self.target else True
             elif self.enable_input:
                 self.input_obstacles(mouse_down, mouse_up)
             elif self.enable_pathfinding and self.target:
-                start = time()
-                self.put_obstacle_on_grid()
-                print(f"mapping: {time() - start} s")
-                start_node = (int(self.amr.x // 10), int(self.amr.y // 10))
-                start = time()
-                path = a_star_search(self.downsized_grid, start_node, (int(self.target[0] // 10), int(self.target[1] // 10)))  # Swap x and y
-                self.amr.buffer = map_path_to_large_grid(path)
-                self.amr.target = self.amr.buffer.pop(0)
-                print(f"pathfinding a*: {time() - start} s")
-                print(self.amr.buffer)
+                self.find_path()
                 self.enable_pathfinding = False
 
-    def draw_danger_zones(self):
+    def find_path(self):
+        """
+        Plan a path from the AMR position to the target and load it into the AMR buffer.
+
+        With a background planner, a path that is not cached is searched in a worker while the AMR keeps
+        following its current buffer, and poll_planning loads it once it is found. Hierarchical, D* Lite and
+        cost field queries are answered at once, they rely on search state kept on the map.
+
+        Returns:
+            bool: True if a path was loaded, False if none was found or the search is still running.
+        """
+        if self.planner is None or self.algorithm not in SEARCHES:
+            return self.load_path(self.plan_path((self.amr.x, self.amr.y), self.target))
+        with PROFILER.phase("grid_build"):
+            self.update_grid()
+        start_node, goal_node = self._grid_nodes((self.amr.x, self.amr.y), self.target)
+        path = self.path_cache.get(self.path_version(), start_node, goal_node)
+        if path is not None:
+            self.planner.cancel()
+            return self.load_path(self.to_waypoints(start_node, path))
+        self.planner.submit(self.downsized_grid, self.path_version(), start_node, goal_node, self.target,
+                            self.algorithm)
+        return False
+
+    def poll_planning(self):
+        """
+        Load the result of the background search once it is finished.
+
+        A result planned for another target is dropped. A result planned on outdated obstacles is dropped
+        and the search is submitted again. The AMR kept moving during the search, so the path is re-anchored
+        at its current cell with rejoin_path before it is loaded. The time the worker searched is added to
+        the "a_star" phase of the profiler in the frame the result is collected.
+        """
+        handle = self.planner.poll() if self.planner else None
+        if handle is None or handle.target != self.target:
+            return
+        path = handle.result()
+        if path is None:
+            return
+        PROFILER.add("a_star", handle.search_time)
+        if handle.version != self.path_version():
+            self.find_path()
+            return
+        self.path_cache.put(handle.version, handle.start, handle.goal, path)
+        start_node = self._grid_nodes((self.amr.x, self.amr.y), self.target)[0]
+        rejoined = self.rejoin_path(start_node, handle.start, path)
+        if rejoined is None:
+            self.find_path()
+            return
+        self.load_path(self.to_waypoints(start_node, rejoined))
+
+    def rejoin_path(self, node, start_node, path):
+        """
+        Re-anchor a grid path planned from start_node at another cell, the cell the AMR has moved to since.
+
+        The AMR rejoins the path at the path cell closest to its cell, and the cells before it, which it
+        has passed or cut, are dropped. The segment to the rejoining cell has to be free.
+
+        Args:
+            node (tuple): The current cell of the AMR.
+            start_node (tuple): The cell the path was planned from.
+            path (list): List of cells after start_node up to the goal.
+
+        Returns:
+            list: List of cells after node up to the goal, or None if the path cannot be rejoined in a straight line.
+        """
+        if node == start_node or not path:
+            return path
+        # Chebyshev distance to every path cell, the last of equally close cells is the farthest along
+        distances = np.abs(np.array(path) - node).max(axis=1)
+        index = len(path) - 1 - int(np.argmin(distances[::-1]))
+        if tuple(path[index]) == node:
+            return path[index + 1:] or path[index:]
+        if not line_of_sight(self.downsized_grid, node, path[index]):
+            return None
+        return path[index:]
+
+    def cancel_planning(self):
+        """
+        Cancel the background search, if any, because its target is no longer wanted.
+        """
+        if self.planner:
+            self.planner.cancel()
+
+    def load_path(self, waypoints):
+        """
+        Swap a planned path into the AMR, replacing its target and buffer at once.
+
+        Args:
+            waypoints (list): List of waypoints in pixels.
+
+        Returns:
+            bool: True if the path is not empty, False otherwise.
+        """
+        found = bool(waypoints)
+        if self.recorder:
+            self.recorder.plan_computed(waypoints)
+        if found:
+            self.amr.target, self.amr.buffer = waypoints[0], waypoints[1:]
+            self.amr.plan_trajectory = True
+        else:
+            self.amr.buffer = []
+        if self.verbose:
+            print(self.amr.buffer)
+        return found
+
+    def plan_path(self, start_pos, goal_pos):
+        """
+        Plan a path between two positions on the map.
+
+        Args:
+            start_pos (tuple): The start position in pixels.
+            goal_pos (tuple): The goal position in pixels.
+
+        Returns:
+            list: List of waypoints in pixels, empty if no path is found.
+        """
+        with PROFILER.phase("grid_build"):
+            self.update_grid()
+            if self.algorithm == "hpa" and self.hpa is None:
+                self.hpa = HpaPlanner(self.downsized_grid)
+        start_node, goal_node = self._grid_nodes(start_pos, goal_pos)
+        with PROFILER.phase("a_star"):
+            path = self.path_cache.lookup(self.path_version(), start_node, goal_node, self.search_cells)
+        return self.to_waypoints(start_node, path)
+
+    def to_waypoints(self, start_node, path):
+        """
+        Convert a grid path to waypoints in pixels, keeping only its corners if simplify_paths is set.
+
+        Args:
+            start_node (tuple): The cell the path starts from.
+            path (list): List of cells after the start up to the goal.
+
+        Returns:
+            list: List of waypoints in pixels.
+        """
+        if self.simplify_paths:
+            path = simplify_path(self.downsized_grid, start_node, path)
+        return map_path_to_large_grid(path)
+
+    def search_cells(self, src, dest):
+        """
+        Search a path on the downsized grid with the selected algorithm.
+
+        Args:
+            src (tuple): The source cell.
+            dest (tuple): The destination cell.
+
+        Returns:
+            list: List of cells after the source up to the destination, empty if no path is found.
+        """
+        if self.algorithm == "hpa":
+            return self.hpa.search(src, dest)
+        if self.algorithm == "jps":
+            return jps_search(self.downsized_grid, src, dest, quiet=True)
+        if self.algorithm == "dstar":
+            if self.dstar is None or self.dstar.goal_cell != tuple(dest):
+                self.dstar = DStarLite(self.downsized_grid, dest)
+            return self.dstar.search_from(src)
+        if self.algorithm == "field":
+            return self.cost_fields.lookup(self.grid_version, self.downsized_grid, dest).path_from(src)
+        return a_star_search(self.downsized_grid, src, dest, quiet=True)
+
+    def path_version(self):
+        """
+        Get the version cached paths are stored under. It changes with the obstacles and the algorithm.
+        """
+        return self.grid_version, self.algorithm
+
+    def _grid_nodes(self, start_pos, goal_pos):
+        """
+        Convert a start and goal position in pixels to downsized grid cells.
+        """
+        return (int(start_pos[0] // CELL_SIZE), int(start_pos[1] // CELL_SIZE)), \
+               (int(goal_pos[0] // CELL_SIZE), int(goal_pos[1] // CELL_SIZE))
+
+    def draw_danger_zones(self, surface):
         """
         Draw the danger zones on the map.
+
+        Args:
+            surface (pg.Surface): The surface to draw on.
         """
-        h_d = self.amr.half_diag
         for obstacle in self.obstacles:
-            x = []
-            y = []
-            for point in obstacle:
-                x.append(point[0])
-                y.append(point[1])
-            zone = ((min(x)-h_d, min(y)-h_d), (min(x)-h_d, max(y)+h_d), (max(x)+h_d, max(y)+h_d), (max(x)+h_d, min(y)-h_d))
-            pg.draw.polygon(WIN, ALARM_YELLOW, zone)
+            pg.draw.polygon(surface, ALARM_YELLOW, inflate_polygon(obstacle, self.amr.half_diag))
+
+    def static_layer(self):
+        """
+        Get the off-screen surface with the background, danger zones, obstacles and buttons.
+
+        The layer is only re-rendered when the obstacles or the button states changed since the last call.
+
+        Returns:
+            tuple: The surface and a flag telling whether it was re-rendered.
+        """
+        key = (self.grid_version, self.enable_map, self.enable_input, self.enable_pathfinding, self.enable_targeting)
+        if key == self._static_key:
+            return self._static_surface, False
+        if self._static_surface is None:
+            self._static_surface = pg.Surface((self.width, self.height)).convert()
+        self._static_surface.fill(LIGHT_GREY)
+        if self.enable_map:
+            self.draw_danger_zones(self._static_surface)
+            self.draw_obstacles(self._static_surface)
+            self.draw_buttons(self._static_surface)
+        self._static_key = key
+        return self._static_surface, True
 
     def draw(self):
         """
-        Draw the map.
+        Draw the dynamic parts of the map, the target cursor and the path markers.
+        The static parts are drawn through static_layer.
+
+        Returns:
+            list: The rectangles drawn on.
         """
+        rects = []
         if self.enable_map:
-            self.draw_danger_zones()
-            self.draw_obstacles()
-            self.draw_buttons()
             if self.enable_targeting or self.target:
                 mouse_pos = pg.mouse.get_pos() if self.enable_targeting else self.target
-                pg.draw.line(WIN, RED, (mouse_pos[0] - 10, mouse_pos[1] - 10), (mouse_pos[0] + 10, mouse_pos[1] + 10), 2)
-                pg.draw.line(WIN, RED, (mouse_pos[0] + 10, mouse_pos[1] - 10), (mouse_pos[0] - 10, mouse_pos[1] + 10), 2)
+                rects.append(pg.draw.line(assets.WIN, RED, (mouse_pos[0] - 10, mouse_pos[1] - 10), (mouse_pos[0] + 10, mouse_pos[1] + 10), 2))
+                rects.append(pg.draw.line(assets.WIN, RED, (mouse_pos[0] + 10, mouse_pos[1] - 10), (mouse_pos[0] - 10, mouse_pos[1] + 10), 2))
             if self.amr.buffer:
-                draw_large_grid_path(self.amr.buffer)
\ No newline at end of file
+                rects += draw_large_grid_path(self.amr.buffer)
+        return rects
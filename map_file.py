@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+from occupancy import CELL_SIZE
+from hpa_star import HpaPlanner
+
+# File layout: a header, a table of sections and the section data, every section aligned to ALIGNMENT bytes.
+#   header:  magic (8s), format version (H), number of sections (H), reserved (I)
+#   section: name (8s), dtype (8s), offset (Q), size in bytes (Q), number of dimensions (B), shape (4Q)
+MAGIC = b"AMRMAP\x00\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# Version of the saved hierarchical graph, older graphs lack the diagonal transitions and are rebuilt
+HPA_GRAPH_VERSION = 2
+# Sections memory-mapped by load_map, the grids, which make up nearly all of the file
+MAPPED_SECTIONS = ('danger', 'grid')
+_HEADER = struct.Struct("<8sHHI")
+_SECTION = struct.Struct("<8s8sQQB7x4Q")
+
+
+def obstacle_arrays(obstacles):
+    """
+    Pack obstacles into flat arrays: the corner points of all obstacles and where each obstacle starts.
+
+    Args:
+        obstacles (list): List of obstacles, each a sequence of corner points.
+
+    Returns:
+        tuple: (points, offsets), a (n, 2) float64 array and an int64 array of len(obstacles) + 1 offsets.
+    """
+    offsets = np.zeros(len(obstacles) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(obstacle) for obstacle in obstacles])
+    points = np.array([point for obstacle in obstacles for point in obstacle], dtype=np.float64).reshape(-1, 2)
+    return points, offsets
+
+
+def unpack_obstacles(points, offsets):
+    """
+    Unpack the arrays built by obstacle_arrays into obstacles. Integral coordinates are restored as ints.
+    """
+    coords = [tuple(int(value) if value.is_integer() else value for value in point) for point in points.tolist()]
+    return [tuple(coords[start:stop]) for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def fingerprint(obstacles, width, height, padding, cell_size=CELL_SIZE):
+    """
+    Hash everything the grids are computed from, to tell whether saved grids match an obstacle set.
+
+    Returns:
+        str: The hex digest.
+    """
+    points, offsets = obstacle_arrays(obstacles)
+    digest = hashlib.sha256(np.array([width, height, padding, cell_size], dtype=np.float64).tobytes())
+    digest.update(points.tobytes())
+    digest.update(offsets.tobytes())
+    return digest.hexdigest()
+
+
+def write_sections(path, sections):
+    """
+    Write named arrays to a map file, replacing it at once.
+
+    Args:
+        path (str): The path of the file.
+        sections (dict): Section name, at most 8 ASCII characters, to array.
+    """
+    arrays = [(name, np.ascontiguousarray(array)) for name, array in sections.items()]
+    offset = _HEADER.size + _SECTION.size * len(arrays)
+    table = []
+    for name, array in arrays:
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        shape = list(array.shape) + [0] * (4 - array.ndim)
+        table.append(_SECTION.pack(name.encode(), array.dtype.str.encode(), offset, array.nbytes, array.ndim, *shape))
+        offset += array.nbytes
+    # Write a new file and move it over the old one, whose grids may still be memory-mapped by a map
+    # loaded from it: the mappings keep the old file alive, truncating it would invalidate them
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(arrays), 0))
+            file.write(b"".join(table))
+            for (name, array), entry in zip(arrays, table):
+                file.seek(_SECTION.unpack(entry)[2])
+                file.write(array.tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_sections(path, mapped=()):
+    """
+    Read the arrays of a map file.
+
+    Args:
+        path (str): The path of the file.
+        mapped (iterable): Names of the sections to memory-map copy-on-write instead of reading them. Mapped
+                           arrays can be modified in memory without changing the file.
+
+    Returns:
+        dict: Section name to array. Sections unknown to the caller can simply be ignored.
+    """
+    with open(path, "rb") as file:
+        magic, version, count, _ = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a map file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, only versions up to {FORMAT_VERSION} are supported")
+        entries = [_SECTION.unpack(file.read(_SECTION.size)) for _ in range(count)]
+        sections = {}
+        for name, dtype, offset, nbytes, ndim, *shape in entries:
+            name, shape = name.rstrip(b"\x00").decode(), tuple(shape[:ndim])
+            dtype = np.dtype(dtype.rstrip(b"\x00").decode())
+            if name in mapped and nbytes:
+                sections[name] = np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape)
+            else:
+                file.seek(offset)
+                sections[name] = np.fromfile(file, dtype=dtype, count=nbytes // dtype.itemsize).reshape(shape)
+    return sections
+
+
+def save_map(sim_map, path):
+    """
+    Save the obstacles of a map together with its grids and hierarchical graph, building the grids if needed.
+
+    Args:
+        sim_map (Map): The map.
+        path (str): The path of the file.
+    """
+    sim_map.update_grid()
+    # Windows cannot replace a file that is still mapped, so grids mapped from a file are copied into memory
+    if isinstance(sim_map.danger_map, np.memmap):
+        sim_map.danger_map = np.array(sim_map.danger_map)
+    if isinstance(sim_map.downsized_grid, np.memmap):
+        sim_map.downsized_grid = np.array(sim_map.downsized_grid)
+        if sim_map.hpa:
+            sim_map.hpa.grid = sim_map.downsized_grid
+    points, offsets = obstacle_arrays(sim_map.obstacles)
+    padding = sim_map.amr.half_diag
+    meta = {'width': sim_map.width, 'height': sim_map.height, 'padding': padding, 'cell_size': CELL_SIZE,
+            'fingerprint': fingerprint(sim_map.obstacles, sim_map.width, sim_map.height, padding)}
+    sections = {'points': points, 'offsets': offsets, 'danger': sim_map.danger_map, 'grid': sim_map.downsized_grid}
+    if sim_map.hpa:
+        meta['cluster_size'] = sim_map.hpa.cluster_size
+        meta['hpa_version'] = HPA_GRAPH_VERSION
+        for name, array in sim_map.hpa.to_arrays().items():
+            sections['hpa_' + name[:4]] = array
+    sections['meta'] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    write_sections(path, sections)
+
+
+def load_map(sim_map, path, mmap=True):
+    """
+    Load the obstacles saved in a file into a map.
+
+    The saved grids and hierarchical graph are used as they are when the file fingerprint matches the loaded
+    obstacles, the map size and the robot padding. Otherwise the grids are rebuilt on the next path search.
+    The grids are memory-mapped, so only the pages that are used are read.
+
+    Args:
+        sim_map (Map): The map, of the same size as the saved one.
+        path (str): The path of the file.
+        mmap (bool): Flag to memory-map the grids instead of reading them.
+
+    Returns:
+        bool: True if the saved grids were used, False if they have to be rebuilt.
+    """
+    sections = read_sections(path, MAPPED_SECTIONS if mmap else ())
+    meta = json.loads(bytes(sections['meta']).decode())
+    if (meta['width'], meta['height']) != (sim_map.width, sim_map.height):
+        raise ValueError(f"{path} holds a {meta['width']}x{meta['height']} map, not {sim_map.width}x{sim_map.height}")
+    obstacles = unpack_obstacles(sections['points'], sections['offsets'])
+    sim_map.set_obstacles(obstacles)
+    if meta['cell_size'] != CELL_SIZE or \
+            meta['fingerprint'] != fingerprint(obstacles, sim_map.width, sim_map.height, sim_map.amr.half_diag):
+        return False
+    sim_map.danger_map, sim_map.downsized_grid = sections['danger'], sections['grid']
+    sim_map.grid_valid = True
+    if 'hpa_tran' in sections and meta.get('hpa_version') == HPA_GRAPH_VERSION:
+        sim_map.hpa = HpaPlanner.from_arrays(sim_map.downsized_grid, meta['cluster_size'], sections['hpa_tran'],
+                                             sections['hpa_edge'], sections['hpa_cost'])
+    return True
@@ -0,0 +1,205 @@
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from time import perf_counter
+import numpy as np
+from occupancy import CELL_SIZE
+from scenarios import DISTANCES, generate_scenario
+
+LAYOUTS = ['open', 'maze']
+
+
+def mission_seed(seed, index):
+    """
+    Derive the seed of one mission from the batch seed and the mission index, independently of the other missions.
+
+    Args:
+        seed (int): The batch seed.
+        index (int): The index of the mission in the batch.
+
+    Returns:
+        int: The mission seed.
+    """
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0])
+
+
+def run_mission(seed, settings):
+    """
+    Generate a random mission and run it headlessly: build the grid, plan a path and drive the AMR along it.
+
+    Everything but the timings depends only on the seed and the settings.
+
+    Args:
+        seed (int): The mission seed.
+        settings (dict): The mission settings, see run_batch.
+
+    Returns:
+        dict: The mission results. path_length is the planned path in pixels, clearance its smallest distance
+              to an obstacle, ticks the number of physics steps until the AMR stopped, collisions the number of
+              contacts of the AMR with obstacles, rotation the angle it turned in degrees, grid_ms and plan_ms the
+              grid build and path search times.
+    """
+    from headless import HeadlessSimulation
+    rng = np.random.default_rng(seed)
+    layout = settings['layout'] if settings['layout'] != 'mixed' else LAYOUTS[rng.integers(len(LAYOUTS))]
+    distance = settings['distance'] if settings['distance'] != 'mixed' else list(DISTANCES)[rng.integers(len(DISTANCES))]
+    result = {'seed': seed, 'layout': layout, 'distance': distance, 'algorithm': settings['algorithm'],
+              'controller': settings['controller'], 'found': False, 'success': False, 'path_length': 0.0,
+              'clearance': 0.0, 'ticks': 0, 'rotation': 0.0, 'collisions': 0, 'grid_ms': 0.0, 'plan_ms': 0.0}
+    try:
+        scenario = generate_scenario(seed, settings['width'], settings['height'], layout, settings['density'], distance)
+    except ValueError:
+        return result
+    sim = HeadlessSimulation(*scenario.start, map_size=(scenario.width, scenario.height))
+    sim.map.algorithm = settings['algorithm']
+    sim.map.simplify_paths = settings['simplify']
+    sim.amr.controller = settings['controller']
+    if settings['lookahead']:
+        sim.amr.lookahead = settings['lookahead']
+    for obstacle in scenario.obstacles:
+        sim.map.add_obstacle(obstacle)
+    start = perf_counter()
+    sim.map.update_grid()
+    result['grid_ms'] = (perf_counter() - start) * 1e3
+    start = perf_counter()
+    found = sim.set_target(scenario.goal)
+    result['plan_ms'] = (perf_counter() - start) * 1e3
+    if not found:
+        return result
+    waypoints = [scenario.start, sim.amr.target] + list(sim.amr.buffer)
+    result['found'] = True
+    result['path_length'] = sum(math.dist(a, b) for a, b in zip(waypoints, waypoints[1:]))
+    result['clearance'] = sim.map.path_clearance(waypoints)
+    sim.amr.check_collisions = True
+    result['ticks'] = sim.run(settings['max_ticks'], until_idle=True)
+    result['collisions'] = sim.amr.collisions
+    result['rotation'] = math.degrees(sim.amr.total_rotation)
+    result['success'] = sim.is_idle() and not sim.amr.collisions and \
+        math.dist((sim.amr.x, sim.amr.y), scenario.goal) <= CELL_SIZE
+    return result
+
+
+def run_batch(missions, seed=0, workers=None, algorithm="a_star", width=900, height=500, layout='mixed',
+              density=0.3, distance='mixed', simplify=True, max_ticks=50000, controller="stop_and_turn", lookahead=None):
+    """
+    Run a batch of random missions in a process pool.
+
+    Mission i uses mission_seed(seed, i) and the results are returned in mission order, so they are the
+    same for any number of workers.
+
+    Args:
+        missions (int): The number of missions.
+        seed (int): The batch seed.
+        workers (int): The number of worker processes, all CPU cores by default, 1 to run in this process.
+        algorithm (str): The path search algorithm of the map.
+        width (int): The width of the maps in pixels.
+        height (int): The height of the maps in pixels.
+        layout (str): "open", "maze" or "mixed" to pick one per mission.
+        density (float): The obstacle density, see generate_scenario.
+        distance (str): The start to goal distance, a key of DISTANCES or "mixed" to pick one per mission.
+        simplify (bool): Flag to keep only the corner waypoints of planned paths.
+        max_ticks (int): The maximum number of ticks of a mission.
+        controller (str): The path following controller of the AMR.
+        lookahead (float): The lookahead distance of the pure pursuit controller, the AMR default if None.
+
+    Returns:
+        list: The results of run_mission for every mission.
+    """
+    settings = {'algorithm': algorithm, 'width': width, 'height': height, 'layout': layout, 'density': density,
+                'distance': distance, 'simplify': simplify, 'max_ticks': max_ticks, 'controller': controller,
+                'lookahead': lookahead}
+    seeds = [mission_seed(seed, index) for index in range(missions)]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [run_mission(mission, settings) for mission in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_mission, seeds, repeat(settings), chunksize=max(1, missions // (4 * workers))))
+
+
+def summarize(results):
+    """
+    Aggregate mission results.
+
+    A mission succeeds when the AMR stops at the goal without touching an obstacle. Path lengths and ticks
+    are taken over the successful missions, planning times over all of them.
+
+    Args:
+        results (list): The results of run_mission.
+
+    Returns:
+        dict: The aggregated metrics.
+    """
+    done = [result for result in results if result['success']]
+    mean = lambda values: float(np.mean(values)) if values else float('nan')
+    p95 = lambda values: float(np.percentile(values, 95)) if values else float('nan')
+    ticks = [result['ticks'] for result in done]
+    rotation = [result['rotation'] for result in done]
+    plan_ms = [result['grid_ms'] + result['plan_ms'] for result in results]
+    return {'missions': len(results), 'found': sum(result['found'] for result in results) / max(len(results), 1),
+            'collided': sum(result['collisions'] > 0 for result in results) / max(len(results), 1),
+            'success': len(done) / max(len(results), 1), 'path_length': mean([result['path_length'] for result in done]),
+            'ticks': mean(ticks), 'ticks_p95': p95(ticks), 'rotation': mean(rotation), 'plan_ms': mean(plan_ms), 'plan_ms_p95': p95(plan_ms)}
+
+
+def print_summary(rows):
+    """
+    Print summaries as a table.
+
+    Args:
+        rows (list): (label, summary) pairs.
+    """
+    print(f"{'group':<20} {'missions':>8} {'found':>7} {'collided':>9} {'success':>8} {'path px':>9} {'ticks':>8} {'ticks p95':>10} {'turn deg':>9} "
+          f"{'plan ms':>8} {'plan p95':>9}")
+    for label, summary in rows:
+        print(f"{label:<20} {summary['missions']:>8} {summary['found']:>7.1%} {summary['collided']:>9.1%} {summary['success']:>8.1%} "
+              f"{summary['path_length']:>9.1f} {summary['ticks']:>8.1f} {summary['ticks_p95']:>10.1f} {summary['rotation']:>9.1f} "
+              f"{summary['plan_ms']:>8.3f} {summary['plan_ms_p95']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo mission runner")
+    parser.add_argument("--missions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes, all CPU cores by default")
+    parser.add_argument("--algorithm", choices=["a_star", "jps", "hpa", "dstar", "field"], nargs="+", default=["a_star"],
+                        help="path search algorithms, every one runs the same missions")
+    parser.add_argument("--size", default="900x500", help="map size in pixels, WIDTHxHEIGHT")
+    parser.add_argument("--layout", choices=LAYOUTS + ['mixed'], default='mixed')
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--distance", choices=list(DISTANCES) + ['mixed'], default='mixed')
+    parser.add_argument("--controller", choices=["stop_and_turn", "pure_pursuit"], nargs="+", default=["stop_and_turn"],
+                        help="path following controllers, every one runs the same missions")
+    parser.add_argument("--lookahead", type=float, help="lookahead distance of pure_pursuit in pixels")
+    parser.add_argument("--no-simplify", action="store_true", help="follow the raw grid paths")
+    parser.add_argument("--max-ticks", type=int, default=50000)
+    parser.add_argument("--output", help="JSON file the per-mission results are written to")
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    rows, results = [], {}
+    start = perf_counter()
+    for algorithm in args.algorithm:
+        for controller in args.controller:
+            label = algorithm if len(args.controller) == 1 else f"{algorithm}/{controller}"
+            results[label] = run_batch(args.missions, args.seed, args.workers, algorithm, width, height, args.layout,
+                                       args.density, args.distance, not args.no_simplify, args.max_ticks,
+                                       controller, args.lookahead)
+            rows.append((label, summarize(results[label])))
+            for layout in LAYOUTS:
+                group = [result for result in results[label] if result['layout'] == layout]
+                if group and args.layout == 'mixed':
+                    rows.append((f"  {layout}", summarize(group)))
+    print_summary(rows)
+    print(f"{args.missions * len(results)} missions in {perf_counter() - start:.1f} s "
+          f"on {args.workers or os.cpu_count()} workers")
+    if args.output:
+        import json
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,258 @@
+import math
+import numpy as np
+
+CELL_SIZE = 10
+
+
+def obstacle_bounds(obstacle):
+    """
+    Get the axis-aligned bounding box of an obstacle.
+
+    Args:
+        obstacle (tuple): The corner points of the obstacle.
+
+    Returns:
+        tuple: (x_min, y_min, x_max, y_max) of the obstacle.
+    """
+    xs = [point[0] for point in obstacle]
+    ys = [point[1] for point in obstacle]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def is_box(obstacle):
+    """
+    Check if an obstacle is an axis-aligned rectangle, which is rasterized by array slicing.
+
+    Args:
+        obstacle (tuple): The corner points of the obstacle.
+
+    Returns:
+        bool: True if the obstacle is an axis-aligned rectangle, False otherwise.
+    """
+    return len(obstacle) == 4 and len({point[0] for point in obstacle}) <= 2 and len({point[1] for point in obstacle}) <= 2
+
+
+def convex_hull(points):
+    """
+    Get the convex hull of points with the monotone chain algorithm.
+
+    Args:
+        points (iterable): The points.
+
+    Returns:
+        list: The hull vertices counterclockwise in (x, y), without collinear points.
+    """
+    points = sorted(set((float(x), float(y)) for x, y in points))
+    if len(points) <= 2:
+        return points
+
+    def chain(sequence):
+        hull = []
+        for point in sequence:
+            while len(hull) >= 2 and (hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1]) - \
+                    (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0]) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull[:-1]
+
+    return chain(points) + chain(reversed(points))
+
+
+def inflate_polygon(obstacle, padding):
+    """
+    Grow a convex obstacle by the footprint of the robot, the square of half side padding.
+
+    The Minkowski sum of a convex polygon and a square is the convex hull of the polygon corners moved to
+    the four corners of the square, so a rectangle grows into its bounding box padded on every side, the
+    same zone as padded_slices covers.
+
+    Args:
+        obstacle (tuple): The corner points of the obstacle.
+        padding (float): The half side of the footprint.
+
+    Returns:
+        list: The corners of the grown polygon, counterclockwise in (x, y).
+    """
+    if not padding:
+        return convex_hull(obstacle)
+    return convex_hull((x + dx, y + dy) for x, y in obstacle for dx in (-padding, padding) for dy in (-padding, padding))
+
+
+def half_planes(obstacle):
+    """
+    Get the edges of a convex obstacle as outward half-planes.
+
+    A point q lies inside the obstacle when normal . q <= offset for every row, and inside the obstacle
+    grown by padding as in inflate_polygon when normal . q - padding * (|normal_x| + |normal_y|) <= offset
+    also holds and q lies inside the padded bounding box.
+
+    Args:
+        obstacle (tuple): The corner points of the obstacle.
+
+    Returns:
+        np.array: (k, 3) array of normal_x, normal_y, offset rows. A segment, e.g. a wall without thickness,
+                  has the two sides of its line, and a single point none, its padded bounding box is exact.
+    """
+    hull = np.asarray(convex_hull(obstacle)).reshape(-1, 2)
+    if len(hull) < 2:
+        return np.zeros((0, 3))
+    start, end = hull, np.roll(hull, -1, axis=0)
+    normals = np.stack((end[:, 1] - start[:, 1], start[:, 0] - end[:, 0]), axis=1)
+    return np.column_stack((normals, (normals * start).sum(axis=1)))
+
+
+def fill_polygon(out, polygon, eps=1e-9):
+    """
+    Set the pixels covered by a convex polygon, edges included, with a vectorized scanline fill.
+
+    Every column between the leftmost and the rightmost corner crosses the boundary of the polygon twice,
+    so all edges are intersected with all columns at once and every column is filled between the lowest
+    and the highest intersection.
+
+    Args:
+        out (np.array): (width, height) array updated in place, indexed [x][y].
+        polygon (list): The corners of the convex polygon in order.
+        eps (float): Tolerance of the intersection tests.
+    """
+    width, height = out.shape
+    points = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    if not len(points):
+        return
+    x_lo = max(math.ceil(points[:, 0].min() - eps), 0)
+    x_hi = min(math.floor(points[:, 0].max() + eps), width - 1)
+    if x_lo > x_hi:
+        return
+    xs = np.arange(x_lo, x_hi + 1, dtype=np.float64)
+    (x0, y0), (x1, y1) = points.T[:, :, None], np.roll(points, -1, axis=0).T[:, :, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (xs - x0) / (x1 - x0)
+        ys = y0 + t * (y1 - y0)
+    crossing = (t >= -eps) & (t <= 1 + eps)
+    # Vertical edges cover both of their ends in the column they lie on
+    vertical = (x0 == x1) & (np.abs(xs - x0) <= eps)
+    lo = np.minimum(np.where(crossing, ys, np.inf).min(axis=0), np.where(vertical, np.minimum(y0, y1), np.inf).min(axis=0))
+    hi = np.maximum(np.where(crossing, ys, -np.inf).max(axis=0), np.where(vertical, np.maximum(y0, y1), -np.inf).max(axis=0))
+    lo, hi = np.maximum(np.ceil(lo - eps), 0), np.minimum(np.floor(hi + eps), height - 1)
+    filled = lo <= hi
+    if not filled.any():
+        return
+    y_lo, y_hi = int(lo[filled].min()), int(hi[filled].max())
+    rows = np.arange(y_lo, y_hi + 1)
+    out[x_lo:x_hi + 1, y_lo:y_hi + 1] |= (rows >= lo[:, None]) & (rows <= hi[:, None])
+
+
+def fill_obstacle(out, obstacle, padding):
+    """
+    Set the pixels of the danger zone of an obstacle, by array slicing for axis-aligned rectangles and by
+    filling the grown polygon for other convex obstacles.
+
+    Args:
+        out (np.array): (width, height) array updated in place.
+        obstacle (tuple): The corner points of the obstacle.
+        padding (float): The half side of the robot footprint.
+    """
+    if is_box(obstacle):
+        slices = padded_slices(obstacle_bounds(obstacle), padding, *out.shape)
+        if slices:
+            out[slices] = 1
+    else:
+        fill_polygon(out, inflate_polygon(obstacle, padding))
+
+
+def padded_slices(bounds, padding, width, height):
+    """
+    Get the pixel slices covered by an obstacle bounding box grown by padding.
+
+    A pixel (x, y) is covered when x_min - padding <= x <= x_max + padding and the same holds for y,
+    which is exactly the inclusive test done by Map.is_danger_zone.
+
+    Args:
+        bounds (tuple): (x_min, y_min, x_max, y_max) of the obstacle.
+        padding (float): The padding added on every side.
+        width (int): The width of the map in pixels.
+        height (int): The height of the map in pixels.
+
+    Returns:
+        tuple: A (x_slice, y_slice) pair, or None if the padded box lies outside the map.
+    """
+    x_lo = max(math.ceil(bounds[0] - padding), 0)
+    y_lo = max(math.ceil(bounds[1] - padding), 0)
+    x_hi = min(math.floor(bounds[2] + padding), width - 1)
+    y_hi = min(math.floor(bounds[3] + padding), height - 1)
+    if x_lo > x_hi or y_lo > y_hi:
+        return None
+    return slice(x_lo, x_hi + 1), slice(y_lo, y_hi + 1)
+
+
+def rasterize_obstacles(obstacles, width, height, padding, out=None):
+    """
+    Rasterize the danger zones of the obstacles, grown by the robot footprint as in inflate_polygon, into a danger map.
+
+    Args:
+        obstacles (list): List of convex obstacles, each a sequence of corner points.
+        width (int): The width of the map in pixels.
+        height (int): The height of the map in pixels.
+        padding (float): The padding added around every obstacle.
+        out (np.array): Optional (width, height) array to fill in place.
+
+    Returns:
+        np.array: (width, height) uint8 array with 1 where a pixel is in a danger zone.
+    """
+    if out is None:
+        out = np.zeros((width, height), dtype=np.uint8)
+    else:
+        out.fill(0)
+    for obstacle in obstacles:
+        fill_obstacle(out, obstacle, padding)
+    return out
+
+
+def downsize_grid(danger_map, cell_size=CELL_SIZE, out=None):
+    """
+    Reduce the danger map to a coarse grid, marking a cell when any of its pixels is dangerous.
+
+    Args:
+        danger_map (np.array): (width, height) danger map.
+        cell_size (int): The size of a grid cell in pixels.
+        out (np.array): Optional (width // cell_size, height // cell_size) array to fill in place.
+
+    Returns:
+        np.array: The downsized uint8 grid.
+    """
+    cols, rows = danger_map.shape[0] // cell_size, danger_map.shape[1] // cell_size
+    blocks = danger_map[:cols * cell_size, :rows * cell_size].reshape(cols, cell_size, rows, cell_size)
+    reduced = blocks.any(axis=(1, 3))
+    if out is None:
+        return reduced.astype(np.uint8)
+    out[...] = reduced
+    return out
+
+
+def mark_obstacle(danger_map, downsized_grid, obstacle, padding, cell_size=CELL_SIZE):
+    """
+    Add a single obstacle to existing grids, touching only its padded bounding box.
+
+    Args:
+        danger_map (np.array): (width, height) danger map, updated in place.
+        downsized_grid (np.array): The downsized grid, updated in place.
+        obstacle (tuple): The corner points of the convex obstacle.
+        padding (float): The padding added around the obstacle.
+        cell_size (int): The size of a grid cell in pixels.
+
+    Returns:
+        tuple: (col_slice, row_slice) of the downsized grid that was updated, or None if nothing changed.
+    """
+    width, height = danger_map.shape
+    slices = padded_slices(obstacle_bounds(obstacle), padding, width, height)
+    if not slices:
+        return None
+    fill_obstacle(danger_map, obstacle, padding)
+    x_slice, y_slice = slices
+    col_slice = slice(x_slice.start // cell_size, min(-(-x_slice.stop // cell_size), downsized_grid.shape[0]))
+    row_slice = slice(y_slice.start // cell_size, min(-(-y_slice.stop // cell_size), downsized_grid.shape[1]))
+    if col_slice.start >= col_slice.stop or row_slice.start >= row_slice.stop:
+        return None
+    region = danger_map[col_slice.start * cell_size:col_slice.stop * cell_size,
+                        row_slice.start * cell_size:row_slice.stop * cell_size]
+    downsize_grid(region, cell_size, out=downsized_grid[col_slice, row_slice])
+    return col_slice, row_slice
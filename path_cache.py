@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+
+class PathCache:
+    """
+    Least recently used cache of grid paths keyed by (grid version, start cell, goal cell).
+
+    The grid version changes whenever the obstacles change, so entries from an older version can never
+    be hit again. They are dropped as soon as a lookup with a newer version is made.
+
+    Attributes:
+        max_size (int): The maximum number of cached paths.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to run the search.
+    """
+    def __init__(self, max_size=32):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): The maximum number of cached paths.
+        """
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, version):
+        """
+        Drop every entry if the grid version changed since the last lookup.
+
+        Args:
+            version (int): The current grid version.
+        """
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version, start, goal):
+        """
+        Get a cached path.
+
+        Args:
+            version (int): The current grid version.
+            start (tuple): The start cell.
+            goal (tuple): The goal cell.
+
+        Returns:
+            list: A copy of the cached path, or None if it is not cached.
+        """
+        self._check_version(version)
+        path = self._entries.get((start, goal))
+        if path is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end((start, goal))
+        return list(path)
+
+    def put(self, version, start, goal, path):
+        """
+        Store a path, evicting the least recently used one if the cache is full.
+
+        Args:
+            version (int): The grid version the path was computed on.
+            start (tuple): The start cell.
+            goal (tuple): The goal cell.
+            path (list): The path.
+        """
+        self._check_version(version)
+        self._entries[(start, goal)] = tuple(path)
+        self._entries.move_to_end((start, goal))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def lookup(self, version, start, goal, search):
+        """
+        Get a path from the cache, or compute and store it on a miss.
+
+        Args:
+            version (int): The current grid version.
+            start (tuple): The start cell.
+            goal (tuple): The goal cell.
+            search (callable): Function of (start, goal) returning the path.
+
+        Returns:
+            list: The path.
+        """
+        path = self.get(version, start, goal)
+        if path is None:
+            path = search(start, goal)
+            self.put(version, start, goal, path)
+        return path
+
+    def clear(self):
+        """
+        Drop every cached path and reset the counters.
+        """
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: The hits, misses, hit rate and current size.
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries)}
@@ -0,0 +1,64 @@
+def line_of_sight(grid, a, b):
+    """
+    Check if the straight segment between the centres of two cells only crosses free cells.
+
+    Every cell the segment touches is tested. Where the segment passes exactly through a cell corner, both
+    cells beside the corner must be free.
+
+    Args:
+        grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+        a (tuple): The first (row, col) cell.
+        b (tuple): The second (row, col) cell.
+
+    Returns:
+        bool: True if the segment is free, False otherwise.
+    """
+    row, col = a
+    n_row, n_col = abs(b[0] - row), abs(b[1] - col)
+    s_row, s_col = (1 if b[0] > row else -1), (1 if b[1] > col else -1)
+    i_row = i_col = 0
+    if grid[row, col]:
+        return False
+    while i_row < n_row or i_col < n_col:
+        decision = (1 + 2 * i_row) * n_col - (1 + 2 * i_col) * n_row
+        if decision == 0:
+            if grid[row + s_row, col] or grid[row, col + s_col]:
+                return False
+            row, col = row + s_row, col + s_col
+            i_row, i_col = i_row + 1, i_col + 1
+        elif decision < 0:
+            row += s_row
+            i_row += 1
+        else:
+            col += s_col
+            i_col += 1
+        if grid[row, col]:
+            return False
+    return True
+
+
+def simplify_path(grid, src, path):
+    """
+    Pull a grid path taut, keeping only the cells where it has to turn around an obstacle.
+
+    Starting from the source, the path is followed as long as the last kept cell still has line of sight to
+    the next cell. The cell before the first one out of sight is kept and the walk continues from there.
+
+    Args:
+        grid (np.array): 2D numpy array representing the grid, non-zero cells are blocked.
+        src (tuple): The source cell.
+        path (list): List of (row, col) cells after the source up to the destination.
+
+    Returns:
+        list: The kept cells, the destination included, in the same format as the input path.
+    """
+    if len(path) < 2:
+        return list(path)
+    kept = []
+    anchor = src
+    for previous, cell in zip(path, path[1:]):
+        if not line_of_sight(grid, anchor, cell):
+            kept.append(previous)
+            anchor = previous
+    kept.append(path[-1])
+    return kept
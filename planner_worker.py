@@ -0,0 +1,164 @@
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError
+from a_star import AStarEngine, a_star_search
+from jps import JumpPointEngine, jps_search
+
+# Every worker thread or process gets its own engines, the module engines are not thread-safe
+_local = threading.local()
+# Search function and engine class of every algorithm that runs on a plain grid
+SEARCHES = {"a_star": (a_star_search, AStarEngine), "jps": (jps_search, JumpPointEngine)}
+
+
+def search_path(grid, src, dest, cancel=None, algorithm="a_star"):
+    """
+    Run a path search in a worker and time it.
+
+    Args:
+        grid (np.array): Snapshot of the downsized grid.
+        src (tuple): The source cell.
+        dest (tuple): The destination cell.
+        cancel (threading.Event): Optional event aborting the search when set, only usable with threads.
+        algorithm (str): The search algorithm, a key of SEARCHES.
+
+    Returns:
+        tuple: The grid path, empty if no path is found or the search was cancelled, and the search time in seconds.
+    """
+    start = perf_counter()
+    search, engine_class = SEARCHES[algorithm]
+    if not hasattr(_local, "engines"):
+        _local.engines = {}
+    engine = _local.engines.get(algorithm)
+    if engine is None:
+        engine = _local.engines[algorithm] = engine_class()
+    path = search(grid, src, dest, quiet=True, engine=engine, cancel=cancel)
+    return path, perf_counter() - start
+
+
+class PlanHandle:
+    """
+    Handle of a path request running in the background.
+
+    Attributes:
+        version (tuple): The path version of the map the request was planned on.
+        start (tuple): The start cell.
+        goal (tuple): The goal cell.
+        target (tuple): The target position in pixels the request was made for.
+        future (Future): The future of the search.
+        search_time (float): The time the worker spent searching in seconds, 0 until result returned a path.
+    """
+    def __init__(self, version, start, goal, target, future, cancel_event):
+        self.version = version
+        self.start = start
+        self.goal = goal
+        self.target = target
+        self.future = future
+        self.search_time = 0.0
+        self._cancel_event = cancel_event
+
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """
+        Cancel the request. A search that already started stops at its next cancellation check.
+        """
+        self.future.cancel()
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.future.cancelled() or (self._cancel_event is not None and self._cancel_event.is_set())
+
+    def result(self):
+        """
+        Get the path of a finished request.
+
+        Returns:
+            list: The grid path, or None if the request was cancelled or failed.
+        """
+        if self.cancelled:
+            return None
+        try:
+            path, self.search_time = self.future.result()
+            return path
+        except CancelledError:
+            return None
+        except Exception as error:
+            print(f"Background path planning failed: {error}")
+            return None
+
+
+class BackgroundPlanner:
+    """
+    Runs path searches in a thread or process pool so the frame loop never waits for them.
+
+    Only the latest request is kept: submitting a new one cancels the pending one.
+
+    Attributes:
+        kind (str): "thread" or "process".
+        pending (PlanHandle): The request in flight, None if there is none.
+    """
+    def __init__(self, kind="thread", max_workers=1):
+        """
+        Initialize the planner.
+
+        Args:
+            kind (str): "thread" to search in a worker thread, "process" to search in a worker process.
+                        Process workers do not hold the GIL of the frame loop but cannot be interrupted.
+            max_workers (int): The number of workers.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.executor = ThreadPoolExecutor(max_workers) if kind == "thread" else ProcessPoolExecutor(max_workers)
+        self.pending = None
+
+    def submit(self, grid, version, start, goal, target, algorithm="a_star"):
+        """
+        Submit a search on a snapshot of the grid, cancelling the pending request.
+
+        Args:
+            grid (np.array): The downsized grid, copied before submission.
+            version (tuple): The path version of the map.
+            start (tuple): The start cell.
+            goal (tuple): The goal cell.
+            target (tuple): The target position in pixels.
+            algorithm (str): The search algorithm, a key of SEARCHES.
+
+        Returns:
+            PlanHandle: The handle of the request.
+        """
+        self.cancel()
+        cancel_event = threading.Event() if self.kind == "thread" else None
+        future = self.executor.submit(search_path, grid.copy(), start, goal, cancel_event, algorithm)
+        self.pending = PlanHandle(version, start, goal, target, future, cancel_event)
+        return self.pending
+
+    def poll(self):
+        """
+        Take the pending request if it is finished.
+
+        Returns:
+            PlanHandle: The finished request, or None if there is none.
+        """
+        if self.pending is None or not self.pending.done():
+            return None
+        handle, self.pending = self.pending, None
+        return handle
+
+    def cancel(self):
+        """
+        Cancel the pending request, if any.
+        """
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def shutdown(self):
+        """
+        Cancel the pending request and stop the workers.
+        """
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
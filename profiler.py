@@ -0,0 +1,187 @@
+import csv
+from collections import deque
+from time import perf_counter
+import numpy as np
+import pygame as pg
+import assets
+from assets import WIDTH, HEIGHT, INTERFACE_WIDTH, INTERFACE_HEIGHT, BLACK, GREY
+
+# Phases in the order they are shown in the overlay and written to the CSV file
+PHASES = ["handle_events", "handle_movement", "handle_obstacles", "grid_build", "a_star",
+          "draw_map", "draw_interface", "draw_amr", "frame"]
+
+
+class _NullPhase:
+    """
+    Context manager that does nothing, returned by Profiler.phase while the profiler is disabled.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    """
+    Context manager adding the time spent inside it to a phase of the current frame.
+    """
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        frame = self.profiler.frame
+        frame[self.name] = frame.get(self.name, 0.0) + perf_counter() - self.start
+        return False
+
+
+class Profiler:
+    """
+    Per-phase frame profiler with rolling statistics, an on-screen overlay and CSV export.
+
+    Wrap code in `with PROFILER.phase(name):` and call end_frame once per frame. While disabled, phase returns
+    a shared no-op context manager and end_frame returns at once.
+
+    Attributes:
+        enabled (bool): Flag to collect samples.
+        overlay (bool): Flag to draw the statistics on screen.
+        window (int): The number of frames the rolling statistics are computed over.
+        frame (dict): The phase times of the current frame in seconds.
+        samples (dict): Rolling per-phase samples in seconds.
+    """
+    def __init__(self, window=120, enabled=False):
+        """
+        Initialize the profiler.
+
+        Args:
+            window (int): The number of frames the rolling statistics are computed over.
+            enabled (bool): Flag to collect samples.
+        """
+        self.enabled = enabled
+        self.overlay = False
+        self.window = window
+        self.frame = {}
+        self.samples = {name: deque(maxlen=window) for name in PHASES}
+        self.frame_count = 0
+        self._frame_start = None
+        self._csv_file = self._csv_writer = None
+        self._font = None
+        self._lines = []
+
+    def phase(self, name):
+        """
+        Get a context manager timing a phase.
+
+        Args:
+            name (str): The name of the phase.
+
+        Returns:
+            The context manager.
+        """
+        return _Phase(self, name) if self.enabled else _NULL_PHASE
+
+    def add(self, name, seconds):
+        """
+        Add time measured elsewhere, e.g. in a worker thread, to a phase of the current frame.
+
+        Args:
+            name (str): The name of the phase.
+            seconds (float): The time to add.
+        """
+        if self.enabled:
+            self.frame[name] = self.frame.get(name, 0.0) + seconds
+
+    def end_frame(self):
+        """
+        Close the current frame: store its phase times in the rolling windows and the CSV file.
+        The time between two calls is recorded as the "frame" phase.
+        """
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self._frame_start is not None:
+            self.frame["frame"] = now - self._frame_start
+        self._frame_start = now
+        for name, value in self.frame.items():
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(value)
+        if self._csv_writer:
+            self._csv_writer.writerow([self.frame_count] + [f"{self.frame.get(name, 0.0) * 1e3:.4f}" for name in PHASES])
+        self.frame_count += 1
+        self.frame = {}
+
+    def stats(self, name):
+        """
+        Get the rolling statistics of a phase.
+
+        Args:
+            name (str): The name of the phase.
+
+        Returns:
+            tuple: (p50, p95, max) in seconds, or None if there are no samples.
+        """
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        values = np.fromiter(samples, dtype=np.float64, count=len(samples))
+        p50, p95 = np.percentile(values, (50, 95))
+        return float(p50), float(p95), float(values.max())
+
+    def open_csv(self, path):
+        """
+        Stream per-frame samples in milliseconds to a CSV file and enable the profiler.
+
+        Args:
+            path (str): The path of the file.
+        """
+        self.close_csv()
+        self._csv_file = open(path, "w", newline="", buffering=1 << 16)
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(["frame"] + [f"{name}_ms" for name in PHASES])
+        self.enabled = True
+
+    def close_csv(self):
+        """
+        Flush and close the CSV file, if any.
+        """
+        if self._csv_file:
+            self._csv_file.close()
+        self._csv_file = self._csv_writer = None
+
+    def draw(self):
+        """
+        Draw the p50/p95/max overlay above the interface panel. The text is refreshed twice a second.
+
+        Returns:
+            list: The rectangles drawn on.
+        """
+        if not (self.enabled and self.overlay):
+            return []
+        if self._font is None:
+            self._font = assets.get_font(12, "couriernew,monospace")
+        if self.frame_count % 30 == 0 or not self._lines:
+            self._lines = [self._font.render(f"{'phase':<16}{'p50':>7}{'p95':>7}{'max':>7} ms", 1, BLACK)]
+            for name in PHASES:
+                stats = self.stats(name)
+                if stats:
+                    text = f"{name:<16}" + "".join(f"{value * 1e3:>7.2f}" for value in stats)
+                    self._lines.append(self._font.render(text, 1, BLACK))
+        line_height = self._font.get_linesize()
+        width = max(INTERFACE_WIDTH, max(line.get_width() for line in self._lines) + 10)
+        height = line_height * len(self._lines) + 10
+        x, y = WIDTH - width, HEIGHT - INTERFACE_HEIGHT - height - 4
+        rect = pg.draw.rect(assets.WIN, GREY, (x, y, width, height))
+        for i, line in enumerate(self._lines):
+            assets.WIN.blit(line, (x + 5, y + 5 + i * line_height))
+        return [rect]
+
+
+# Shared profiler used by the simulation modules
+PROFILER = Profiler()
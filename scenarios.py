@@ -0,0 +1,139 @@
+import math
+import numpy as np
+from occupancy import CELL_SIZE, rasterize_obstacles, downsize_grid, mark_obstacle
+
+HALF_DIAG = math.sqrt(37.5 ** 2 + 25 ** 2)
+# Start to goal distance as a fraction of the map diagonal
+DISTANCES = {'near': 0.2, 'mid': 0.5, 'far': 0.8}
+
+
+def rectangle(x0, y0, x1, y1):
+    """
+    Build a rectangular obstacle in the corner format of Map.input_obstacles.
+    """
+    return (x0, y0), (x0, y1), (x1, y1), (x1, y0)
+
+
+def border_obstacles(width, height):
+    """
+    Build the four border obstacles of Map._init_obstacles for a map size.
+    """
+    return [rectangle(0, 0, width, 5), rectangle(0, 0, 5, height),
+            rectangle(0, height - 5, width, height), rectangle(width - 5, 0, width, height)]
+
+
+class Scenario:
+    """
+    A reproducible benchmark scenario: a map with obstacles and a start and goal position.
+
+    Attributes:
+        name (str): The unique name of the scenario.
+        width (int): The width of the map in pixels.
+        height (int): The height of the map in pixels.
+        obstacles (list): The obstacles added on top of the map borders.
+        start (tuple): The start position in pixels.
+        goal (tuple): The goal position in pixels.
+        grid (np.array): The downsized grid of the map, borders included.
+    """
+    def __init__(self, name, width, height, obstacles, start, goal, grid):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.obstacles = obstacles
+        self.start = start
+        self.goal = goal
+        self.grid = grid
+
+    @property
+    def start_cell(self):
+        return self.start[0] // CELL_SIZE, self.start[1] // CELL_SIZE
+
+    @property
+    def goal_cell(self):
+        return self.goal[0] // CELL_SIZE, self.goal[1] // CELL_SIZE
+
+
+def open_layout(rng, width, height, density, padding):
+    """
+    Scatter rectangular obstacles until the given fraction of the downsized grid is blocked, padding included.
+    """
+    danger_map = rasterize_obstacles(border_obstacles(width, height), width, height, padding)
+    grid = downsize_grid(danger_map)
+    obstacles = []
+    while grid.mean() < density:
+        w, h = int(rng.integers(10, 80)), int(rng.integers(10, 80))
+        x, y = int(rng.integers(0, width - w)), int(rng.integers(0, height - h))
+        obstacles.append(rectangle(x, y, x + w, y + h))
+        mark_obstacle(danger_map, grid, obstacles[-1], padding)
+    return obstacles
+
+
+def maze_layout(rng, width, height, density, padding):
+    """
+    Build a lattice of thin walls with one door per wall segment. Higher density gives smaller rooms.
+    """
+    door = int(2 * padding + 2.5 * CELL_SIZE)
+    pitch = int(door + 2 * padding + 2 * CELL_SIZE + (1 - density) * 300)
+    obstacles = []
+    for x in range(pitch, width - pitch // 2, pitch):
+        for y0 in range(0, height, pitch):
+            y1 = min(y0 + pitch, height)
+            gap = int(rng.integers(y0, max(y0 + 1, y1 - door)))
+            obstacles += [rectangle(x, y0, x + 6, gap), rectangle(x, gap + door, x + 6, y1)]
+    for y in range(pitch, height - pitch // 2, pitch):
+        for x0 in range(0, width, pitch):
+            x1 = min(x0 + pitch, width)
+            gap = int(rng.integers(x0, max(x0 + 1, x1 - door)))
+            obstacles += [rectangle(x0, y, gap, y + 6), rectangle(gap + door, y, x1, y + 6)]
+    return [obstacle for obstacle in obstacles if obstacle[0][0] < obstacle[2][0] and obstacle[0][1] < obstacle[2][1]]
+
+
+def generate_scenario(seed, width=900, height=500, layout='open', density=0.1, distance='far', padding=HALF_DIAG):
+    """
+    Generate a scenario. The same arguments always give the same scenario.
+
+    The start and goal are free cells of the downsized grid whose distance is as close as possible to the
+    requested fraction of the map diagonal. They are not guaranteed to be connected.
+
+    Args:
+        seed (int): The random seed.
+        width (int): The width of the map in pixels.
+        height (int): The height of the map in pixels.
+        layout (str): "open" for scattered rectangles, "maze" for walls with doors.
+        density (float): The fraction of blocked grid cells ("open") or the lattice tightness from 0 to 1 ("maze").
+        distance (str): The start to goal distance, a key of DISTANCES.
+        padding (float): The robot padding used to find free cells.
+
+    Returns:
+        Scenario: The scenario.
+    """
+    rng = np.random.default_rng(seed)
+    if layout == 'open':
+        obstacles = open_layout(rng, width, height, density, padding)
+    else:
+        obstacles = maze_layout(rng, width, height, density, padding)
+    danger_map = rasterize_obstacles(border_obstacles(width, height) + obstacles, width, height, padding)
+    grid = downsize_grid(danger_map)
+    free = np.argwhere(grid == 0)
+    if len(free) < 2:
+        raise ValueError("The generated map has no free cells")
+    start_cell = free[rng.integers(len(free))]
+    wanted = DISTANCES[distance] * math.hypot(*grid.shape)
+    gaps = np.abs(np.hypot(*(free - start_cell).T) - wanted)
+    goal_cell = free[rng.choice(np.flatnonzero(gaps <= gaps.min() + 1))]
+    to_pixels = lambda cell: (int(cell[0]) * CELL_SIZE + CELL_SIZE // 2, int(cell[1]) * CELL_SIZE + CELL_SIZE // 2)
+    name = f"{layout}-{width}x{height}-d{density:g}-{distance}-s{seed}"
+    return Scenario(name, width, height, obstacles, to_pixels(start_cell), to_pixels(goal_cell), grid)
+
+
+def scenario_matrix(seeds=(0,), sizes=((900, 500), (1800, 1000)), layouts=('open', 'maze'),
+                    densities=(0.45, 0.6), distances=('near', 'far')):
+    """
+    Generate every combination of the given scenario parameters.
+
+    Returns:
+        list: The scenarios.
+    """
+    return [generate_scenario(seed, width, height, layout, density, distance)
+            for seed in seeds for width, height in sizes for layout in layouts
+            for density in densities for distance in distances]
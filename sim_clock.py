@@ -0,0 +1,76 @@
+# Fixed physics step in seconds, the robot speeds are integrated with this step
+DT = 1 / 60
+# Time scales selectable from the keyboard
+TIME_SCALES = [0.25, 0.5, 1, 2, 5, 10, 20, 50, 100]
+
+
+class SimClock:
+    """
+    Fixed-timestep clock decoupling the simulation from the frame rate.
+
+    The wall time of every rendered frame, multiplied by the time scale, is added to an accumulator that is
+    spent in steps of dt. Slow frames therefore run several physics steps instead of slowing the robot down,
+    and a time scale above one runs a whole batch of steps per frame. At most max_steps steps run per frame;
+    time beyond that is dropped, so a very slow frame cannot make the next ones slower.
+
+    Attributes:
+        dt (float): The physics step in seconds.
+        time_scale (float): Simulated seconds per wall clock second.
+        max_steps (int): The maximum number of steps per frame.
+        sim_time (float): The simulated time in seconds.
+        steps (int): The number of steps run so far.
+    """
+    def __init__(self, dt=DT, time_scale=1.0, max_steps=2000):
+        """
+        Initialize the clock.
+
+        Args:
+            dt (float): The physics step in seconds.
+            time_scale (float): Simulated seconds per wall clock second.
+            max_steps (int): The maximum number of steps per frame.
+        """
+        self.dt = dt
+        self.time_scale = time_scale
+        self.max_steps = max_steps
+        self.sim_time = 0.0
+        self.steps = 0
+        self._accumulator = 0.0
+
+    def advance(self, elapsed):
+        """
+        Add the wall time of a frame and get the number of physics steps to run for it.
+
+        Args:
+            elapsed (float): The wall time since the last frame in seconds.
+
+        Returns:
+            int: The number of steps.
+        """
+        self._accumulator += elapsed * self.time_scale
+        steps = int(self._accumulator / self.dt)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self._accumulator = 0.0
+        else:
+            self._accumulator -= steps * self.dt
+        self.sim_time += steps * self.dt
+        self.steps += steps
+        return steps
+
+    def change_scale(self, direction):
+        """
+        Select the next faster or slower time scale of TIME_SCALES.
+
+        Args:
+            direction (int): 1 for faster, -1 for slower.
+
+        Returns:
+            float: The new time scale.
+        """
+        faster = [scale for scale in TIME_SCALES if scale > self.time_scale]
+        slower = [scale for scale in TIME_SCALES if scale < self.time_scale]
+        if direction > 0 and faster:
+            self.time_scale = faster[0]
+        elif direction < 0 and slower:
+            self.time_scale = slower[-1]
+        return self.time_scale
@@ -0,0 +1,171 @@
+import math
+import numpy as np
+from occupancy import obstacle_bounds, is_box, half_planes
+
+
+class ObstacleIndex:
+    """
+    Array-backed obstacle store with a uniform-grid spatial index for hit-testing.
+
+    The bounding boxes of the obstacles are kept in a (capacity, 4) array of x_min, y_min, x_max, y_max rows.
+    Every obstacle is registered in the buckets its bounding box grown by max_padding overlaps, so a point
+    query only tests the few obstacles of the bucket the point falls in, for any padding up to max_padding.
+    Obstacles that are not axis-aligned rectangles also keep their edge half-planes, which points inside
+    the padded bounding box are tested against, so they cover the same zone as occupancy.inflate_polygon.
+
+    Attributes:
+        max_padding (float): The largest padding queries may use.
+        bucket_size (int): The side of a bucket in pixels.
+        bounds (np.array): The bounding boxes, only the first len(self) rows are used.
+    """
+    def __init__(self, max_padding=0.0, bucket_size=64, capacity=16):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_padding (float): The largest padding queries may use.
+            bucket_size (int): The side of a bucket in pixels.
+            capacity (int): The initial number of preallocated rows.
+        """
+        self.max_padding = max_padding
+        self.bucket_size = bucket_size
+        self.bounds = np.zeros((capacity, 4))
+        self._count = 0
+        self._buckets = {}
+        self._planes = {}
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """
+        Remove every obstacle.
+        """
+        self._count = 0
+        self._buckets.clear()
+        self._planes.clear()
+
+    def add(self, obstacle):
+        """
+        Add an obstacle.
+
+        Args:
+            obstacle (tuple): The corner points of the obstacle.
+
+        Returns:
+            int: The id of the obstacle, its row in bounds.
+        """
+        if self._count == len(self.bounds):
+            self.bounds = np.concatenate((self.bounds, np.zeros_like(self.bounds)))
+        index = self._count
+        self.bounds[index] = obstacle_bounds(obstacle)
+        if not is_box(obstacle):
+            self._planes[index] = half_planes(obstacle)
+        self._count += 1
+        x_min, y_min, x_max, y_max = self.bounds[index]
+        pad, size = self.max_padding, self.bucket_size
+        for bx in range(math.floor((x_min - pad) / size), math.floor((x_max + pad) / size) + 1):
+            for by in range(math.floor((y_min - pad) / size), math.floor((y_max + pad) / size) + 1):
+                self._buckets.setdefault((bx, by), []).append(index)
+        return index
+
+    def extend(self, obstacles):
+        """
+        Add several obstacles.
+
+        Args:
+            obstacles (iterable): The obstacles.
+        """
+        for obstacle in obstacles:
+            self.add(obstacle)
+
+    def _bucket(self, pos):
+        """
+        Get the ids of the obstacles registered in the bucket of a position.
+        """
+        return self._buckets.get((math.floor(pos[0] / self.bucket_size), math.floor(pos[1] / self.bucket_size)), ())
+
+    def _inside_planes(self, index, points, padding):
+        """
+        Test points inside the padded bounding box of an obstacle against its half-planes, if it has any.
+        """
+        planes = self._planes.get(index)
+        if planes is None:
+            return True
+        normals, offsets = planes[:, :2], planes[:, 2]
+        reach = padding * np.abs(normals).sum(axis=1) + offsets + 1e-9 * np.maximum(np.abs(offsets), 1)
+        return (np.asarray(points, dtype=np.float64) @ normals.T <= reach).all(axis=-1)
+
+    def contains(self, pos, padding=0.0):
+        """
+        Check if a position is inside any obstacle grown by padding.
+
+        Args:
+            pos (tuple): The position to check.
+            padding (float): The padding, at most max_padding.
+
+        Returns:
+            bool: True if the position is covered, False otherwise.
+        """
+        bounds = self.bounds
+        for index in self._bucket(pos):
+            x_min, y_min, x_max, y_max = bounds[index]
+            if x_min - padding <= pos[0] <= x_max + padding and y_min - padding <= pos[1] <= y_max + padding and \
+                    self._inside_planes(index, pos, padding):
+                return True
+        return False
+
+    def query(self, pos, padding=0.0):
+        """
+        Get the ids of all obstacles that contain a position when grown by padding.
+
+        Args:
+            pos (tuple): The position to check.
+            padding (float): The padding, at most max_padding.
+
+        Returns:
+            list: The ids of the obstacles.
+        """
+        bounds = self.bounds
+        return [index for index in self._bucket(pos)
+                if bounds[index, 0] - padding <= pos[0] <= bounds[index, 2] + padding and
+                bounds[index, 1] - padding <= pos[1] <= bounds[index, 3] + padding and
+                self._inside_planes(index, pos, padding)]
+
+    def contains_many(self, points, padding=0.0):
+        """
+        Vectorized contains for many points at once.
+
+        Points are grouped by bucket and every group is tested against the obstacles of its bucket with
+        array operations.
+
+        Args:
+            points (np.array): (n, 2) array of positions.
+            padding (float): The padding, at most max_padding.
+
+        Returns:
+            np.array: Boolean array telling for every point whether it is covered.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.zeros(len(points), dtype=bool)
+        if not len(points) or not self._count:
+            return result
+        cells = np.floor(points / self.bucket_size).astype(np.int64)
+        keys, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind='stable')
+        splits = np.searchsorted(inverse[order], np.arange(1, len(keys)))
+        for key, members in zip(keys.tolist(), np.split(order, splits)):
+            ids = self._buckets.get(tuple(key))
+            if not ids:
+                continue
+            box = self.bounds[ids]
+            group = points[members]
+            inside = (box[None, :, 0] - padding <= group[:, 0, None]) & (group[:, 0, None] <= box[None, :, 2] + padding) & \
+                     (box[None, :, 1] - padding <= group[:, 1, None]) & (group[:, 1, None] <= box[None, :, 3] + padding)
+            for column, index in enumerate(ids):
+                if index in self._planes:
+                    rows = inside[:, column]
+                    rows[rows] = self._inside_planes(index, group[rows], padding)
+            result[members] = inside.any(axis=1)
+        return result
@@ -0,0 +1,376 @@
+import bisect
+import math
+import mmap
+import struct
+
+# Log layout: a header followed by records, each a kind byte and a tick number and a payload depending on the kind.
+#   header:     magic (8s), format version (H), reserved (H)
+#   tick:       x, y, angle_rad, AMR target x, y (5f, NaN without target), buffer length (H)
+#   target:     map target x, y (2f, NaN without target)
+#   obstacle:   number of points (H), points (2f each)
+#   obstacles:  number of obstacles (I), then each obstacle like an obstacle record
+#   plan:       number of waypoints (I), waypoints (2f each)
+# Events are stamped with the first tick whose state includes them, the state at a tick is the result of all records
+# stamped up to it. A tick record is only written when the state changed, so a robot standing still costs nothing.
+MAGIC = b"AMRLOG\x00\x00"
+FORMAT_VERSION = 1
+TICK, TARGET, OBSTACLE, OBSTACLES, PLAN = range(5)
+_HEADER = struct.Struct("<8sHH")
+_RECORD = struct.Struct("<BI")
+_TICK = struct.Struct("<fffffH")
+_POINT = struct.Struct("<ff")
+_SHORT = struct.Struct("<H")
+_COUNT = struct.Struct("<I")
+NAN = float('nan')
+
+
+def _pack_points(count_struct, points):
+    return count_struct.pack(len(points)) + b"".join(_POINT.pack(*point) for point in points)
+
+
+def _unpack_points(count_struct, data, offset):
+    count, = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    values = struct.unpack_from(f"<{2 * count}f", data, offset)
+    values = [int(value) if value.is_integer() else value for value in values]
+    return tuple(zip(values[0::2], values[1::2])), offset + 8 * count
+
+
+def _pack_xy(point):
+    return _POINT.pack(*(point or (NAN, NAN)))
+
+
+def _pack_state(amr):
+    target = amr.target or (NAN, NAN)
+    return _TICK.pack(amr.x, amr.y, amr.angle_rad, target[0], target[1], min(len(amr.buffer), 0xFFFF))
+
+
+def _pack_obstacles(obstacles):
+    return _COUNT.pack(len(obstacles)) + b"".join(_pack_points(_SHORT, obstacle) for obstacle in obstacles)
+
+
+def _unpack_xy(x, y):
+    return None if math.isnan(x) else (x, y)
+
+
+class TelemetryRecorder:
+    """
+    Append-only binary log of the AMR state at every tick and of the map events.
+
+    Records are packed into a memory buffer that is written to the file once it holds buffer_size bytes,
+    so recording a tick costs a struct.pack and no system call.
+
+    Attributes:
+        path (str): The path of the log file.
+        ticks (int): The number of ticks recorded so far.
+    """
+    def __init__(self, path, buffer_size=1 << 16):
+        """
+        Create the log file, overwriting an existing one.
+
+        Args:
+            path (str): The path of the log file.
+            buffer_size (int): The number of buffered bytes that triggers a write.
+        """
+        self.path = path
+        self.ticks = 0
+        self.buffer_size = buffer_size
+        self._file = open(path, "wb")
+        self._buffer = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        self._last_state = None
+        self._last_written = True
+
+    def _append(self, kind, tick, payload):
+        self._buffer += _RECORD.pack(kind, tick)
+        self._buffer += payload
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def attach(self, sim_map):
+        """
+        Record the events of a map from now on, starting with its current obstacles, target and AMR state as tick 0.
+        Call it before recording the first tick.
+
+        Args:
+            sim_map (Map): The map.
+        """
+        sim_map.recorder = self
+        self._last_state = _pack_state(sim_map.amr)
+        self._append(OBSTACLES, 0, _pack_obstacles(sim_map.obstacles))
+        self._append(TARGET, 0, _pack_xy(sim_map.target))
+        self._append(TICK, 0, self._last_state)
+
+    def record_tick(self, amr):
+        """
+        Record the state of the AMR after a physics step.
+
+        Args:
+            amr (Amr): The AMR.
+        """
+        self.ticks += 1
+        state = _pack_state(amr)
+        if state == self._last_state:
+            self._last_written = False
+            return
+        self._append(TICK, self.ticks, state)
+        self._last_state = state
+        self._last_written = True
+
+    def target_set(self, target):
+        """
+        Record that the map target was set, or cleared with None.
+        """
+        self._append(TARGET, self.ticks + 1, _pack_xy(target))
+
+    def obstacle_added(self, obstacle):
+        """
+        Record an obstacle added to the map.
+        """
+        self._append(OBSTACLE, self.ticks + 1, _pack_points(_SHORT, obstacle))
+
+    def obstacles_set(self, obstacles):
+        """
+        Record that all obstacles of the map were replaced.
+        """
+        self._append(OBSTACLES, self.ticks + 1, _pack_obstacles(obstacles))
+
+    def plan_computed(self, waypoints):
+        """
+        Record a path loaded into the AMR, an empty one if no path was found.
+        """
+        self._append(PLAN, self.ticks + 1, _pack_points(_COUNT, waypoints))
+
+    def flush(self):
+        """
+        Write the buffered records to the file.
+        """
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        """
+        Write the last tick if it was skipped as unchanged, so the log covers the whole run, and close the file.
+        """
+        if not self._last_written:
+            self._append(TICK, self.ticks, self._last_state)
+        self.flush()
+        self._file.close()
+
+
+class TelemetryLog:
+    """
+    Read-only view of a log file written by TelemetryRecorder.
+
+    The file is memory-mapped, so records are only read from disk when they are decoded.
+    """
+    def __init__(self, path):
+        """
+        Open a log file.
+
+        Args:
+            path (str): The path of the log file.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a telemetry log")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, only versions up to {FORMAT_VERSION} are supported")
+        self.start = _HEADER.size
+
+    def read(self, offset):
+        """
+        Decode the record at an offset.
+
+        Args:
+            offset (int): The offset of the record, self.start for the first one.
+
+        Returns:
+            tuple: (kind, tick, value, offset of the next record), or None at the end of the log. The value is
+                   the (x, y, angle_rad, target, buffer length) tuple of a tick, the target or None, the
+                   obstacle, the list of obstacles or the list of waypoints.
+        """
+        data = self._data
+        if offset + _RECORD.size > len(data):
+            return None
+        kind, tick = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if kind == TICK:
+            x, y, angle, target_x, target_y, buffer_length = _TICK.unpack_from(data, offset)
+            return kind, tick, (x, y, angle, _unpack_xy(target_x, target_y), buffer_length), offset + _TICK.size
+        if kind == TARGET:
+            return kind, tick, _unpack_xy(*_POINT.unpack_from(data, offset)), offset + _POINT.size
+        if kind == OBSTACLE:
+            return (kind, tick) + _unpack_points(_SHORT, data, offset)
+        if kind == PLAN:
+            waypoints, offset = _unpack_points(_COUNT, data, offset)
+            return kind, tick, list(waypoints), offset
+        if kind == OBSTACLES:
+            count, = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            obstacles = []
+            for _ in range(count):
+                obstacle, offset = _unpack_points(_SHORT, data, offset)
+                obstacles.append(obstacle)
+            return kind, tick, obstacles, offset
+        raise ValueError(f"Unknown record kind {kind} in {self.path}")
+
+    def close(self):
+        self._data.close()
+
+
+class Replay:
+    """
+    Reconstruction of a recorded run at any tick, without simulating it again.
+
+    The log is decoded lazily while the replay moves forward. Every keyframe_interval ticks a copy of the
+    reconstructed state is kept, so seeking backwards only decodes the records since the last keyframe.
+
+    Attributes:
+        log (TelemetryLog): The log being replayed.
+        tick (int): The current tick.
+        finished (bool): Flag telling whether the end of the log was reached.
+        x (float): The x position of the AMR.
+        y (float): The y position of the AMR.
+        angle_rad (float): The angle of the AMR.
+        amr_target (tuple): The waypoint the AMR is driving to, or None.
+        buffer_length (int): The number of waypoints left after amr_target.
+        target (tuple): The map target, or None.
+        plan (list): The waypoints of the last planned path.
+        obstacles (list): The obstacles of the map.
+        obstacles_version (int): Counter increased by every obstacle record.
+    """
+    _STATE = ('x', 'y', 'angle_rad', 'amr_target', 'buffer_length', 'target', 'plan', 'obstacles_version')
+
+    def __init__(self, path, keyframe_interval=600):
+        """
+        Open a log and reconstruct its first tick.
+
+        Args:
+            path (str): The path of the log file.
+            keyframe_interval (int): The number of ticks between kept states.
+        """
+        self.log = TelemetryLog(path)
+        self.keyframe_interval = keyframe_interval
+        self.x = self.y = self.angle_rad = 0.0
+        self.amr_target = self.target = None
+        self.buffer_length = 0
+        self.plan = []
+        self.obstacles = []
+        self.obstacles_version = 0
+        self.tick = 0
+        self.finished = False
+        self._offset = self.log.start
+        self._keyframes = []
+        self._keyframe_ticks = []
+        self._shown_version = None
+        self._snapshot(0)
+        self._run_to(0)
+
+    def _snapshot(self, tick):
+        self._keyframe_ticks.append(tick)
+        self._keyframes.append((self._offset, list(self.obstacles)) + tuple(getattr(self, name) for name in self._STATE))
+
+    def _restore(self, index):
+        offset, obstacles, *state = self._keyframes[index]
+        self._offset, self.obstacles = offset, list(obstacles)
+        for name, value in zip(self._STATE, state):
+            setattr(self, name, value)
+
+    def _apply(self, kind, value):
+        if kind == TICK:
+            self.x, self.y, self.angle_rad, self.amr_target, self.buffer_length = value
+        elif kind == TARGET:
+            self.target = value
+        elif kind == PLAN:
+            self.plan = value
+        elif kind == OBSTACLE:
+            self.obstacles.append(value)
+            self.obstacles_version += 1
+        elif kind == OBSTACLES:
+            self.obstacles = value
+            self.obstacles_version += 1
+
+    def _run_to(self, tick):
+        """
+        Apply the records up to a tick, keeping a keyframe every keyframe_interval ticks past the newest one.
+        """
+        next_keyframe = self._keyframe_ticks[-1] + self.keyframe_interval
+        newest = self._keyframes[-1][0]
+        last_tick = self.tick
+        while True:
+            record = self.log.read(self._offset)
+            if record is None:
+                self.finished = True
+                tick = min(tick, last_tick)
+                break
+            kind, stamp, value, next_offset = record
+            if stamp > tick:
+                self.finished = False
+                break
+            if stamp >= next_keyframe and self._offset > newest:
+                # The records applied so far are stamped up to last_tick, so the state holds from the tick after
+                self._snapshot(last_tick + 1)
+                newest = self._offset
+                next_keyframe = stamp + self.keyframe_interval
+            self._apply(kind, value)
+            self._offset = next_offset
+            last_tick = stamp
+        self.tick = tick
+
+    def advance(self, ticks=1):
+        """
+        Move the replay forward.
+
+        Args:
+            ticks (int): The number of ticks.
+
+        Returns:
+            int: The new tick, the last one of the log if its end was reached.
+        """
+        self._run_to(self.tick + ticks)
+        return self.tick
+
+    def seek(self, tick):
+        """
+        Move the replay to a tick, backwards from the closest keyframe before it or forwards from the current tick.
+
+        Args:
+            tick (int): The tick.
+
+        Returns:
+            int: The new tick, the last one of the log if its end was reached.
+        """
+        tick = max(tick, 0)
+        index = bisect.bisect_right(self._keyframe_ticks, tick) - 1
+        if tick < self.tick or self._keyframe_ticks[index] > self.tick:
+            self._restore(index)
+            self.tick = self._keyframe_ticks[index]
+        self._run_to(tick)
+        return self.tick
+
+    @property
+    def buffer(self):
+        """
+        The waypoints left after amr_target, taken from the end of the last plan.
+        """
+        return self.plan[len(self.plan) - self.buffer_length:] if self.buffer_length else []
+
+    def apply_to(self, amr):
+        """
+        Show the replayed state on an AMR and its map. The obstacles are only replaced when they changed.
+
+        Args:
+            amr (Amr): The AMR.
+        """
+        amr.x, amr.y, amr.angle_rad = self.x, self.y, self.angle_rad
+        amr.target, amr.buffer = self.amr_target, self.buffer
+        amr.map.target = self.target
+        if self._shown_version != self.obstacles_version:
+            amr.map.set_obstacles(self.obstacles)
+            self._shown_version = self.obstacles_version
+
+    def close(self):
+        self.log.close()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules live at the repository root and are imported by their file names, like in main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from AMR import Amr
+from headless import KeyState
+
+
+def test_click_does_not_retarget_a_planned_path():
+    amr = Amr(headless=True)
+    amr.map.load_path([(600, 100)])
+    assert amr.buffer == []
+    amr.handle_movement(KeyState(), amr.map.buttons[0])
+    assert amr.target == (600, 100)
+    amr.handle_movement(KeyState(), (100, 100))
+    assert amr.target == (600, 100)
+
+
+def test_click_on_a_button_is_not_a_destination():
+    amr = Amr(headless=True)
+    amr.handle_movement(KeyState(), amr.map.buttons[0])
+    assert amr.target is None
+
+
+@pytest.mark.parametrize("dt", [1 / 60, 0.1, 0.25])
+def test_stop_and_turn_arrives_with_coarse_steps(dt):
+    amr = Amr(450, 250, headless=True, dt=dt)
+    amr.target, amr.plan_trajectory = (600, 100), True
+    for _ in range(2000):
+        if not amr.target:
+            break
+        amr.handle_movement(KeyState(), None)
+    assert amr.target is None
+    assert abs(amr.x - 600) <= 5 and abs(amr.y - 100) <= 5
+
+
+
+def segment_distance(point, a, b):
+    (px, py), (ax, ay), (bx, by) = point, a, b
+    t = max(0.0, min(1.0, ((px - ax) * (bx - ax) + (py - ay) * (by - ay)) / ((bx - ax) ** 2 + (by - ay) ** 2)))
+    return math.hypot(px - ax - t * (bx - ax), py - ay - t * (by - ay))
+
+
+@pytest.mark.parametrize("dt", [1 / 60, 0.1])
+def test_pure_pursuit_follows_a_path_to_the_goal(dt):
+    amr = Amr(100, 400, headless=True, dt=dt)
+    amr.controller = "pure_pursuit"
+    path = [(100, 400), (100, 100), (500, 100), (500, 300)]
+    amr.target, amr.buffer, amr.plan_trajectory = path[1], path[2:], True
+    farthest = 0.0
+    for _ in range(3000):
+        if not amr.plan_trajectory:
+            break
+        amr.handle_movement(KeyState(), None)
+        farthest = max(farthest, min(segment_distance((amr.x, amr.y), a, b) for a, b in zip(path, path[1:])))
+    assert amr.target is None
+    assert math.dist((amr.x, amr.y), path[-1]) <= 5
+    # Corners are cut by less than the lookahead distance
+    assert farthest < amr.lookahead
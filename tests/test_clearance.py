@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+import pytest
+
+from clearance import ClearanceField
+from occupancy import fill_polygon, rasterize_obstacles
+from scenarios import rectangle
+
+WIDTH, HEIGHT, MAX_DISTANCE = 200, 150, 40.0
+
+
+def random_obstacles(rng):
+    obstacles = []
+    for _ in range(int(rng.integers(1, 5))):
+        x, y = int(rng.integers(0, WIDTH - 20)), int(rng.integers(0, HEIGHT - 20))
+        obstacles.append(rectangle(x, y, x + int(rng.integers(1, 20)), y + int(rng.integers(1, 20))))
+    center = rng.uniform((20, 20), (WIDTH - 20, HEIGHT - 20))
+    angles = np.sort(rng.uniform(0, 2 * math.pi, 5))
+    obstacles.append(tuple(map(tuple, center + 15 * np.column_stack((np.cos(angles), np.sin(angles))))))
+    return obstacles
+
+
+def brute_force_distances(blocked, points):
+    cells = np.argwhere(blocked)
+    if not len(cells):
+        return np.full(len(points), MAX_DISTANCE)
+    distances = np.hypot(*(points[:, None, :] - cells[None, :, :]).transpose(2, 0, 1)).min(axis=1)
+    return np.minimum(distances, MAX_DISTANCE)
+
+
+def footprint(center, angle, width=30, height=45):
+    half_w, half_h = width / 2, height / 2
+    corners = np.array([(-half_w, -half_h), (half_w, -half_h), (half_w, half_h), (-half_w, half_h)])
+    rotation = np.array([[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]])
+    return corners @ rotation.T + center
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_clearances_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    obstacles = random_obstacles(rng)
+    field = ClearanceField(obstacles, WIDTH, HEIGHT, MAX_DISTANCE)
+    blocked = rasterize_obstacles(obstacles, WIDTH, HEIGHT, 0)
+    points = np.column_stack((rng.integers(0, WIDTH, 300), rng.integers(0, HEIGHT, 300)))
+    assert field.clearances(points) == pytest.approx(brute_force_distances(blocked, points), abs=1e-3)
+
+
+def test_added_obstacle_matches_a_fresh_field():
+    rng = np.random.default_rng(0)
+    obstacles = random_obstacles(rng)
+    field = ClearanceField(obstacles[:-1], WIDTH, HEIGHT, MAX_DISTANCE)
+    field.add_obstacle(obstacles[-1])
+    assert np.allclose(field.field, ClearanceField(obstacles, WIDTH, HEIGHT, MAX_DISTANCE).field, atol=1e-4)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_collides_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    obstacles = random_obstacles(rng)
+    field = ClearanceField(obstacles, WIDTH, HEIGHT, MAX_DISTANCE)
+    blocked = rasterize_obstacles(obstacles, WIDTH, HEIGHT, 0).astype(bool)
+    for _ in range(20):
+        corners = footprint(rng.uniform((30, 30), (WIDTH - 30, HEIGHT - 30)), rng.uniform(0, 2 * math.pi))
+        covered = np.zeros((WIDTH, HEIGHT), dtype=bool)
+        fill_polygon(covered, corners)
+        gap = brute_force_distances(blocked, np.argwhere(covered)).min() if covered.any() else MAX_DISTANCE
+        if (covered & blocked).any():
+            assert field.collides(corners)
+        elif gap > 8:
+            assert not field.collides(corners)
+
+
+def test_obstacle_under_the_footprint_collides():
+    obstacles = [rectangle(98, 73, 102, 77)]
+    field = ClearanceField(obstacles, WIDTH, HEIGHT, MAX_DISTANCE)
+    assert field.collides(footprint((100, 75), 0.3))
+    assert not field.collides(footprint((160, 75), 0.3))
+
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from a_star import AStarEngine, path_cost
+from benchmark import random_grid
+from cost_field import CostField, CostFieldCache
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cost_to_go_matches_a_star(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(int(rng.integers(2, 40)), int(rng.integers(2, 40)), rng.uniform(0, 0.45), seed)
+    free = np.argwhere(grid == 0).tolist()
+    goal = tuple(free[rng.integers(len(free))])
+    field = CostField(grid, goal)
+    engine = AStarEngine()
+    for _ in range(10):
+        src = tuple(free[rng.integers(len(free))])
+        path = engine.search(grid, src, goal)
+        if src == goal:
+            assert field.cost(src) == 0
+        elif not path:
+            assert field.cost(src) == float('inf')
+            assert field.path_from(src) == []
+        else:
+            assert field.cost(src) == pytest.approx(path_cost(path, src), abs=1e-9)
+            assert path_cost(field.path_from(src), src) == pytest.approx(path_cost(path, src), abs=1e-9)
+
+
+def test_cache_evicts_the_least_recently_used_field_at_its_byte_limit():
+    grid = np.zeros((20, 20), dtype=np.uint8)
+    field_bytes = CostField(grid, (0, 0)).costs.nbytes
+    cache = CostFieldCache(max_bytes=2 * field_bytes)
+    first = cache.lookup(1, grid, (0, 0))
+    cache.lookup(1, grid, (5, 5))
+    assert cache.lookup(1, grid, (0, 0)) is first
+    cache.lookup(1, grid, (9, 9))
+    assert len(cache) == 2
+    assert cache.lookup(1, grid, (0, 0)) is first
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.lookup(1, grid, (5, 5))
+    assert cache.misses == 4
+
+
+def test_cache_keeps_the_newest_field_above_its_limit_and_drops_old_versions():
+    grid = np.zeros((20, 20), dtype=np.uint8)
+    cache = CostFieldCache(max_bytes=1)
+    cache.lookup(1, grid, (0, 0))
+    cache.lookup(1, grid, (5, 5))
+    assert len(cache) == 1
+    cache.lookup(2, grid, (5, 5))
+    assert cache.misses == 3
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from a_star import AStarEngine, path_cost
+from dstar_lite import DStarLite
+
+
+def random_blocks(rng, grid, count, size):
+    for _ in range(count):
+        row, col = int(rng.integers(grid.shape[0])), int(rng.integers(grid.shape[1]))
+        grid[row:row + int(rng.integers(1, size + 1)), col:col + int(rng.integers(1, size + 1))] = 1
+
+
+def assert_same_cost(path, expected, src):
+    assert bool(path) == bool(expected)
+    assert path_cost(path, src) == pytest.approx(path_cost(expected, src), abs=1e-9)
+
+
+def test_first_search_matches_a_star():
+    rng = np.random.default_rng(0)
+    grid = np.zeros((40, 60), dtype=np.uint8)
+    random_blocks(rng, grid, 60, 5)
+    grid[0, 0] = grid[-1, -1] = 0
+    planner = DStarLite(grid, (39, 59))
+    assert_same_cost(planner.search_from((0, 0)), AStarEngine().search(grid, (0, 0), (39, 59)), (0, 0))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_repair_matches_fresh_a_star(seed):
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((30, 45), dtype=np.uint8)
+    random_blocks(rng, grid, 25, 4)
+    goal = (29, 44)
+    src = (0, 0)
+    grid[goal] = grid[src] = 0
+    planner = DStarLite(grid, goal)
+    engine = AStarEngine()
+    path = planner.search_from(src)
+    for _ in range(15):
+        row, col = int(rng.integers(grid.shape[0])), int(rng.integers(grid.shape[1]))
+        rows = slice(row, min(row + int(rng.integers(1, 6)), grid.shape[0]))
+        cols = slice(col, min(col + int(rng.integers(1, 6)), grid.shape[1]))
+        grid[rows, cols] = 1
+        grid[goal] = 0
+        if path and len(path) > 3:
+            src = path[2]
+        grid[src] = 0
+        planner.update_region(grid, rows, cols)
+        planner.update_cells([src, goal], grid)
+        path = planner.search_from(src)
+        assert_same_cost(path, engine.search(grid, src, goal), src)
+
+
+def test_repair_after_cut_on_default_map():
+    from AMR import Amr
+    from map import Map
+    sim_map = Map(Amr(headless=True))
+    sim_map.update_grid()
+    sim_map.dstar = planner = DStarLite(sim_map.downsized_grid, (80, 40))
+    assert planner.search_from((10, 10))
+    sim_map.add_obstacle(((318, 224), (318, 240), (374, 240), (374, 224)))
+    path = planner.search_from((10, 10))
+    assert path
+    assert_same_cost(path, AStarEngine().search(sim_map.downsized_grid, (10, 10), (80, 40)), (10, 10))
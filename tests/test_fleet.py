@@ -0,0 +1,26 @@
+import pytest
+
+from AMR import Amr
+from fleet import Fleet
+from headless import KeyState
+
+
+@pytest.mark.parametrize("dt", [1 / 60, 0.1])
+def test_default_fleet_moves_like_an_amr(dt):
+    amr = Amr(450, 250, headless=True, dt=dt)
+    amr.target, amr.buffer, amr.plan_trajectory = (600, 100), [(300, 150)], True
+    fleet = Fleet(dt=dt)
+    fleet.set_path(fleet.add(450, 250), [(600, 100), (300, 150)])
+    for _ in range(400):
+        amr.handle_movement(KeyState(), None)
+        fleet.step()
+        assert fleet.x[0] == pytest.approx(amr.x, abs=1e-6)
+        assert fleet.y[0] == pytest.approx(amr.y, abs=1e-6)
+    assert not fleet.has_target[0] and amr.target is None
+
+
+def test_from_amr_rejects_pure_pursuit():
+    amr = Amr(headless=True)
+    amr.controller = "pure_pursuit"
+    with pytest.raises(ValueError):
+        Fleet.from_amr(amr)
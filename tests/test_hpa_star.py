@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from a_star import AStarEngine
+from benchmark import random_grid
+from hpa_star import HpaPlanner
+
+
+def assert_valid_path(grid, src, dest, path):
+    assert path[-1] == dest
+    for (row_a, col_a), (row_b, col_b) in zip([src] + path, path):
+        assert max(abs(row_a - row_b), abs(col_a - col_b)) == 1
+        assert not grid[row_b, col_b]
+
+
+def graph(planner):
+    transitions = {key: sorted(pairs) for key, pairs in planner.transitions.items() if pairs}
+    intra = {cluster: {cell: sorted((other, round(cost, 9)) for other, cost in edges) for cell, edges in cells.items()}
+             for cluster, cells in planner.intra.items() if cells}
+    return transitions, intra
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_reaches_the_same_cells_as_a_star(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(int(rng.integers(5, 50)), int(rng.integers(5, 50)), rng.uniform(0, 0.4), seed)
+    planner = HpaPlanner(grid, cluster_size=int(rng.integers(3, 11)))
+    free = np.argwhere(grid == 0).tolist()
+    engine = AStarEngine()
+    for _ in range(10):
+        src, dest = tuple(free[rng.integers(len(free))]), tuple(free[rng.integers(len(free))])
+        path = planner.search(src, dest)
+        assert bool(path) == bool(engine.search(grid, src, dest))
+        if path:
+            assert_valid_path(grid, src, dest, path)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_update_region_matches_a_fresh_build(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(40, 50, 0.2, seed)
+    planner = HpaPlanner(grid, cluster_size=8)
+    for _ in range(5):
+        row, col = int(rng.integers(40)), int(rng.integers(50))
+        rows = slice(row, min(row + int(rng.integers(1, 8)), 40))
+        cols = slice(col, min(col + int(rng.integers(1, 8)), 50))
+        grid[rows, cols] = 1 - grid[rows, cols]
+        planner.update_region(rows, cols)
+    assert graph(planner) == graph(HpaPlanner(grid.copy(), cluster_size=8))
+
+
+def test_saved_graph_matches_the_built_one():
+    grid = random_grid(30, 30, 0.2, 0)
+    planner = HpaPlanner(grid, cluster_size=6)
+    restored = HpaPlanner.from_arrays(grid, 6, **planner.to_arrays())
+    assert restored.search((0, 0), (29, 29)) == planner.search((0, 0), (29, 29))
+    assert graph(restored) == graph(planner)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from a_star import AStarEngine, path_cost
+from benchmark import random_grid
+from jps import JumpPointEngine
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_cost_matches_a_star(seed):
+    rng = np.random.default_rng(seed)
+    grid = random_grid(int(rng.integers(2, 40)), int(rng.integers(2, 40)), rng.uniform(0, 0.45), seed)
+    free = np.argwhere(grid == 0).tolist()
+    src, dest = tuple(free[rng.integers(len(free))]), tuple(free[rng.integers(len(free))])
+    path = AStarEngine().search(grid, src, dest)
+    jump_path = JumpPointEngine().search(grid, src, dest)
+    assert bool(jump_path) == bool(path)
+    assert path_cost(jump_path, src) == pytest.approx(path_cost(path, src), abs=1e-9)
+
+
+def test_open_grid_goes_straight_and_diagonal():
+    grid = np.zeros((10, 20), dtype=np.uint8)
+    path = JumpPointEngine().search(grid, (0, 0), (9, 19))
+    assert path[-1] == (9, 19)
+    assert path_cost(path, (0, 0)) == pytest.approx(9 * 2 ** 0.5 + 10)
@@ -0,0 +1,48 @@
+from AMR import Amr
+from planner_worker import BackgroundPlanner
+from profiler import PROFILER
+
+
+def test_rejoin_path_drops_passed_cells():
+    sim_map = Amr(headless=True).map
+    sim_map.update_grid()
+    path = [(10, 10 + i) for i in range(1, 20)]
+    assert sim_map.rejoin_path((10, 10), (10, 10), path) == path
+    assert sim_map.rejoin_path((10, 15), (10, 10), path) == path[5:]
+    assert sim_map.rejoin_path((11, 17), (10, 10), path) == path[7:]
+    assert sim_map.rejoin_path((10, 29), (10, 10), path) == [(10, 29)]
+
+
+def test_background_path_starts_at_the_current_position():
+    amr = Amr(x=100, y=100, headless=True)
+    sim_map = amr.map
+    sim_map.simplify_paths = False
+    sim_map.planner = BackgroundPlanner()
+    try:
+        sim_map.set_target((700, 100))
+        assert not sim_map.find_path()
+        sim_map.planner.pending.future.result()
+        amr.x = 400
+        sim_map.poll_planning()
+    finally:
+        sim_map.planner.shutdown()
+    assert amr.plan_trajectory
+    assert amr.target[0] > 400
+    assert all(x > 400 for x, _ in amr.buffer)
+
+
+def test_background_search_time_is_profiled():
+    amr = Amr(x=100, y=100, headless=True)
+    sim_map = amr.map
+    sim_map.planner = BackgroundPlanner()
+    PROFILER.enabled = True
+    try:
+        sim_map.set_target((700, 400))
+        sim_map.find_path()
+        sim_map.planner.pending.future.result()
+        sim_map.poll_planning()
+        assert PROFILER.frame["a_star"] > 0
+    finally:
+        sim_map.planner.shutdown()
+        PROFILER.enabled = False
+        PROFILER.frame = {}
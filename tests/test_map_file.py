@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from headless import HeadlessSimulation
+from scenarios import rectangle
+
+
+@pytest.fixture
+def saved_map(tmp_path):
+    sim_map = HeadlessSimulation().map
+    sim_map.algorithm = "hpa"
+    sim_map.set_obstacles(sim_map.obstacles + [rectangle(200, 100, 260, 300),
+                                               ((500, 100), (620, 180), (540, 260))])
+    sim_map.plan_path((100, 100), (800, 400))
+    path = tmp_path / "map.bin"
+    sim_map.save(str(path))
+    return sim_map, str(path)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(saved_map, mmap):
+    sim_map, path = saved_map
+    loaded = HeadlessSimulation().map
+    loaded.algorithm = "hpa"
+    assert loaded.load(path, mmap)
+    assert isinstance(loaded.downsized_grid, np.memmap) == mmap
+    assert loaded.obstacles == sim_map.obstacles
+    assert np.array_equal(loaded.danger_map, sim_map.danger_map)
+    assert np.array_equal(loaded.downsized_grid, sim_map.downsized_grid)
+    assert loaded.hpa is not None
+    assert loaded.plan_path((100, 100), (800, 400)) == sim_map.plan_path((100, 100), (800, 400))
+
+
+def test_save_over_the_loaded_file(saved_map):
+    sim_map, path = saved_map
+    loaded = HeadlessSimulation().map
+    loaded.load(path)
+    loaded.add_obstacle(rectangle(700, 50, 720, 70))
+    loaded.save(path)
+    assert not isinstance(loaded.downsized_grid, np.memmap)
+    reloaded = HeadlessSimulation().map
+    assert reloaded.load(path)
+    assert np.array_equal(reloaded.downsized_grid, loaded.downsized_grid)
+    assert reloaded.downsized_grid.sum() > sim_map.downsized_grid.sum()
+
+
+def test_changed_obstacles_rebuild_the_grids(saved_map):
+    sim_map, path = saved_map
+    loaded = HeadlessSimulation(map_size=(sim_map.width, sim_map.height)).map
+    loaded.amr.half_diag += 1
+    assert not loaded.load(path)
+    assert not loaded.grid_valid
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from occupancy import fill_polygon, half_planes, inflate_polygon
+
+
+def half_plane_fill(width, height, polygon):
+    """
+    Reference fill testing every pixel against the half-planes of the polygon.
+    """
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height), indexing='ij')
+    inside = np.ones((width, height), dtype=bool)
+    for normal_x, normal_y, offset in half_planes(polygon):
+        inside &= normal_x * xs + normal_y * ys <= offset + 1e-9 * max(abs(offset), 1)
+    return inside
+
+
+def random_polygon(rng, width, height):
+    center = rng.uniform(0, (width, height))
+    angles = np.sort(rng.uniform(0, 2 * np.pi, int(rng.integers(3, 8))))
+    radius = rng.uniform(1, 25)
+    return [tuple(point) for point in center + radius * np.column_stack((np.cos(angles), np.sin(angles)))]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_fill_polygon_matches_half_planes(seed):
+    rng = np.random.default_rng(seed)
+    polygon = inflate_polygon(random_polygon(rng, 60, 40), 0)
+    out = np.zeros((60, 40), dtype=bool)
+    fill_polygon(out, polygon)
+    assert np.array_equal(out, half_plane_fill(60, 40, polygon))
+
+
+@pytest.mark.parametrize("polygon", [
+    [(5, 5), (5, 20), (30, 20), (30, 5)],
+    [(10, 2), (25, 18), (3, 30)],
+    [(0, 0), (59, 39), (0, 39)],
+])
+def test_fill_polygon_matches_half_planes_on_integer_corners(polygon):
+    out = np.zeros((60, 40), dtype=bool)
+    fill_polygon(out, inflate_polygon(polygon, 0))
+    assert np.array_equal(out, half_plane_fill(60, 40, polygon))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from trail import Trail
+
+
+def test_capacity_zero_records_nothing():
+    trail = Trail(0)
+    assert not trail.append(1, 2)
+    assert len(trail) == 0
+    assert trail.visible() == []
+    assert trail.export().shape == (0, 2)
+
+
+def test_capacity_one_keeps_the_last_point():
+    trail = Trail(1, min_distance=0)
+    for x in range(5):
+        assert trail.append(x, 2 * x)
+    assert len(trail) == 1
+    assert trail.visible() == [[4, 8]]
+
+
+def test_full_trail_overwrites_the_oldest_points():
+    trail = Trail(3, min_distance=1)
+    for x in range(5):
+        trail.append(x, 0)
+    assert np.array_equal(trail.export(), [[2, 0], [3, 0], [4, 0]])
+
+
+def test_close_points_are_decimated():
+    trail = Trail(10, min_distance=5)
+    assert trail.append(0, 0)
+    assert not trail.append(3, 0)
+    assert trail.append(5, 0)
+    assert len(trail) == 2
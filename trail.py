@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class Trail:
+    """
+    Bounded trajectory trail stored in a preallocated NumPy ring buffer.
+
+    A point is only stored when it lies at least min_distance away from the last stored point, and once the
+    buffer is full the oldest point is overwritten. A trail with capacity 0 records nothing.
+
+    Attributes:
+        capacity (int): The maximum number of stored points.
+        min_distance (float): The minimum distance between consecutive stored points.
+    """
+    def __init__(self, capacity=2000, min_distance=15.0):
+        """
+        Initialize an empty trail.
+
+        Args:
+            capacity (int): The maximum number of stored points, 0 to record nothing.
+            min_distance (float): The minimum distance between consecutive stored points.
+        """
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self._points = np.zeros((capacity, 2))
+        self._start = 0
+        self._count = 0
+        self._last = None
+
+    def __len__(self):
+        return self._count
+
+    def append(self, x, y):
+        """
+        Store a point unless it is closer than min_distance to the last stored point.
+
+        Args:
+            x (float): The x coordinate.
+            y (float): The y coordinate.
+
+        Returns:
+            bool: True if the point was stored, False if it was decimated or the trail records nothing.
+        """
+        if not self.capacity:
+            return False
+        if self._last and (x - self._last[0]) ** 2 + (y - self._last[1]) ** 2 < self.min_distance ** 2:
+            return False
+        end = (self._start + self._count) % self.capacity
+        self._points[end] = x, y
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self._last = (x, y)
+        return True
+
+    def clear(self):
+        """
+        Remove every point.
+        """
+        self._start = self._count = 0
+        self._last = None
+
+    def segments(self):
+        """
+        Get the stored points as at most two views of the ring buffer, oldest first, without copying.
+
+        Returns:
+            list: List of (n, 2) arrays.
+        """
+        end = self._start + self._count
+        if end <= self.capacity:
+            return [self._points[self._start:end]]
+        return [self._points[self._start:], self._points[:end - self.capacity]]
+
+    def visible(self, stride=1):
+        """
+        Get the points to draw as a list of [x, y] pairs.
+
+        Args:
+            stride (int): Keep every stride-th point.
+
+        Returns:
+            list: The points, oldest first.
+        """
+        points = []
+        for segment in self.segments():
+            points += segment.tolist()
+        return points[::stride] if stride > 1 else points
+
+    def export(self):
+        """
+        Export the full retained trace.
+
+        Returns:
+            np.array: (n, 2) copy of the stored points, oldest first.
+        """
+        return np.concatenate(self.segments())